@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the compact model output schema.
+Measures output size and server-side processing time (parse, expand,
+filter, derive) of the verbose and compact wire formats, using the
+expected_*_structure.json plans, with the workout fixture's placeholder
+exercises replaced by catalog IDs as the model emits them. Token counts
+and the model generation time they save are estimates: no model is called.
+"""
+
+import json
+import re
+import sys
+import os
+import time
+import copy
+import itertools
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.compact_schema_service import CompactSchemaService
+from services.ai_filter_service import AIFilterService
+from services.plan_derivation_service import PlanDerivationService
+
+ITERATIONS = 200
+# Rough Gemini Flash decode rate, used to turn token savings into seconds
+OUTPUT_TOKENS_PER_SECOND = 150
+
+TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate BPE token count: words, short digit groups and punctuation."""
+    return len(TOKEN_PATTERN.findall(text))
+
+
+def model_output(plan, daily_key, exercise_ids=()):
+    """
+    Strip server-derived fields so the plan matches what the model emits.
+    Exercises reference the catalog by ID (cycling through exercise_ids)
+    instead of the fixture's "Exercise N" names.
+    """
+    plan = copy.deepcopy(plan)
+    ids = itertools.cycle(exercise_ids)
+    for day in plan.get(daily_key, {}).values():
+        for field in ('day_of_week', 'date', 'daily_totals'):
+            day.pop(field, None)
+        for exercise in day.get('exercises', []) if exercise_ids else []:
+            exercise.pop('name', None)
+            exercise['exercise_id'] = next(ids)
+    return plan
+
+
+def time_pipeline(text, expand, filter_plan, derive, month, year):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        data = expand(json.loads(text))
+        filtered = filter_plan(data)
+        derive(filtered, month, year)
+    return (time.perf_counter() - start) / ITERATIONS * 1000
+
+
+def run_benchmark(label, plan, daily_key, compact, expand, filter_plan, derive):
+    verbose_text = json.dumps(plan)
+    compact_text = json.dumps(compact)
+    month = plan['monthly_overview']['month']
+    year = plan['monthly_overview']['year']
+
+    verbose_tokens = estimate_tokens(verbose_text)
+    compact_tokens = estimate_tokens(compact_text)
+    verbose_ms = time_pipeline(verbose_text, lambda d: d, filter_plan, derive, month, year)
+    compact_ms = time_pipeline(compact_text, expand, filter_plan, derive, month, year)
+
+    saved_seconds = (verbose_tokens - compact_tokens) / OUTPUT_TOKENS_PER_SECOND
+
+    print(f"{label}:")
+    print(f"  Output bytes (measured):   verbose {len(verbose_text):>7}  compact {len(compact_text):>7}")
+    print(f"  Output tokens (estimated): verbose {verbose_tokens:>7}  compact {compact_tokens:>7}  "
+          f"({100 * (1 - compact_tokens / verbose_tokens):.1f}% fewer)")
+    print(f"  Processing (measured):     verbose {verbose_ms:>6.2f}ms compact {compact_ms:>6.2f}ms "
+          f"(parse+expand+filter+derive, mean of {ITERATIONS})")
+    print(f"  Generation time saved (estimate, not measured): {saved_seconds:.1f}s "
+          f"assuming {OUTPUT_TOKENS_PER_SECOND} output tok/s")
+    print()
+
+
+if __name__ == "__main__":
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    schema = CompactSchemaService()
+    filter_service = AIFilterService()
+    derivation = PlanDerivationService()
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    strength_ids = [e['id'] for e in filter_service.exercise_catalog.entries if e['type'] == 'strength']
+    with open(os.path.join(base_dir, 'expected_workout_structure.json')) as f:
+        workout_plan = model_output(json.load(f), 'daily_workouts', strength_ids)
+    with open(os.path.join(base_dir, 'expected_meal_structure.json')) as f:
+        meal_plan = model_output(json.load(f), 'daily_meals')
+
+    print("=" * 60)
+    print("Compact Output Schema Benchmark")
+    print("=" * 60)
+    print()
+
+    run_benchmark(
+        "Workout plan", workout_plan, 'daily_workouts',
+        schema.compact_workout_plan(workout_plan), schema.expand_workout_plan,
+        filter_service.filter_workout_plan, derivation.derive_workout_fields
+    )
+    run_benchmark(
+        "Meal plan", meal_plan, 'daily_meals',
+        schema.compact_meal_plan(meal_plan), schema.expand_meal_plan,
+        filter_service.filter_meal_plan, derivation.derive_meal_fields
+    )
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the trigram exercise-name resolver.
+Resolves a month's worth (~150) of model-style exercise names, including
+casing changes, typos, plurals and out-of-catalog exercises.
+"""
+
+import sys
+import os
+import time
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.exercise_resolver_service import ExerciseNameResolver
+
+MONTH_NAMES = [
+    "Leg Press Machine", "Chest press machine (3 sets, 10 reps)", "Lat pull-down", "Seated Rows",
+    "Romanian Deadlift", "Overhead Press", "Barbell squats", "Bench Press", "Bent over rows",
+    "Pull-ups", "Dumbell squats", "Tricep extensions", "Deadlifts", "Plank hold", "Glute bridge",
+    "Push ups", "Walking lunges", "Mountain climber", "Battle rope", "HIIT interval",
+    "Bulgarian split squat", "Cable crossover", "Zumba", "Rowing machine intervals", "Wall sit",
+]
+ITERATIONS = 50
+
+
+if __name__ == "__main__":
+    names = (MONTH_NAMES * 6)[:150]
+
+    # Cold: fresh resolver each run (no cache), the worst case for a new plan
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        resolver = ExerciseNameResolver()
+        for name in names:
+            resolver.resolve(name)
+    cold = (time.perf_counter() - start) / ITERATIONS
+
+    # Index build alone, to separate it from per-name cost
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        ExerciseNameResolver()
+    build = (time.perf_counter() - start) / ITERATIONS
+
+    # Warm: shared resolver with its per-name cache populated
+    resolver = ExerciseNameResolver()
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        for name in names:
+            resolver.resolve(name)
+    warm = (time.perf_counter() - start) / ITERATIONS
+
+    print("=" * 60)
+    print("Exercise Name Resolver Benchmark")
+    print("=" * 60)
+    print(f"Names per month:        {len(names)}")
+    print(f"Index build:            {build * 1000:.3f}ms")
+    print(f"Month, cold cache:      {(cold - build) * 1000:.3f}ms "
+          f"({(cold - build) / len(names) * 1e6:.1f}µs per name)")
+    print(f"Month, warm cache:      {warm * 1000:.3f}ms ({warm / len(names) * 1e6:.2f}µs per name)")
+    print()
+    for name in MONTH_NAMES:
+        result = resolver.resolve(name)
+        status = "✓" if result['in_catalog'] else "✗"
+        print(f"  {status} {name:<40} -> {result['name']} ({result['score']})")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the vectorized nutrition engine.
+Validates a month-end batch of meal plans and compares it with the per-day
+Python totals used by PlanDerivationService. Plans are built on the expected
+meal structure with macros sized to each plan's objective (within a few
+percent per day); every OFF_TARGET_EVERY-th plan gets a few days with a
+doubled or skipped dinner. The report checks that exactly those plans are
+flagged, not just how fast.
+"""
+
+import sys
+import os
+import json
+import time
+import copy
+import random
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.ai_filter_service import AIFilterService
+from services.nutrition_engine_service import NutritionEngine
+from services.plan_derivation_service import PlanDerivationService
+
+BATCH_SIZES = [100, 1000, 5000]
+GOALS = [["weight_loss"], ["maintenance"], ["muscle_building"], ["endurance"]]
+# Share of the day's targets per meal; snacks carry the rest
+MEAL_SHARES = {'breakfast': 0.25, 'lunch': 0.35, 'dinner': 0.30, 'snacks': 0.10}
+OFF_TARGET_EVERY = 5
+OFF_TARGET_DAYS = 3
+
+
+def size_meal(meal, target, share):
+    """Set a meal's macros to `share` of the daily target, calories from 4/4/9 x macros."""
+    protein, carbs, fat = (round(float(grams) * share) for grams in target[1:])
+    meal.update({
+        'calories': int(4 * protein + 4 * carbs + 9 * fat),
+        'protein': f"{protein}g",
+        'carbs': f"{carbs}g",
+        'fat': f"{fat}g"
+    })
+
+
+def make_batch(engine, plan, goals):
+    """
+    One plan per goal sized to its daily targets with +/-5% daily jitter.
+    Returns the plans and the indices that were pushed off target.
+    """
+    random.seed(42)
+    objectives = [engine.resolve_objective(g) for g in goals]
+    targets = engine.daily_targets(objectives, [None] * len(goals))
+    batch, off_target = [], set()
+    for i, target in enumerate(targets):
+        copy_plan = copy.deepcopy(plan)
+        days = copy_plan['daily_meals']
+        for day in days.values():
+            jitter = random.uniform(0.95, 1.05)
+            for meal_type in ('breakfast', 'lunch', 'dinner'):
+                size_meal(day[meal_type], target, MEAL_SHARES[meal_type] * jitter)
+            for snack in day['snacks']:
+                size_meal(snack, target, MEAL_SHARES['snacks'] * jitter / len(day['snacks']))
+        if i % OFF_TARGET_EVERY == 0:
+            off_target.add(i)
+            for day in random.sample(sorted(days), OFF_TARGET_DAYS):
+                size_meal(days[day]['dinner'], target, random.choice([0.0, 2 * MEAL_SHARES['dinner']]))
+        batch.append(copy_plan)
+    return batch, off_target
+
+
+def python_totals(derivation, plans):
+    """Per-day Python loop, the pre-NumPy approach (totals only, no checks)."""
+    for plan in plans:
+        for day in plan['daily_meals'].values():
+            derivation.compute_daily_totals(day)
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    with open(os.path.join(base_dir, 'expected_meal_structure.json')) as f:
+        plan = AIFilterService().filter_meal_plan(json.load(f))
+
+    engine = NutritionEngine()
+    derivation = PlanDerivationService()
+
+    print("=" * 60)
+    print("Nutrition Engine Benchmark")
+    print("=" * 60)
+
+    for size in BATCH_SIZES:
+        goals = [GOALS[i % len(GOALS)] for i in range(size)]
+        batch, off_target = make_batch(engine, plan, goals)
+
+        start = time.perf_counter()
+        python_totals(derivation, batch)
+        python_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        reports = engine.validate_plans(batch, goals)
+        engine_s = time.perf_counter() - start
+
+        flagged = {i for i, r in enumerate(reports) if r['off_target_days']}
+        inconsistent = sum(len(r['inconsistent_meals']) for r in reports)
+        print(f"{size:>5} plans: python totals {python_s:6.2f}s | engine totals+weekly+checks {engine_s:6.2f}s "
+              f"({python_s / engine_s:.1f}x, {size / engine_s:,.0f} plans/s)")
+        print(f"       flagged {len(flagged)} of {len(off_target)} off-target plans "
+              f"({len(flagged - off_target)} false positives, {len(off_target - flagged)} missed), "
+              f"{inconsistent} inconsistent meals")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the dictionary-trained plan storage codec.
+Leave-one-out over the bundled plan files: the dictionary is trained on the
+other files, then each held-out plan is stored as a whole plan, as a
+weekly-pattern encoded plan and as per-day entries. Sizes and read times
+are compared with per-entry gzip and zstd without a dictionary (same level)
+of the same JSON.
+"""
+
+import gzip
+import json
+import sys
+import os
+import tempfile
+import time
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import logging
+logging.disable(logging.WARNING)
+
+from build_plan_dictionary import DEFAULT_PLANS, BASE_DIR, load_json_file, iter_plans, plan_samples, load_vocabulary
+from services.plan_codec_service import PlanStorageCodec, train_dictionary
+from services.serialization_service import dumps, loads
+from services.weekly_pattern_service import weekly_pattern_codec, DAILY_SECTIONS
+
+ITERATIONS = 200
+
+
+def time_ms(fn, values):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        for value in values:
+            fn(value)
+    return (time.perf_counter() - start) / ITERATIONS * 1000
+
+
+def entries_for(plan):
+    """Whole plan, weekly-pattern plan and per-day entries."""
+    days = [day for section in DAILY_SECTIONS for day in (plan.get(section) or {}).values()]
+    return {
+        'plan': [plan],
+        'pattern plan': [weekly_pattern_codec.encode_plan(plan)],
+        'per-day': days
+    }
+
+
+def run_fold(held_out, files, vocabulary):
+    training = [s for path in files if path != held_out for plan in iter_plans(load_json_file(path))
+                for s in plan_samples(plan)]
+    with tempfile.TemporaryDirectory() as directory:
+        untrained = PlanStorageCodec(os.path.join(directory, 'none'))
+        codec = PlanStorageCodec(directory)
+        codec.install(train_dictionary(training, vocabulary))
+
+        for plan in iter_plans(load_json_file(held_out)):
+            print(f"{os.path.basename(held_out)}:")
+            for label, values in entries_for(plan).items():
+                if not values:
+                    continue
+                raw = [dumps(v) for v in values]
+                gzipped = [gzip.compress(r, 6) for r in raw]
+                plain = [untrained.encode(v) for v in values]
+                encoded = [codec.encode(v) for v in values]
+                assert all(codec.decode(e) == loads(r) for e, r in zip(encoded, raw))
+
+                gzip_size, plain_size, encoded_size = (sum(map(len, e)) for e in (gzipped, plain, encoded))
+                gzip_read = time_ms(lambda d: loads(gzip.decompress(d)), gzipped)
+                plain_read = time_ms(untrained.decode, plain)
+                codec_read = time_ms(codec.decode, encoded)
+                print(f"  {label:<13} json {sum(map(len, raw)):>7}  gzip {gzip_size:>6}  zstd {plain_size:>6}  "
+                      f"zstd+dictionary {encoded_size:>6}  "
+                      f"({100 * (1 - encoded_size / gzip_size):.0f}% smaller than gzip, "
+                      f"{100 * (1 - encoded_size / plain_size):.0f}% than zstd)  "
+                      f"read {gzip_read:.2f} / {plain_read:.2f} / {codec_read:.2f}ms")
+            print()
+
+
+if __name__ == "__main__":
+    files = [os.path.join(BASE_DIR, p) for p in DEFAULT_PLANS]
+    vocabulary = load_vocabulary()
+
+    print("=" * 60)
+    print("Plan Storage Codec Benchmark (leave-one-out)")
+    print("=" * 60)
+    print()
+
+    for held_out in files:
+        run_fold(held_out, files, vocabulary)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark for API response serialization.
+Times FastAPI's default path (jsonable_encoder + JSONResponse) against
+PlanJSONResponse for a full generation response built from the
+expected_*_structure.json plans.
+"""
+
+import json
+import sys
+import os
+import time
+import copy
+from datetime import datetime
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from services.serialization_service import PlanJSONResponse, orjson
+
+ITERATIONS = 200
+
+
+def time_ms(fn):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn()
+    return (time.perf_counter() - start) / ITERATIONS * 1000
+
+
+def build_response(plan):
+    """Response as returned with include=raw,filtered,validated."""
+    return {
+        "status": "success",
+        "raw_response": {"success": True, "plan": copy.deepcopy(plan)},
+        "filtered_data": plan,
+        "validated_data": plan,
+        "metadata": {"month": 9, "year": 2025, "generated_at": datetime.utcnow().isoformat()}
+    }
+
+
+def run_benchmark(label, plan):
+    response = build_response(plan)
+    default_ms = time_ms(lambda: JSONResponse(jsonable_encoder(response)).body)
+    fast_ms = time_ms(lambda: PlanJSONResponse(response).body)
+    size = len(PlanJSONResponse(response).body)
+
+    print(f"{label} ({size / 1024:.0f} KB):")
+    print(f"  jsonable_encoder + JSONResponse {default_ms:>7.2f}ms")
+    print(f"  PlanJSONResponse                {fast_ms:>7.2f}ms  ({default_ms / fast_ms:.1f}x faster)")
+    print()
+
+
+if __name__ == "__main__":
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+
+    print("=" * 60)
+    print(f"Response Serialization Benchmark ({'orjson' if orjson else 'stdlib json fallback'})")
+    print("=" * 60)
+    print()
+
+    for label, filename in (("Workout plan", 'expected_workout_structure.json'),
+                            ("Meal plan", 'expected_meal_structure.json')):
+        with open(os.path.join(base_dir, filename)) as f:
+            run_benchmark(label, json.load(f))
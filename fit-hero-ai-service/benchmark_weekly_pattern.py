@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Size report for the weekly-pattern plan encoding.
+Encodes the expected_*_structure.json plans as a base week plus per-day
+overrides, checks the exact round trip and prints bytes saved and the
+encode/decode cost.
+"""
+
+import json
+import sys
+import os
+import time
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.weekly_pattern_service import weekly_pattern_codec
+
+ITERATIONS = 200
+
+
+def time_ms(fn, value):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn(value)
+    return (time.perf_counter() - start) / ITERATIONS * 1000
+
+
+def run_report(label, plan):
+    encoded = weekly_pattern_codec.encode_plan(plan)
+    decoded = weekly_pattern_codec.decode_plan(json.loads(json.dumps(encoded)))
+    assert json.dumps(decoded) == json.dumps(plan), f"{label}: round trip mismatch"
+
+    print(f"{label}:")
+    for section, sizes in weekly_pattern_codec.size_report(plan).items():
+        print(f"  {section:<15} expanded {sizes['expanded_bytes']:>7}  encoded {sizes['encoded_bytes']:>7}  "
+              f"({sizes['reduction_percent']:.1f}% smaller)")
+    print(f"  Encode {time_ms(weekly_pattern_codec.encode_plan, plan):.2f}ms  "
+          f"decode {time_ms(weekly_pattern_codec.decode_plan, encoded):.2f}ms")
+    print()
+
+
+if __name__ == "__main__":
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+
+    print("=" * 60)
+    print("Weekly Pattern Encoding Report")
+    print("=" * 60)
+    print()
+
+    for label, filename in (("Workout plan", 'expected_workout_structure.json'),
+                            ("Meal plan", 'expected_meal_structure.json')):
+        with open(os.path.join(base_dir, filename)) as f:
+            run_report(label, json.load(f))
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Offline job that builds the meal library used by MonthMealAssembler.
+
+Meals come from the model in small batches per slot and diet, or are
+harvested from previously generated plan JSON files. Every meal is
+validated (calorie bounds, calories vs 4/4/9 x macros), deduplicated by
+name and tagged with the allergens/diets it conflicts with before the
+library is written to MEAL_LIBRARY_PATH (default data/meal_library.json).
+
+Usage:
+    python build_meal_library.py --generate --per-slot 60
+    python build_meal_library.py --from-plans plans/*.json
+"""
+
+import sys
+import os
+import json
+import asyncio
+import argparse
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.meal_library_service import MealLibrary, LIBRARY_SLOTS
+
+DEFAULT_DIETS = [None, 'vegetarian', 'vegan', 'pescatarian', 'gluten_free', 'dairy_free', 'keto']
+BATCH_SIZE = 10
+
+
+def iter_plan_meals(plan):
+    """Yield (slot, meal) from a plan file, wrapped or not."""
+    for key in ('validated_data', 'filtered_data', 'meal_plan'):
+        if isinstance(plan.get(key), dict):
+            plan = plan[key]
+    for day in plan.get('daily_meals', {}).values():
+        if not isinstance(day, dict):
+            continue
+        meals = day.get('meals') if isinstance(day.get('meals'), dict) else day
+        for slot in LIBRARY_SLOTS[:-1]:
+            if isinstance(meals.get(slot), dict):
+                yield slot, meals[slot]
+        for snack in meals.get('snacks', []) or []:
+            yield 'snacks', snack
+
+
+def harvest(library, paths):
+    added = 0
+    for path in paths:
+        with open(path) as f:
+            plan = json.load(f)
+        by_slot = {slot: [] for slot in LIBRARY_SLOTS}
+        for slot, meal in iter_plan_meals(plan):
+            by_slot[slot].append(meal)
+        for slot, meals in by_slot.items():
+            added += library.add_meals(slot, meals, source=f"plan:{os.path.basename(path)}")
+    return added
+
+
+async def generate(library, per_slot, diets):
+    from services.monthly_plan_service import MonthlyPlanService
+    service = MonthlyPlanService()
+
+    added = 0
+    for slot in LIBRARY_SLOTS:
+        for diet in diets:
+            wanted = max(1, per_slot // len(diets))
+            produced = 0
+            # Stop early if a batch adds nothing new (the model keeps repeating itself)
+            while produced < wanted:
+                names = [m['name'] for m in library.meals[slot]]
+                try:
+                    meals = await service.generate_library_meals(
+                        slot, min(BATCH_SIZE, wanted - produced), diet, avoid_names=names[-200:]
+                    )
+                except Exception as e:
+                    print(f"  ✗ {slot}/{diet or 'any'}: {e}")
+                    break
+                count = library.add_meals(slot, meals, source=f"generated:{diet or 'any'}")
+                print(f"  {slot}/{diet or 'any'}: +{count} ({len(meals)} returned)")
+                if count == 0:
+                    break
+                produced += count
+                added += count
+    return added
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the offline meal library")
+    parser.add_argument('--generate', action='store_true', help="generate meals with the model")
+    parser.add_argument('--per-slot', type=int, default=60, help="meals to generate per slot")
+    parser.add_argument('--diets', nargs='*', default=None, help="diets to cover (default: common diets)")
+    parser.add_argument('--from-plans', nargs='*', default=[], help="harvest meals from plan JSON files")
+    parser.add_argument('--output', default=None, help="library path (default MEAL_LIBRARY_PATH)")
+    parser.add_argument('--retag', action='store_true', help="re-tag existing meals with the current scanner")
+    args = parser.parse_args()
+
+    library = MealLibrary(path=args.output)
+    print(f"📚 Loaded meal library: {library.stats()}")
+
+    if args.retag:
+        library.retag()
+    if args.from_plans:
+        print(f"✓ Harvested {harvest(library, args.from_plans)} meals from {len(args.from_plans)} plan(s)")
+    if args.generate:
+        diets = args.diets if args.diets else DEFAULT_DIETS
+        print(f"✓ Generated {asyncio.run(generate(library, args.per_slot, diets))} meals")
+
+    library.save()
+    print(f"📚 Saved meal library: {library.stats()} (version {library.version})")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Offline job that trains the zstd dictionary used by PlanStorageCodec.
+
+The corpus is generated plans (response dumps, validated plans or stored
+entries) plus the workout/meal templates for exercise and meal names.
+Each plan contributes its full JSON, its weekly-pattern encoding, its
+daily sections and each day, matching what the response cache, job
+results and plan store write. The new dictionary is installed as the next version in
+PLAN_DICTIONARY_DIR; older versions are kept so existing entries stay
+readable.
+
+Usage:
+    python build_plan_dictionary.py
+    python build_plan_dictionary.py --plans plans/*.json
+"""
+
+import sys
+import os
+import re
+import json
+import argparse
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.plan_codec_service import PlanStorageCodec, train_dictionary
+from services.serialization_service import dumps
+from services.weekly_pattern_service import weekly_pattern_codec, DAILY_SECTIONS
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PLANS = ['expected_workout_structure.json', 'expected_meal_structure.json', 'workout_generation_output.json']
+TEMPLATES = ['templates/workout_templates.json', 'templates/meal_templates.json']
+
+
+# curl progress meter lines, as found in captured responses such as workout_generation_output.json
+CURL_PROGRESS_PATTERN = re.compile(r'(?:\r|\n)[ \d:.\-kMG%A-Za-z]*?\d+:\d+:\d+[ \d:.\-kMG]*(?=\r|\n)|[\r\n]')
+
+
+def load_json_file(path):
+    """Load a JSON file, skipping curl progress output captured around or inside it."""
+    with open(path) as f:
+        text = CURL_PROGRESS_PATTERN.sub('', f.read())
+    start = text.find('{')
+    if start < 0:
+        return None
+    try:
+        return json.JSONDecoder().raw_decode(text[start:])[0]
+    except json.JSONDecodeError:
+        return None
+
+
+def iter_plans(value, seen=None):
+    """Yield the distinct plans inside a file: response wrappers contain several copies."""
+    seen = set() if seen is None else seen
+    if not isinstance(value, dict):
+        return
+    if any(section in value for section in DAILY_SECTIONS) and dumps(value) not in seen:
+        seen.add(dumps(value))
+        yield value
+    for key in ('raw_response', 'filtered_data', 'validated_data', 'workout_plan', 'meal_plan'):
+        yield from iter_plans(value.get(key), seen)
+
+
+def plan_samples(plan):
+    """The shapes a plan is stored in: as is, weekly-pattern encoded, per daily section and per day."""
+    samples = [dumps(plan), dumps(weekly_pattern_codec.encode_plan(plan))]
+    for section in DAILY_SECTIONS:
+        if isinstance(plan.get(section), dict):
+            samples.append(dumps(plan[section]))
+            samples.extend(dumps(day) for day in plan[section].values())
+    return samples
+
+
+def load_corpus(paths):
+    samples = []
+    for path in paths:
+        value = load_json_file(path)
+        plans = list(iter_plans(value))
+        if not plans:
+            print(f"  ✗ {path}: no plans found")
+            continue
+        for plan in plans:
+            samples.extend(plan_samples(plan))
+        print(f"  {path}: {len(plans)} plan(s)")
+    return samples
+
+
+def load_vocabulary():
+    vocabulary = []
+    for path in TEMPLATES:
+        with open(os.path.join(BASE_DIR, path)) as f:
+            vocabulary.append(dumps(json.load(f)))
+    return vocabulary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the plan storage dictionary")
+    parser.add_argument('--plans', nargs='*', default=None, help="plan JSON files (default: bundled examples)")
+    parser.add_argument('--output', default=None, help="dictionary directory (default PLAN_DICTIONARY_DIR)")
+    args = parser.parse_args()
+
+    paths = args.plans if args.plans else [os.path.join(BASE_DIR, p) for p in DEFAULT_PLANS]
+    print("📚 Loading corpus")
+    samples = load_corpus(paths)
+    if not samples:
+        print("❌ No plans to train on")
+        sys.exit(1)
+
+    try:
+        dictionary = train_dictionary(samples, load_vocabulary())
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    codec = PlanStorageCodec(args.output)
+    previous = codec.current_id
+    new_id = codec.install(dictionary)
+    print(f"✓ Dictionary {new_id} ({len(dictionary)} bytes) installed in {codec.dictionary_dir}"
+          + (" (unchanged)" if new_id == previous else f", replacing {previous}" if previous else ""))
@@ -12,6 +12,15 @@ AZURE_WEBSITE_SITE_NAME = os.getenv("WEBSITE_SITE_NAME")
 AZURE_WEBSITE_RESOURCE_GROUP = os.getenv("WEBSITE_RESOURCE_GROUP")
 PORT = int(os.getenv("PORT", "8000"))
 
+# Response compression: bodies below this many bytes are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+# Off-peak pre-generation of next month's plans (services/pregeneration_scheduler.py)
+PREGENERATION_ENABLED = os.getenv("PREGENERATION_ENABLED", "false").lower() == "true"
+PREGENERATION_LEAD_DAYS = int(os.getenv("PREGENERATION_LEAD_DAYS", "3"))
+PREGENERATION_WINDOWS = os.getenv("PREGENERATION_WINDOWS", "00:00-06:00")  # UTC, comma-separated HH:MM-HH:MM
+PREGENERATION_RATE_PER_MINUTE = float(os.getenv("PREGENERATION_RATE_PER_MINUTE", "2"))
+
 # Set environment variable for Google AI
 if GOOGLE_API_KEY:
     os.environ["GOOGLE_API_KEY"] = GOOGLE_API_KEY
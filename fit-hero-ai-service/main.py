@@ -1,22 +1,40 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, validator
 from typing import Optional, List, Dict, Any
 import os
 from dotenv import load_dotenv
 import json
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date
 import calendar
 
 from services.monthly_plan_service import MonthlyPlanService
 from services.ai_filter_service import AIFilterService
+from services.plan_derivation_service import PlanDerivationService
 from services.webhook_service import webhook_service
-from config import get_base_url, AZURE_WEBSITE_SITE_NAME
+from services.exercise_catalog_service import exercise_catalog
+from services.dietary_constraint_service import dietary_scanner
+from services.nutrition_engine_service import nutrition_engine
+from services.nutrition_target_service import nutrition_targets
+from services.weekly_pattern_service import weekly_pattern_codec
+from services.serialization_service import PlanJSONResponse
+from services.plan_store_service import plan_store, entry_etag, PLAN_TYPES
+from services.rolling_plan_service import rolling_planner
+from services.pregeneration_scheduler import PregenerationScheduler
+from services.rate_limiter_service import model_rate_limiter
+from services.priority_lane_service import lane_scheduler, use_lane, INTERACTIVE, BATCH
+from services.retry_policy_service import model_retry_policy
+from services.hedging_service import model_hedger
+from services.compression_middleware import CompressionMiddleware
+from config import (
+    get_base_url, AZURE_WEBSITE_SITE_NAME, COMPRESSION_MIN_SIZE, PREGENERATION_ENABLED,
+    PREGENERATION_LEAD_DAYS, PREGENERATION_WINDOWS, PREGENERATION_RATE_PER_MINUTE
+)
 
 # Load environment variables
 load_dotenv()
 
-app = FastAPI(title="Fit Hero AI Service", version="1.0.0")
+app = FastAPI(title="Fit Hero AI Service", version="1.0.0", default_response_class=PlanJSONResponse)
 
 # Configure CORS with Azure support
 allowed_origins = [
@@ -38,9 +56,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Plan responses are large, repetitive JSON: compress with zstd/br/gzip as negotiated
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
 # Initialize services
 monthly_plan_service = MonthlyPlanService()
 ai_filter_service = AIFilterService()
+plan_derivation_service = PlanDerivationService()
 
 # Health check endpoint
 @app.get("/health")
@@ -60,6 +82,10 @@ class MonthlyWorkoutPlanRequest(BaseModel):
     equipment: List[str]  # gym, home, bodyweight, etc.
     injuries_limitations: Optional[List[str]] = None
     preferred_activities: Optional[List[str]] = None
+    compact_output: bool = False  # ask the model for the short-key wire schema
+    rolling: bool = False  # generate the overview and week 1 now, later weeks via /advance-rolling-workout-plan
+    delta_from_previous: bool = False  # ask only for changes to last month's plan (previous_plan or the stored one)
+    previous_plan: Optional[Dict[str, Any]] = None  # last month's validated plan, if the caller has it
     
     @validator('month')
     def validate_month(cls, v):
@@ -87,6 +113,9 @@ class MonthlyMealPlanRequest(BaseModel):
     calorie_target: Optional[int] = None
     meal_prep_time: Optional[int] = None  # minutes
     budget_range: Optional[str] = None  # low, medium, high
+    compact_output: bool = False  # ask the model for the short-key wire schema
+    use_meal_library: bool = False  # assemble from the pre-generated meal library when it has enough meals
+    rolling: bool = False  # generate the overview and week 1 now, later weeks via /advance-rolling-meal-plan
     
     @validator('month')
     def validate_month(cls, v):
@@ -101,135 +130,878 @@ class MonthlyMealPlanRequest(BaseModel):
             raise ValueError(f'Year must be between {current_year} and {current_year + 2}')
         return v
 
+class MealPlanValidationItem(BaseModel):
+    user_id: Optional[str] = None
+    meal_plan: Dict[str, Any]  # filtered/validated meal plan with daily_meals
+    age: int = 30
+    weight: float = 75.0
+    goals: List[str] = ["maintenance"]
+    activity_level: str = "moderately_active"
+    calorie_target: Optional[int] = None
+
+class MealPlanBatchValidationRequest(BaseModel):
+    plans: List[MealPlanValidationItem]
+
+class WorkoutDaysRegenerationRequest(MonthlyWorkoutPlanRequest):
+    days: Optional[List[int]] = None  # days of the month to regenerate...
+    week: Optional[int] = None  # ...or a whole week: days 7(week-1)+1 to 7*week
+    reason: str = ""
+    plan: Optional[Dict[str, Any]] = None  # plan to patch; defaults to the stored plan
+
+class MealDaysRegenerationRequest(MonthlyMealPlanRequest):
+    days: Optional[List[int]] = None  # days of the month to regenerate...
+    week: Optional[int] = None  # ...or a whole week: days 7(week-1)+1 to 7*week
+    reason: str = ""
+    plan: Optional[Dict[str, Any]] = None  # plan to patch; defaults to the stored plan
+
+# Response projection for the generation endpoints: which plan copies to
+# return (include=) and which top-level plan fields to keep in them (fields=)
+RESPONSE_PARTS = {
+    "raw": "raw_response",
+    "filtered": "filtered_data",
+    "validated": "validated_data"
+}
+DEFAULT_INCLUDE = "validated"
+
+def parse_projection(include: Optional[str], fields: Optional[str]):
+    """Parse include/fields query parameters, rejecting unknown parts up front."""
+    parts = [p.strip() for p in (include or DEFAULT_INCLUDE).split(",") if p.strip()]
+    unknown = [p for p in parts if p not in RESPONSE_PARTS]
+    if unknown or not parts:
+        raise HTTPException(status_code=400, detail={
+            "error": "Invalid include parameter",
+            "details": f"Unknown parts: {unknown}; expected a comma-separated subset of {list(RESPONSE_PARTS)}"
+        })
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    return parts, field_list
+
+def set_priority_lane(priority: str):
+    """Put this request's model calls in the given lane (interactive or batch)."""
+    try:
+        use_lane(priority)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail={"error": "Invalid priority parameter", "details": str(e)})
+
+def project_plan_response(plans: Dict[str, Any], parts: List[str], fields: Optional[List[str]], metadata: Dict[str, Any]) -> PlanJSONResponse:
+    """Build the response with only the requested plan copies and fields, serialized directly."""
+    response = {"status": "success"}
+    for part in parts:
+        plan = plans[part]
+        # fields= narrows the processed plans; the raw model response is kept as is
+        if fields is not None and part != "raw" and isinstance(plan, dict):
+            plan = {key: plan[key] for key in fields if key in plan}
+        response[RESPONSE_PARTS[part]] = plan
+    response["metadata"] = metadata
+    return PlanJSONResponse(response)
+
 @app.get("/")
 async def root():
     return {"message": "Fit Hero Monthly AI Service is running!"}
 
+@app.get("/model-rate-limits")
+async def get_model_rate_limits():
+    """Current model call limits (adaptive concurrency, request and token buckets) and counters."""
+    return model_rate_limiter.metrics()
+
+@app.get("/model-priority-lanes")
+async def get_model_priority_lanes():
+    """Per-lane queue depth, in-flight calls and wait times of the model call scheduler."""
+    return lane_scheduler.metrics()
+
+@app.get("/model-retries")
+async def get_model_retries():
+    """Model call retries: attempts, failures by error kind, retry budget and deadline cut-offs."""
+    return model_retry_policy.metrics()
+
+@app.get("/model-hedging")
+async def get_model_hedging():
+    """Hedged month-plan calls: hedge rate, thresholds and p99 with vs. without hedging per plan type."""
+    return model_hedger.metrics()
+
+@app.get("/exercise-catalog")
+async def get_exercise_catalog():
+    """
+    Return the compiled exercise catalog so consumers can resolve exercise_id
+    references in generated plans.
+    """
+    return exercise_catalog.to_dict()
+
 @app.post("/generate-monthly-workout-plan")
-async def generate_monthly_workout_plan(request: MonthlyWorkoutPlanRequest):
+async def generate_monthly_workout_plan(
+    request: MonthlyWorkoutPlanRequest,
+    packed: bool = False,
+    weekly_pattern: bool = False,
+    include: Optional[str] = None,
+    fields: Optional[str] = None,
+    priority: str = INTERACTIVE
+):
     """
     Generate a complete monthly workout plan.
     Returns filtered and validated data ready for database storage.
+    With packed=true, validated_data references catalog IDs and an interned
+    string table instead of repeating names (see /exercise-catalog).
+    With weekly_pattern=true, daily_workouts in validated_data is sent as a
+    base week plus per-day overrides (services/weekly_pattern_service.py).
+    By default only validated_data and metadata are returned; include= takes
+    a comma-separated subset of raw,filtered,validated and fields= limits
+    the returned plans to the listed top-level keys.
+    priority=batch queues the model calls behind interactive ones (renewals).
     """
+    parts, field_list = parse_projection(include, fields)
+    set_priority_lane(priority)
     try:
-        # Step 1: Generate raw AI response
-        raw_response = await monthly_plan_service.generate_monthly_workout_plan(
-            user_id=request.user_id,
-            month=request.month,
-            year=request.year,
-            age=request.age,
-            weight=request.weight,
-            fitness_level=request.fitness_level,
-            goals=request.goals,
-            available_time=request.available_time,
-            equipment=request.equipment,
-            injuries_limitations=request.injuries_limitations,
-            preferred_activities=request.preferred_activities
-        )
-        
-        # Step 2: Apply AI service filtering
-        filtered_data = ai_filter_service.filter_workout_plan(raw_response)
+        raw_response, filtered_data, validated_data = await load_or_build_plan(request, "workout")
         
-        # Step 3: Validate structure and add metadata
-        validated_data = ai_filter_service.validate_workout_plan_structure(
-            filtered_data, request.month, request.year
-        )
+        if packed:
+            validated_data = exercise_catalog.pack_workout_plan(validated_data)
+        if weekly_pattern:
+            validated_data = weekly_pattern_codec.encode_plan(validated_data)
         
-        return {
-            "status": "success",
-            "raw_response": raw_response,
-            "filtered_data": filtered_data,
-            "validated_data": validated_data,
-            "metadata": {
+        response = project_plan_response(
+            {"raw": raw_response, "filtered": filtered_data, "validated": validated_data},
+            parts,
+            field_list,
+            {
                 "month": request.month,
                 "year": request.year,
                 "days_in_month": calendar.monthrange(request.year, request.month)[1],
                 "generated_at": datetime.utcnow().isoformat(),
                 "service_version": "2.0.0"
             }
-        }
+        )
+        if raw_response.get("success"):
+            plan_store.mark(request.user_id, request.year, request.month, "workout", "delivered")
+        return response
     except Exception as e:
+        plan_store.mark(request.user_id, request.year, request.month, "workout", "failed", error=str(e))
         raise HTTPException(status_code=500, detail={
             "error": "Failed to generate monthly workout plan",
             "details": str(e),
             "request_id": f"{request.user_id}_{request.month}_{request.year}_workout"
         })
 
+def generation_request(request, plan_type: str) -> Dict[str, Any]:
+    """
+    The generation fields of a request, as stored with the plan (regeneration
+    extras and a passed-in previous plan left out).
+    """
+    model = MonthlyWorkoutPlanRequest if plan_type == "workout" else MonthlyMealPlanRequest
+    return request.model_dump(include=set(model.model_fields) - {"previous_plan"})
+
+def previous_month(year: int, month: int):
+    """(year, month) of the month before."""
+    return (year - 1, 12) if month == 1 else (year, month - 1)
+
+async def load_or_build_plan(request, plan_type: str):
+    """
+    The plan pre-generated for this exact request if the store has one,
+    otherwise a newly built and stored one. Returns (raw_response,
+    filtered_data, validated_data); the caller marks it delivered.
+    """
+    key = (request.user_id, request.year, request.month, plan_type)
+    pregenerated = plan_store.pregenerated_plan(*key, generation_request(request, plan_type))
+    if pregenerated is not None:
+        raw_response = {"success": True, f"{plan_type}_plan": pregenerated, "source": "plan_store"}
+        return raw_response, pregenerated, pregenerated
+    plan_store.mark(*key, "generating")
+    if plan_type == "workout":
+        return await build_workout_plan(request)
+    return await build_meal_plan(request)
+
+def record_generated_plan(request, plan_type: str, raw_response: Dict[str, Any], validated_data: Dict[str, Any]):
+    """Store the validated plan, or record why the model output could not be used."""
+    key = (request.user_id, request.year, request.month, plan_type)
+    if not raw_response.get("success"):
+        plan_store.mark(*key, "failed", error=raw_response.get("error"))
+        return
+    plan_store.mark(*key, "parsed")
+    plan_store.save_plan(*key, validated_data, request=generation_request(request, plan_type))
+    plan_store.mark(*key, "filtered")
+
+async def build_workout_plan(request: MonthlyWorkoutPlanRequest):
+    """
+    Generate, filter, repair, derive and validate a workout plan and store it.
+    Returns (raw_response, filtered_data, validated_data).
+    """
+    # Month-over-month mode starts from last month's plan when there is one
+    previous_plan = None
+    if request.delta_from_previous:
+        previous_plan = request.previous_plan or plan_store.get_plan(
+            request.user_id, *previous_month(request.year, request.month), "workout"
+        )
+    
+    # Step 1: Generate raw AI response
+    raw_response = await monthly_plan_service.generate_monthly_workout_plan(
+        user_id=request.user_id,
+        month=request.month,
+        year=request.year,
+        age=request.age,
+        weight=request.weight,
+        fitness_level=request.fitness_level,
+        goals=request.goals,
+        available_time=request.available_time,
+        equipment=request.equipment,
+        injuries_limitations=request.injuries_limitations,
+        preferred_activities=request.preferred_activities,
+        compact_output=request.compact_output,
+        through_day=rolling_planner.first_window(request.month, request.year) if request.rolling else None,
+        previous_plan=previous_plan
+    )
+    
+    # Step 2: Apply AI service filtering
+    filtered_data = ai_filter_service.filter_workout_plan(raw_response)
+    
+    # Steps 3-5: repair, derive and validate
+    validated_data = await finalize_workout_plan(request, filtered_data)
+    record_generated_plan(request, "workout", raw_response, validated_data)
+    return raw_response, filtered_data, validated_data
+
+async def finalize_workout_plan(request: MonthlyWorkoutPlanRequest, filtered_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Post-filter steps shared by full generation and partial regeneration."""
+    # Step 3: Re-request only the days with out-of-catalog exercises
+    if filtered_data.get('catalog_violations'):
+        filtered_data = await repair_catalog_violations(request, filtered_data)
+    
+    # Step 4: Compute calendar-derived fields server-side
+    filtered_data = plan_derivation_service.derive_workout_fields(
+        filtered_data, request.month, request.year
+    )
+    
+    # Step 5: Validate structure and add metadata
+    return ai_filter_service.validate_workout_plan_structure(
+        filtered_data, request.month, request.year
+    )
+
+async def repair_catalog_violations(request: MonthlyWorkoutPlanRequest, filtered_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Regenerate the days that use exercises outside the template catalog and
+    merge the cleaned replacements back into the plan. One attempt only;
+    days that still violate stay flagged in catalog_violations.
+    """
+    violations = filtered_data['catalog_violations']
+    days = list(violations)
+    regenerated = await monthly_plan_service.regenerate_workout_days(
+        user_id=request.user_id,
+        month=request.month,
+        year=request.year,
+        plan=filtered_data,
+        days=days,
+        fitness_level=request.fitness_level,
+        goals=request.goals,
+        available_time=request.available_time,
+        equipment=request.equipment,
+        age=request.age,
+        weight=request.weight,
+        injuries_limitations=request.injuries_limitations,
+        reason="These exercises are not in the catalog: " + "; ".join(
+            name for names in violations.values() for name in names
+        )
+    )
+    if not regenerated.get('success') or not regenerated.get('daily_workouts'):
+        return filtered_data
+    
+    repaired = ai_filter_service.filter_workout_days(
+        regenerated['daily_workouts'], regenerated.get('template_exercise_ids')
+    )
+    remaining = repaired.get('catalog_violations', {})
+    for day, workout in repaired['daily_workouts'].items():
+        if day not in remaining:
+            filtered_data['daily_workouts'][day] = workout
+            violations.pop(day, None)
+    
+    if not violations:
+        filtered_data.pop('catalog_violations')
+    return filtered_data
+
 @app.post("/generate-monthly-meal-plan")
-async def generate_monthly_meal_plan(request: MonthlyMealPlanRequest):
+async def generate_monthly_meal_plan(
+    request: MonthlyMealPlanRequest,
+    weekly_pattern: bool = False,
+    include: Optional[str] = None,
+    fields: Optional[str] = None,
+    priority: str = INTERACTIVE
+):
     """
     Generate a complete monthly meal plan.
     Returns filtered and validated data ready for database storage.
+    With weekly_pattern=true, daily_meals in validated_data is sent as a
+    base week plus per-day overrides (services/weekly_pattern_service.py).
+    By default only validated_data and metadata are returned; include= takes
+    a comma-separated subset of raw,filtered,validated and fields= limits
+    the returned plans to the listed top-level keys.
+    priority=batch queues the model calls behind interactive ones (renewals).
     """
+    parts, field_list = parse_projection(include, fields)
+    set_priority_lane(priority)
     try:
-        # Step 1: Generate raw AI response
-        raw_response = await monthly_plan_service.generate_monthly_meal_plan(
-            user_id=request.user_id,
-            month=request.month,
-            year=request.year,
-            age=request.age,
-            weight=request.weight,
-            goals=request.goals,
-            activity_level=request.activity_level,
-            dietary_preferences=request.dietary_preferences,
-            allergies=request.allergies,
-            calorie_target=request.calorie_target,
-            meal_prep_time=request.meal_prep_time,
-            budget_range=request.budget_range
-        )
+        raw_response, filtered_data, validated_data = await load_or_build_plan(request, "meal")
         
-        # Step 2: Apply AI service filtering
-        filtered_data = ai_filter_service.filter_meal_plan(raw_response)
-        
-        # Step 3: Validate structure and add metadata
-        validated_data = ai_filter_service.validate_meal_plan_structure(
-            filtered_data, request.month, request.year
-        )
+        if weekly_pattern:
+            validated_data = weekly_pattern_codec.encode_plan(validated_data)
         
-        return {
-            "status": "success",
-            "raw_response": raw_response,
-            "filtered_data": filtered_data,
-            "validated_data": validated_data,
-            "metadata": {
+        response = project_plan_response(
+            {"raw": raw_response, "filtered": filtered_data, "validated": validated_data},
+            parts,
+            field_list,
+            {
                 "month": request.month,
                 "year": request.year,
                 "days_in_month": calendar.monthrange(request.year, request.month)[1],
                 "generated_at": datetime.utcnow().isoformat(),
                 "service_version": "2.0.0"
             }
-        }
+        )
+        if raw_response.get("success"):
+            plan_store.mark(request.user_id, request.year, request.month, "meal", "delivered")
+        return response
     except Exception as e:
+        plan_store.mark(request.user_id, request.year, request.month, "meal", "failed", error=str(e))
         raise HTTPException(status_code=500, detail={
             "error": "Failed to generate monthly meal plan",
             "details": str(e),
             "request_id": f"{request.user_id}_{request.month}_{request.year}_meal"
         })
 
+async def build_meal_plan(request: MonthlyMealPlanRequest):
+    """
+    Generate, filter, repair, derive and validate a meal plan and store it.
+    Returns (raw_response, filtered_data, validated_data).
+    """
+    # Step 1: Generate raw AI response
+    raw_response = await monthly_plan_service.generate_monthly_meal_plan(
+        user_id=request.user_id,
+        month=request.month,
+        year=request.year,
+        age=request.age,
+        weight=request.weight,
+        goals=request.goals,
+        activity_level=request.activity_level,
+        dietary_preferences=request.dietary_preferences,
+        allergies=request.allergies,
+        calorie_target=request.calorie_target,
+        meal_prep_time=request.meal_prep_time,
+        budget_range=request.budget_range,
+        compact_output=request.compact_output,
+        use_meal_library=request.use_meal_library,
+        through_day=rolling_planner.first_window(request.month, request.year) if request.rolling else None
+    )
+    
+    # Step 2: Apply AI service filtering
+    filtered_data = ai_filter_service.filter_meal_plan(raw_response)
+    
+    # Steps 3-6: repair, derive, check targets and validate
+    validated_data = await finalize_meal_plan(request, filtered_data)
+    record_generated_plan(request, "meal", raw_response, validated_data)
+    return raw_response, filtered_data, validated_data
+
+async def finalize_meal_plan(request: MonthlyMealPlanRequest, filtered_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Post-filter steps shared by full generation and partial regeneration."""
+    # Step 3: Re-request only the meals that break allergies or diet
+    violations = dietary_scanner.scan_meal_plan(
+        filtered_data.get('daily_meals', {}), request.allergies, request.dietary_preferences
+    )
+    if violations:
+        filtered_data = await repair_dietary_violations(request, filtered_data, violations)
+    
+    # Step 4: Compute dates, daily totals and shopping lists server-side
+    filtered_data = plan_derivation_service.derive_meal_fields(
+        filtered_data, request.month, request.year
+    )
+    
+    # Step 5: Attach exact targets and check day totals against them
+    targets = nutrition_targets.lookup(
+        request.age, request.weight, request.goals, request.activity_level, request.calorie_target
+    )
+    filtered_data['monthly_overview']['nutrition_targets'] = {
+        "daily_calories": targets['calories'],
+        "protein_grams": targets['protein'],
+        "carbs_grams": targets['carbs'],
+        "fat_grams": targets['fat']
+    }
+    filtered_data['nutrition_check'] = nutrition_engine.validate_plan(
+        filtered_data, targets['objective'], targets['calories']
+    )
+    
+    # Step 6: Validate structure and add metadata
+    return ai_filter_service.validate_meal_plan_structure(
+        filtered_data, request.month, request.year
+    )
+
+async def repair_dietary_violations(
+    request: MonthlyMealPlanRequest,
+    filtered_data: Dict[str, Any],
+    violations: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Regenerate only the meals flagged by the dietary scanner and merge the
+    cleaned replacements back. One attempt only; meals that still conflict
+    are listed in dietary_violations.
+    """
+    slots = dietary_scanner.offending_slots(violations)
+    regenerated = await monthly_plan_service.regenerate_meals(
+        user_id=request.user_id,
+        month=request.month,
+        year=request.year,
+        plan=filtered_data,
+        slots=slots,
+        dietary_preferences=request.dietary_preferences,
+        age=request.age,
+        weight=request.weight,
+        goals=request.goals,
+        activity_level=request.activity_level,
+        allergies=request.allergies,
+        reason="Conflicting ingredients: " + "; ".join(
+            f"{v['text']} ({v['constraint']})" for v in violations
+        )
+    )
+    
+    if regenerated.get('success'):
+        replacements = ai_filter_service.filter_meal_slots(regenerated.get('daily_meals', {}))
+        still_bad = dietary_scanner.offending_slots(dietary_scanner.scan_meal_plan(
+            replacements, request.allergies, request.dietary_preferences
+        ))
+        for day, meals in replacements.items():
+            for slot, meal in meals.items():
+                if slot not in still_bad.get(day, []) and day in filtered_data['daily_meals']:
+                    filtered_data['daily_meals'][day][slot] = meal
+    
+    remaining = dietary_scanner.scan_meal_plan(
+        filtered_data['daily_meals'], request.allergies, request.dietary_preferences
+    )
+    if remaining:
+        filtered_data['dietary_violations'] = remaining
+    return filtered_data
+
+def resolve_regeneration_days(days: Optional[List[int]], week: Optional[int], month: int, year: int) -> List[str]:
+    """Day keys for a regeneration request: explicit days, or the days of one week."""
+    days_in_month = calendar.monthrange(year, month)[1]
+    if bool(days) == (week is not None):
+        raise HTTPException(status_code=400, detail="Give either days or week")
+    if week is not None:
+        if not 1 <= week <= (days_in_month + 6) // 7:
+            raise HTTPException(status_code=400, detail=f"week must be between 1 and {(days_in_month + 6) // 7}")
+        days = range(7 * (week - 1) + 1, min(7 * week, days_in_month) + 1)
+    invalid = [day for day in days if not 1 <= day <= days_in_month]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Days outside the month: {invalid}")
+    return [str(day) for day in sorted(set(days))]
+
+def load_plan_to_patch(request, plan_type: str) -> Dict[str, Any]:
+    plan = request.plan or plan_store.get_plan(request.user_id, request.year, request.month, plan_type)
+    if plan is None:
+        raise HTTPException(status_code=404, detail=f"No stored {plan_type} plan to regenerate from")
+    # Findings of the previous validation are recomputed for the patched plan
+    plan.pop('validation_errors', None)
+    return plan
+
+async def patch_plan_days(
+    request,
+    plan_type: str,
+    plan: Dict[str, Any],
+    days: List[str],
+    reason: str,
+    field_list: Optional[List[str]],
+    advance_horizon: bool = False
+) -> PlanJSONResponse:
+    """
+    Generate the given days of an existing plan and merge them in through
+    AIFilterService. The rest of the plan goes to the model as a
+    one-line-per-day summary. The patched plan is then derived, validated
+    and stored like a full generation.
+    """
+    key = (request.user_id, request.year, request.month, plan_type)
+    try:
+        plan_store.mark(*key, "generating")
+        
+        if plan_type == "workout":
+            regenerated = await monthly_plan_service.regenerate_workout_days(
+                user_id=request.user_id,
+                month=request.month,
+                year=request.year,
+                plan=plan,
+                days=days,
+                fitness_level=request.fitness_level,
+                goals=request.goals,
+                available_time=request.available_time,
+                equipment=request.equipment,
+                age=request.age,
+                weight=request.weight,
+                injuries_limitations=request.injuries_limitations,
+                reason=reason
+            )
+        else:
+            regenerated = await monthly_plan_service.regenerate_meal_days(
+                user_id=request.user_id,
+                month=request.month,
+                year=request.year,
+                plan=plan,
+                days=days,
+                dietary_preferences=request.dietary_preferences,
+                age=request.age,
+                weight=request.weight,
+                goals=request.goals,
+                activity_level=request.activity_level,
+                allergies=request.allergies,
+                calorie_target=request.calorie_target,
+                meal_prep_time=request.meal_prep_time,
+                reason=reason
+            )
+        if not regenerated.get("success"):
+            plan_store.mark(*key, "failed", error=regenerated.get("error"))
+            raise HTTPException(status_code=502, detail=regenerated.get("error"))
+        
+        section = "daily_workouts" if plan_type == "workout" else "daily_meals"
+        if plan_type == "workout":
+            plan = ai_filter_service.merge_workout_days(
+                plan, regenerated[section], regenerated.get('template_exercise_ids')
+            )
+        else:
+            plan = ai_filter_service.merge_meal_days(plan, regenerated[section])
+        if advance_horizon:
+            plan = rolling_planner.advance(plan, list(regenerated[section]), request.month, request.year)
+        
+        if plan_type == "workout":
+            validated_data = await finalize_workout_plan(request, plan)
+        else:
+            validated_data = await finalize_meal_plan(request, plan)
+        record_generated_plan(request, plan_type, regenerated, validated_data)
+        
+        response = project_plan_response(
+            {"validated": validated_data},
+            ["validated"],
+            field_list,
+            {
+                "month": request.month,
+                "year": request.year,
+                "regenerated_days": list(regenerated[section]),
+                "generated_through": rolling_planner.generated_through(validated_data, request.month, request.year),
+                "generated_at": datetime.utcnow().isoformat(),
+                "service_version": "2.0.0"
+            }
+        )
+        plan_store.mark(*key, "delivered")
+        return response
+    except HTTPException:
+        raise
+    except Exception as e:
+        plan_store.mark(*key, "failed", error=str(e))
+        raise HTTPException(status_code=500, detail={
+            "error": f"Failed to generate {plan_type} days",
+            "details": str(e),
+            "request_id": f"{request.user_id}_{request.month}_{request.year}_{plan_type}"
+        })
+
+@app.post("/regenerate-workout-days")
+async def regenerate_workout_days(
+    request: WorkoutDaysRegenerationRequest,
+    fields: Optional[str] = None,
+    priority: str = INTERACTIVE
+):
+    """
+    Regenerate a day or week range of a workout plan instead of the whole
+    month (see patch_plan_days). Returns the patched validated_data;
+    fields= limits its top-level keys.
+    """
+    days = resolve_regeneration_days(request.days, request.week, request.month, request.year)
+    _, field_list = parse_projection(None, fields)
+    set_priority_lane(priority)
+    plan = load_plan_to_patch(request, "workout")
+    return await patch_plan_days(request, "workout", plan, days, request.reason, field_list)
+
+@app.post("/regenerate-meal-days")
+async def regenerate_meal_days(
+    request: MealDaysRegenerationRequest,
+    fields: Optional[str] = None,
+    priority: str = INTERACTIVE
+):
+    """
+    Regenerate a day or week range of a meal plan instead of the whole month.
+    The dietary scan, shopping lists and nutrition check are recomputed for
+    the patched plan.
+    """
+    days = resolve_regeneration_days(request.days, request.week, request.month, request.year)
+    _, field_list = parse_projection(None, fields)
+    set_priority_lane(priority)
+    plan = load_plan_to_patch(request, "meal")
+    plan.pop('dietary_violations', None)
+    return await patch_plan_days(request, "meal", plan, days, request.reason, field_list)
+
+async def advance_rolling_plan(request, plan_type: str, force: bool, fields: Optional[str], priority: str):
+    """Generate the next week of a stored rolling plan once it is due (or when forced)."""
+    _, field_list = parse_projection(None, fields)
+    set_priority_lane(priority)
+    plan = plan_store.get_plan(request.user_id, request.year, request.month, plan_type)
+    if plan is None:
+        raise HTTPException(status_code=404, detail=f"No stored {plan_type} plan to advance")
+    days = rolling_planner.next_window(plan, request.month, request.year)
+    if not days:
+        return {"status": "complete", "generated_through": rolling_planner.generated_through(plan, request.month, request.year)}
+    if not force and not rolling_planner.is_due(plan, request.month, request.year):
+        return {
+            "status": "not_due",
+            "generated_through": rolling_planner.generated_through(plan, request.month, request.year),
+            "due_date": rolling_planner.due_date(plan, request.month, request.year).isoformat()
+        }
+    
+    plan.pop('validation_errors', None)
+    plan.pop('dietary_violations', None)
+    previous = rolling_planner.generated_through(plan, request.month, request.year)
+    reason = (f"Next week of a rolling plan: continue from days {max(previous - 6, 1)}-{previous}, "
+              f"progressing from them rather than repeating them")
+    return await patch_plan_days(request, plan_type, plan, days, reason, field_list, advance_horizon=True)
+
+@app.post("/advance-rolling-workout-plan")
+async def advance_rolling_workout_plan(
+    request: MonthlyWorkoutPlanRequest,
+    force: bool = False,
+    fields: Optional[str] = None,
+    priority: str = BATCH
+):
+    """
+    Rolling mode (rolling=true on generation): generate the next week of the
+    stored workout plan, conditioned on the weeks before it. Before the
+    week's lead time (ROLLING_LEAD_DAYS) this only reports the due date
+    unless force=true. Runs in the batch lane unless priority=interactive.
+    """
+    return await advance_rolling_plan(request, "workout", force, fields, priority)
+
+@app.post("/advance-rolling-meal-plan")
+async def advance_rolling_meal_plan(
+    request: MonthlyMealPlanRequest,
+    force: bool = False,
+    fields: Optional[str] = None,
+    priority: str = BATCH
+):
+    """Rolling mode counterpart of /advance-rolling-workout-plan for meal plans."""
+    return await advance_rolling_plan(request, "meal", force, fields, priority)
+
+@app.post("/validate-meal-plans")
+async def validate_meal_plans(request: MealPlanBatchValidationRequest):
+    """
+    Check a batch of stored meal plans against their calorie/macro targets
+    in one vectorized pass (e.g. for month-end audits).
+    """
+    try:
+        table_targets = nutrition_targets.lookup_batch(
+            [item.age for item in request.plans],
+            [item.weight for item in request.plans],
+            [item.goals for item in request.plans],
+            [item.activity_level for item in request.plans]
+        )
+        reports = nutrition_engine.validate_plans(
+            [item.meal_plan for item in request.plans],
+            [item.goals for item in request.plans],
+            [item.calorie_target or int(calories) for item, calories in zip(request.plans, table_targets[:, 0])]
+        )
+        return {
+            "status": "success",
+            "results": [
+                {"user_id": item.user_id, **report}
+                for item, report in zip(request.plans, reports)
+            ],
+            "plans_checked": len(reports),
+            "plans_on_target": sum(1 for report in reports if not report['off_target_days'])
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={
+            "error": "Failed to validate meal plans",
+            "details": str(e)
+        })
+
 @app.get("/monthly-plan-status/{user_id}/{month}/{year}")
-async def get_monthly_plan_status(user_id: str, month: int, year: int):
+async def get_monthly_plan_status(user_id: str, month: int, year: int, plan_type: Optional[str] = None):
     """
     Check the status of monthly plan generation for a user.
+    Answers from the plan store index: generation state, timings and whether
+    a validated plan is stored, per plan type (null if never generated).
     """
+    if plan_type is not None and plan_type not in PLAN_TYPES:
+        raise HTTPException(status_code=400, detail=f"plan_type must be one of {list(PLAN_TYPES)}")
     try:
-        # This would typically query the database in the main app
-        # For now, return a status check endpoint
+        plan_types = [plan_type] if plan_type else list(PLAN_TYPES)
         return {
             "user_id": user_id,
             "month": month,
             "year": year,
+            "plans": {t: plan_store.status(user_id, year, month, t) for t in plan_types},
             "service_status": "operational",
             "timestamp": datetime.utcnow().isoformat()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Slice retrieval over stored plans. Each slice carries a strong ETag computed
+# from its stored bytes, so If-None-Match is answered before anything is decoded.
+PLAN_SLICE_CACHE_CONTROL = "private, no-cache"
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for GET)."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or any(tag.removeprefix('W/') == etag for tag in candidates)
+
+def conditional_plan_response(request: Request, etag: str, build) -> Response:
+    """304 when the client already has this slice, otherwise the body from build()."""
+    headers = {"ETag": etag, "Cache-Control": PLAN_SLICE_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return PlanJSONResponse(build(), headers=headers)
+
+def check_plan_type(plan_type: str):
+    if plan_type not in PLAN_TYPES:
+        raise HTTPException(status_code=400, detail=f"plan_type must be one of {list(PLAN_TYPES)}")
+
+def parse_plan_day(value: str, month: int, year: int) -> int:
+    """Day of month from a day number ("3") or an ISO date inside the plan's month ("2025-09-03")."""
+    try:
+        if '-' in value:
+            parsed = date.fromisoformat(value)
+            if (parsed.year, parsed.month) != (year, month):
+                raise ValueError
+            return parsed.day
+        day = int(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid day '{value}' for {year}-{month:02d}")
+    if not 1 <= day <= calendar.monthrange(year, month)[1]:
+        raise HTTPException(status_code=400, detail=f"Invalid day '{value}' for {year}-{month:02d}")
+    return day
+
+@app.get("/monthly-plans/{user_id}/{month}/{year}/{plan_type}/overview")
+async def get_plan_overview(request: Request, user_id: str, month: int, year: int, plan_type: str):
+    """Stored plan without its daily section (themes, phases, shopping lists...)."""
+    check_plan_type(plan_type)
+    blob = plan_store.read_overview(user_id, year, month, plan_type)
+    if blob is None:
+        raise HTTPException(status_code=404, detail="No stored plan")
+    return conditional_plan_response(request, entry_etag(blob), lambda: {
+        "user_id": user_id,
+        "month": month,
+        "year": year,
+        "plan_type": plan_type,
+        "overview": plan_store.decode_overview(blob)
+    })
+
+@app.get("/monthly-plans/{user_id}/{month}/{year}/{plan_type}/days/{day}")
+async def get_plan_day(request: Request, user_id: str, month: int, year: int, plan_type: str, day: str):
+    """One day of a stored plan; day is a day number or an ISO date."""
+    check_plan_type(plan_type)
+    day_number = parse_plan_day(day, month, year)
+    rows = plan_store.read_days(user_id, year, month, plan_type, day_number, day_number)
+    if not rows:
+        raise HTTPException(status_code=404, detail=f"No stored plan for day {day_number}")
+    key, blob = rows[0]
+    return conditional_plan_response(request, entry_etag(blob), lambda: {
+        "user_id": user_id,
+        "month": month,
+        "year": year,
+        "plan_type": plan_type,
+        "day": key,
+        "date": date(year, month, day_number).isoformat(),
+        "data": plan_store.decode_day(blob)
+    })
+
+@app.get("/monthly-plans/{user_id}/{month}/{year}/{plan_type}/days")
+async def get_plan_days(
+    request: Request,
+    user_id: str,
+    month: int,
+    year: int,
+    plan_type: str,
+    start: str = "1",
+    end: Optional[str] = None
+):
+    """
+    A range of days (inclusive) of a stored plan, e.g. one week for daily
+    population. start/end are day numbers or ISO dates; end defaults to
+    the last day of the month.
+    """
+    check_plan_type(plan_type)
+    first = parse_plan_day(start, month, year)
+    last = parse_plan_day(end, month, year) if end else calendar.monthrange(year, month)[1]
+    if first > last:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    rows = plan_store.read_days(user_id, year, month, plan_type, first, last)
+    if not rows:
+        raise HTTPException(status_code=404, detail=f"No stored plan for days {first}-{last}")
+    etag = entry_etag(*(key.encode('utf-8') + blob for key, blob in rows))
+    return conditional_plan_response(request, etag, lambda: {
+        "user_id": user_id,
+        "month": month,
+        "year": year,
+        "plan_type": plan_type,
+        "start": first,
+        "end": last,
+        "days": {key: plan_store.decode_day(blob) for key, blob in rows}
+    })
+
+async def pregenerate_plan(plan_type: str, request_data: Dict[str, Any]):
+    """Scheduler runner: generate and store a queued plan without delivering it."""
+    use_lane(BATCH)
+    if plan_type == "workout":
+        raw_response, _, _ = await build_workout_plan(MonthlyWorkoutPlanRequest(**request_data))
+    else:
+        raw_response, _, _ = await build_meal_plan(MonthlyMealPlanRequest(**request_data))
+    if not raw_response.get("success"):
+        raise RuntimeError(raw_response.get("error", "Generation failed"))
+
+pregeneration_scheduler = PregenerationScheduler(
+    runner=pregenerate_plan,
+    store=plan_store,
+    lead_days=PREGENERATION_LEAD_DAYS,
+    windows=PREGENERATION_WINDOWS,
+    rate_per_minute=PREGENERATION_RATE_PER_MINUTE
+)
+
+@app.on_event("startup")
+async def open_plan_store():
+    plan_store.open()
+
+@app.on_event("startup")
+async def start_pregeneration():
+    if PREGENERATION_ENABLED:
+        pregeneration_scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_pregeneration():
+    await pregeneration_scheduler.stop()
+
+class PregenerationJobsRequest(BaseModel):
+    workout_plans: List[MonthlyWorkoutPlanRequest] = []
+    meal_plans: List[MonthlyMealPlanRequest] = []
+
+@app.post("/pregeneration/jobs")
+async def queue_pregeneration_jobs(request: PregenerationJobsRequest):
+    """
+    Queue plans for off-peak pre-generation. Users with a plan stored for the
+    current month are queued automatically during the last days of the
+    month; this adds users the store has no history for.
+    """
+    for plan in request.workout_plans:
+        pregeneration_scheduler.enqueue("workout", generation_request(plan, "workout"))
+    for plan in request.meal_plans:
+        pregeneration_scheduler.enqueue("meal", generation_request(plan, "meal"))
+    return {
+        "queued": len(request.workout_plans) + len(request.meal_plans),
+        "progress": pregeneration_scheduler.progress()
+    }
+
+@app.get("/pregeneration/status")
+async def get_pregeneration_status():
+    """Progress of next month's pre-generation: counts by state, rate and ETA."""
+    return {
+        "enabled": PREGENERATION_ENABLED,
+        **pregeneration_scheduler.progress()
+    }
+
 @app.post("/activate-ai")
 async def activate_ai_for_player(request: dict):
     """
     Activate AI service for a new player - generates both workout and meal plans
     Sends webhooks on completion/failure
+    Runs in the interactive lane unless the body sets "priority": "batch"
     """
+    set_priority_lane(request.get('priority', INTERACTIVE))
     try:
         user_id = request.get('user_id')
         player_data = request.get('player_data', {})
@@ -241,62 +1013,55 @@ async def activate_ai_for_player(request: dict):
         month = current_date.month
         year = current_date.year
         
-        # Extract player data with defaults
-        age = player_data.get('age', 30)
-        weight = player_data.get('weight', 75.0)
-        fitness_level = player_data.get('fitness_level', 'beginner')
-        goals = player_data.get('goals', ['general_fitness'])
-        equipment = player_data.get('equipment', ['bodyweight'])
-        dietary_preferences = player_data.get('dietary_preferences', ['balanced'])
-        
-        results = {
-            'workout_plan_success': False,
-            'meal_plan_success': False,
-            'errors': []
+        # Player data with defaults, as generation requests for the current month
+        profile = {
+            'user_id': user_id,
+            'month': month,
+            'year': year,
+            'age': player_data.get('age', 30),
+            'weight': player_data.get('weight', 75.0),
+            'goals': player_data.get('goals', ['general_fitness'])
         }
-        
-        # Generate workout plan
-        try:
-            workout_response = await monthly_plan_service.generate_monthly_workout_plan(
-                user_id=user_id,
-                month=month,
-                year=year,
-                age=age,
-                weight=weight,
-                fitness_level=fitness_level,
-                goals=goals,
+        plan_requests = {
+            'workout': lambda: MonthlyWorkoutPlanRequest(
+                **profile,
+                fitness_level=player_data.get('fitness_level', 'beginner'),
                 available_time=45,
-                equipment=equipment,
+                equipment=player_data.get('equipment', ['bodyweight']),
                 injuries_limitations=[],
                 preferred_activities=[]
-            )
-            results['workout_plan_success'] = workout_response.get('success', False)
-            if not results['workout_plan_success']:
-                results['errors'].append(f"Workout plan: {workout_response.get('error', 'Unknown error')}")
-        except Exception as e:
-            results['errors'].append(f"Workout plan: {str(e)}")
-        
-        # Generate meal plan
-        try:
-            meal_response = await monthly_plan_service.generate_monthly_meal_plan(
-                user_id=user_id,
-                month=month,
-                year=year,
-                age=age,
-                weight=weight,
-                goals=goals,
+            ),
+            'meal': lambda: MonthlyMealPlanRequest(
+                **profile,
                 activity_level='moderately_active',
-                dietary_preferences=dietary_preferences,
+                dietary_preferences=player_data.get('dietary_preferences', ['balanced']),
                 allergies=[],
                 calorie_target=None,
                 meal_prep_time=30,
                 budget_range='medium'
             )
-            results['meal_plan_success'] = meal_response.get('success', False)
-            if not results['meal_plan_success']:
-                results['errors'].append(f"Meal plan: {meal_response.get('error', 'Unknown error')}")
-        except Exception as e:
-            results['errors'].append(f"Meal plan: {str(e)}")
+        }
+        
+        results = {
+            'workout_plan_success': False,
+            'meal_plan_success': False,
+            'errors': []
+        }
+        
+        # Same generate/filter/finalize/store path as the generation endpoints,
+        # so /monthly-plan-status and the slice endpoints see activated players
+        for plan_type, build_request in plan_requests.items():
+            label = "Workout plan" if plan_type == "workout" else "Meal plan"
+            try:
+                raw_response, _, _ = await load_or_build_plan(build_request(), plan_type)
+                results[f'{plan_type}_plan_success'] = raw_response.get('success', False)
+                if results[f'{plan_type}_plan_success']:
+                    plan_store.mark(user_id, year, month, plan_type, "delivered")
+                else:
+                    results['errors'].append(f"{label}: {raw_response.get('error', 'Unknown error')}")
+            except Exception as e:
+                plan_store.mark(user_id, year, month, plan_type, "failed", error=str(e))
+                results['errors'].append(f"{label}: {str(e)}")
         
         # Send completion or failure webhook
         if results['workout_plan_success'] and results['meal_plan_success']:
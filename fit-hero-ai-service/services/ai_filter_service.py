@@ -1,9 +1,12 @@
 import json
 import re
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Collection, Tuple
 from datetime import datetime
 import calendar
 import logging
+from services.exercise_catalog_service import exercise_catalog
+from services.exercise_resolver_service import exercise_resolver
+from services.rolling_plan_service import HORIZON_KEY
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -25,6 +28,8 @@ class AIFilterService:
             'monthly_overview', 'weekly_themes', 'daily_meals',
             'weekly_shopping_lists', 'nutritional_balance'
         ]
+        self.exercise_catalog = exercise_catalog
+        self.exercise_resolver = exercise_resolver
     
     def filter_workout_plan(self, raw_response: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -39,8 +44,8 @@ class AIFilterService:
             # Step 1: Validate basic structure
             filtered_data = self._validate_basic_structure(workout_data, self.workout_required_fields)
             
-            # Step 2: Clean exercise data
-            filtered_data = self._clean_exercise_data(filtered_data)
+            # Step 2: Clean exercise data against the user's template exercises
+            filtered_data = self._clean_exercise_data(filtered_data, raw_response.get('template_exercise_ids'))
             
             # Step 3: Sanitize text fields
             filtered_data = self._sanitize_text_fields(filtered_data)
@@ -180,59 +185,111 @@ class AIFilterService:
         
         return filtered_data
     
-    def _clean_exercise_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Clean and validate exercise-specific data."""
+    def filter_workout_days(
+        self,
+        daily_workouts: Dict[str, Any],
+        allowed_ids: Optional[Collection[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Clean a subset of days (e.g. regenerated days) without the
+        whole-plan steps. Returns the cleaned days and any catalog violations.
+        """
+        data = self._clean_exercise_data({'daily_workouts': daily_workouts}, allowed_ids)
+        return self._sanitize_text_fields(data)
+    
+    def _clean_exercise_data(self, data: Dict[str, Any], allowed_ids: Optional[Collection[int]] = None) -> Dict[str, Any]:
+        """
+        Clean and validate exercise-specific data. With allowed_ids (the
+        template's catalog IDs) other catalog exercises count as violations.
+        """
         if 'daily_workouts' not in data:
             return data
+        if allowed_ids is not None:
+            allowed_ids = set(allowed_ids)
         
         cleaned_workouts = {}
+        violations: Dict[str, List[str]] = {}
         
         for day, workout_data in data['daily_workouts'].items():
             if not isinstance(workout_data, dict):
                 continue
-                
-            cleaned_workout = {}
-            
-            # Clean basic workout info
-            cleaned_workout['day_of_week'] = self._sanitize_string(workout_data.get('day_of_week', ''))
-            cleaned_workout['workout_type'] = self._sanitize_string(workout_data.get('workout_type', 'Rest'))
-            cleaned_workout['duration'] = self._sanitize_number(workout_data.get('duration', 0), min_val=0, max_val=180)
-            cleaned_workout['intensity'] = self._sanitize_string(workout_data.get('intensity', 'Moderate'))
-            
-            # Clean exercises
-            exercises = workout_data.get('exercises', [])
-            cleaned_exercises = []
-            
-            for exercise in exercises:
-                if isinstance(exercise, dict):
-                    cleaned_exercise = {
-                        'name': self._sanitize_string(exercise.get('name', '')),
-                        'type': self._sanitize_string(exercise.get('type', 'strength')),
-                        'sets': self._sanitize_number(exercise.get('sets', 1), min_val=1, max_val=10),
-                        'reps': self._sanitize_string(exercise.get('reps', '10')),
-                        'rest_time': self._sanitize_string(exercise.get('rest_time', '60')),
-                        'notes': self._sanitize_string(exercise.get('notes', '')),
-                        'progression': self._sanitize_string(exercise.get('progression', ''))
-                    }
-                    cleaned_exercises.append(cleaned_exercise)
-            
-            cleaned_workout['exercises'] = cleaned_exercises
-            
-            # Clean warm-up and cool-down
-            cleaned_workout['warm_up'] = [
-                self._sanitize_string(item) for item in workout_data.get('warm_up', [])
-                if isinstance(item, str) and item.strip()
-            ]
-            cleaned_workout['cool_down'] = [
-                self._sanitize_string(item) for item in workout_data.get('cool_down', [])
-                if isinstance(item, str) and item.strip()
-            ]
-            
-            cleaned_workouts[day] = cleaned_workout
+            cleaned_workouts[day], unresolved = self._clean_workout_day(workout_data, allowed_ids)
+            if unresolved:
+                violations[day] = unresolved
         
         data['daily_workouts'] = cleaned_workouts
+        
+        # Flag exercises that could not be matched to the catalog
+        if violations:
+            logger.warning(f"Out-of-catalog exercises on days: {list(violations)}")
+            data['catalog_violations'] = violations
+        else:
+            data.pop('catalog_violations', None)
         return data
     
+    def _clean_workout_day(
+        self,
+        workout_data: Dict[str, Any],
+        allowed_ids: Optional[Collection[int]] = None
+    ) -> Tuple[Dict[str, Any], List[str]]:
+        """Clean a single day of a workout plan. Returns the day and its out-of-catalog exercises."""
+        cleaned_workout = {}
+        unresolved = []
+        
+        # Clean basic workout info
+        cleaned_workout['day_of_week'] = self._sanitize_string(workout_data.get('day_of_week', ''))
+        cleaned_workout['workout_type'] = self._sanitize_string(workout_data.get('workout_type', 'Rest'))
+        cleaned_workout['duration'] = self._sanitize_number(workout_data.get('duration', 0), min_val=0, max_val=180)
+        cleaned_workout['intensity'] = self._sanitize_string(workout_data.get('intensity', 'Moderate'))
+        
+        # Clean exercises
+        exercises = workout_data.get('exercises', [])
+        cleaned_exercises = []
+        
+        for exercise in exercises:
+            if isinstance(exercise, dict):
+                # Resolve against the exercise catalog by ID, then by nearest name
+                entry = self.exercise_catalog.get(exercise.get('exercise_id'))
+                if entry is not None and allowed_ids is not None and entry['id'] not in allowed_ids:
+                    entry = None
+                if entry is None:
+                    match = self.exercise_resolver.resolve(exercise.get('name', ''), allowed_ids)
+                    entry = self.exercise_catalog.get(match['exercise_id'])
+                catalog_defaults = entry or {}
+                cleaned_exercise = {
+                    'exercise_id': entry['id'] if entry else None,
+                    'name': self._sanitize_string(entry['name'] if entry else exercise.get('name', '')),
+                    'type': self._sanitize_string(exercise.get('type') or catalog_defaults.get('type', 'strength')),
+                    'sets': self._sanitize_number(
+                        exercise.get('sets', catalog_defaults.get('sets_min', 1)), min_val=1, max_val=10
+                    ),
+                    'reps': self._sanitize_string(exercise.get('reps', '10')),
+                    'rest_time': self._sanitize_string(exercise.get('rest_time', '60')),
+                    'notes': self._sanitize_string(exercise.get('notes', '')),
+                    'progression': self._sanitize_string(exercise.get('progression', ''))
+                }
+                cleaned_exercises.append(cleaned_exercise)
+                if entry is None:
+                    # An ID with no name is reported by its ID
+                    unresolved.append(cleaned_exercise['name'] or (
+                        f"exercise_id {exercise['exercise_id']}" if exercise.get('exercise_id') is not None
+                        else 'unnamed exercise'
+                    ))
+        
+        cleaned_workout['exercises'] = cleaned_exercises
+        
+        # Clean warm-up and cool-down
+        cleaned_workout['warm_up'] = [
+            self._sanitize_string(item) for item in workout_data.get('warm_up', [])
+            if isinstance(item, str) and item.strip()
+        ]
+        cleaned_workout['cool_down'] = [
+            self._sanitize_string(item) for item in workout_data.get('cool_down', [])
+            if isinstance(item, str) and item.strip()
+        ]
+        
+        return cleaned_workout, unresolved
+    
     def _clean_meal_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Clean and validate meal-specific data."""
         if 'daily_meals' not in data:
@@ -247,45 +304,17 @@ class AIFilterService:
             cleaned_day = {}
             cleaned_day['day_of_week'] = self._sanitize_string(meal_data.get('day_of_week', ''))
             
+            # Meals may be nested under "meals" (prompt schema) or sit at day level
+            day_meals = meal_data.get('meals') if isinstance(meal_data.get('meals'), dict) else meal_data
+            
             # Clean individual meals
             for meal_type in ['breakfast', 'lunch', 'dinner']:
-                meal = meal_data.get(meal_type, {})
+                meal = day_meals.get(meal_type, {})
                 if isinstance(meal, dict):
-                    cleaned_meal = {
-                        'name': self._sanitize_string(meal.get('name', '')),
-                        'calories': self._sanitize_number(meal.get('calories', 0), min_val=0, max_val=2000),
-                        'protein': self._sanitize_string(meal.get('protein', '0g')),
-                        'carbs': self._sanitize_string(meal.get('carbs', '0g')),
-                        'fat': self._sanitize_string(meal.get('fat', '0g')),
-                        'prep_time': self._sanitize_string(meal.get('prep_time', '10')),
-                        'ingredients': [
-                            self._sanitize_string(ingredient) for ingredient in meal.get('ingredients', [])
-                            if isinstance(ingredient, str) and ingredient.strip()
-                        ],
-                        'instructions': [
-                            self._sanitize_string(instruction) for instruction in meal.get('instructions', [])
-                            if isinstance(instruction, str) and instruction.strip()
-                        ],
-                        'meal_prep_notes': self._sanitize_string(meal.get('meal_prep_notes', ''))
-                    }
-                    cleaned_day[meal_type] = cleaned_meal
+                    cleaned_day[meal_type] = self._clean_meal(meal)
             
             # Clean snacks
-            snacks = meal_data.get('snacks', [])
-            cleaned_snacks = []
-            for snack in snacks:
-                if isinstance(snack, dict):
-                    cleaned_snack = {
-                        'name': self._sanitize_string(snack.get('name', '')),
-                        'calories': self._sanitize_number(snack.get('calories', 0), min_val=0, max_val=500),
-                        'ingredients': [
-                            self._sanitize_string(ingredient) for ingredient in snack.get('ingredients', [])
-                            if isinstance(ingredient, str) and ingredient.strip()
-                        ]
-                    }
-                    cleaned_snacks.append(cleaned_snack)
-            
-            cleaned_day['snacks'] = cleaned_snacks
+            cleaned_day['snacks'] = self._clean_snacks(day_meals.get('snacks', []))
             
             # Clean daily totals
             daily_totals = meal_data.get('daily_totals', {})
@@ -303,6 +332,97 @@ class AIFilterService:
         data['daily_meals'] = cleaned_meals
         return data
     
+    def filter_meal_slots(self, slots: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Clean individual regenerated meals, given as {day: {meal_type: meal}}
+        where meal_type "snacks" holds a list of snacks.
+        """
+        cleaned = {}
+        for day, meals in slots.items():
+            if not isinstance(meals, dict):
+                continue
+            cleaned_day = {}
+            for meal_type, meal in meals.items():
+                if meal_type == 'snacks':
+                    cleaned_day['snacks'] = self._clean_snacks(meal)
+                elif meal_type in ('breakfast', 'lunch', 'dinner') and isinstance(meal, dict):
+                    cleaned_day[meal_type] = self._clean_meal(meal)
+            cleaned[day] = cleaned_day
+        return self._sanitize_text_fields(cleaned)
+    
+    def merge_workout_days(
+        self,
+        plan: Dict[str, Any],
+        daily_workouts: Dict[str, Any],
+        allowed_ids: Optional[Collection[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Clean regenerated days and put them into an existing plan.
+        catalog_violations is updated for the replaced days only.
+        """
+        cleaned = self.filter_workout_days(daily_workouts, allowed_ids)
+        violations = {day: names for day, names in plan.get('catalog_violations', {}).items()
+                      if day not in cleaned['daily_workouts']}
+        violations.update(cleaned.get('catalog_violations', {}))
+        plan.setdefault('daily_workouts', {}).update(cleaned['daily_workouts'])
+        if violations:
+            plan['catalog_violations'] = violations
+        else:
+            plan.pop('catalog_violations', None)
+        return plan
+    
+    def merge_meal_days(self, plan: Dict[str, Any], daily_meals: Dict[str, Any]) -> Dict[str, Any]:
+        """Clean regenerated whole days and put them into an existing meal plan."""
+        cleaned = self._sanitize_text_fields(self._clean_meal_data({'daily_meals': daily_meals}))
+        plan.setdefault('daily_meals', {}).update(cleaned['daily_meals'])
+        return plan
+    
+    def _clean_meal(self, meal: Dict[str, Any]) -> Dict[str, Any]:
+        """Clean a single breakfast, lunch or dinner entry."""
+        return {
+            'name': self._sanitize_string(meal.get('name', '')),
+            'calories': self._sanitize_number(meal.get('calories', 0), min_val=0, max_val=2000),
+            'protein': self._sanitize_string(meal.get('protein', '0g')),
+            'carbs': self._sanitize_string(meal.get('carbs', '0g')),
+            'fat': self._sanitize_string(meal.get('fat', '0g')),
+            'prep_time': self._sanitize_string(meal.get('prep_time', '10')),
+            'ingredients': [
+                self._sanitize_string(ingredient) for ingredient in meal.get('ingredients', [])
+                if isinstance(ingredient, str) and ingredient.strip()
+            ],
+            'instructions': [
+                self._sanitize_string(instruction) for instruction in self._as_list(meal.get('instructions', []))
+                if isinstance(instruction, str) and instruction.strip()
+            ],
+            'meal_prep_notes': self._sanitize_string(meal.get('meal_prep_notes', ''))
+        }
+    
+    def _clean_snacks(self, snacks: Any) -> List[Dict[str, Any]]:
+        """Clean the snack list of a day."""
+        cleaned_snacks = []
+        for snack in snacks if isinstance(snacks, list) else []:
+            if isinstance(snack, dict):
+                cleaned_snack = {
+                    'name': self._sanitize_string(snack.get('name', '')),
+                    'calories': self._sanitize_number(snack.get('calories', 0), min_val=0, max_val=500),
+                    'ingredients': [
+                        self._sanitize_string(ingredient) for ingredient in snack.get('ingredients', [])
+                        if isinstance(ingredient, str) and ingredient.strip()
+                    ]
+                }
+                # Macros are optional for snacks (library snacks carry them)
+                for key in ('protein', 'carbs', 'fat'):
+                    if key in snack:
+                        cleaned_snack[key] = self._sanitize_string(snack[key])
+                cleaned_snacks.append(cleaned_snack)
+        return cleaned_snacks
+    
+    def _as_list(self, value: Any) -> List[Any]:
+        """Wrap a single string (e.g. one-line instructions) in a list."""
+        if isinstance(value, str):
+            return [value]
+        return value if isinstance(value, list) else []
+    
     def _sanitize_string(self, value: Any) -> str:
         """Sanitize string values to prevent injection and ensure valid content."""
         if not isinstance(value, str):
@@ -371,17 +491,17 @@ class AIFilterService:
         return data
     
     def _ensure_daily_workout_completeness(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Ensure all days of the month have workout entries."""
+        """Ensure all days of the month (or of a rolling plan's generated weeks) have workout entries."""
         if 'monthly_overview' not in data:
             return data
         
         month = data['monthly_overview'].get('month', 1)
         year = data['monthly_overview'].get('year', datetime.now().year)
-        days_in_month = calendar.monthrange(year, month)[1]
+        last_day = data['monthly_overview'].get(HORIZON_KEY) or calendar.monthrange(year, month)[1]
         
         daily_workouts = data.get('daily_workouts', {})
         
-        for day in range(1, days_in_month + 1):
+        for day in range(1, last_day + 1):
             day_str = str(day)
             if day_str not in daily_workouts:
                 # Create a rest day entry
@@ -399,17 +519,17 @@ class AIFilterService:
         return data
     
     def _ensure_daily_meal_completeness(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Ensure all days of the month have meal entries."""
+        """Ensure all days of the month (or of a rolling plan's generated weeks) have meal entries."""
         if 'monthly_overview' not in data:
             return data
         
         month = data['monthly_overview'].get('month', 1)
         year = data['monthly_overview'].get('year', datetime.now().year)
-        days_in_month = calendar.monthrange(year, month)[1]
+        last_day = data['monthly_overview'].get(HORIZON_KEY) or calendar.monthrange(year, month)[1]
         
         daily_meals = data.get('daily_meals', {})
         
-        for day in range(1, days_in_month + 1):
+        for day in range(1, last_day + 1):
             day_str = str(day)
             if day_str not in daily_meals:
                 # Create a basic meal day entry
@@ -484,6 +604,10 @@ class AIFilterService:
             if overview.get('year') != year:
                 validation_errors.append(f"Year mismatch: expected {year}, got {overview.get('year')}")
         
+        # Exercises outside the template catalog
+        for day, names in filtered_data.get('catalog_violations', {}).items():
+            validation_errors.append(f"Day {day}: exercises not in catalog: {', '.join(names)}")
+        
         # If there are validation errors, create a minimal valid structure
         if validation_errors:
             logger.warning(f"Validation errors found: {validation_errors}")
@@ -515,6 +639,12 @@ class AIFilterService:
             if overview.get('year') != year:
                 validation_errors.append(f"Year mismatch: expected {year}, got {overview.get('year')}")
         
+        # Meals that still break the user's allergies or diet
+        for violation in filtered_data.get('dietary_violations', []):
+            validation_errors.append(
+                f"Day {violation['day']} {violation['meal']}: '{violation['text']}' conflicts with {violation['constraint']}"
+            )
+        
         # If there are validation errors, create a minimal valid structure
         if validation_errors:
             logger.warning(f"Validation errors found: {validation_errors}")
@@ -0,0 +1,183 @@
+import logging
+from typing import Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+# Positional layouts used on the wire. Order matters: the model emits arrays
+# in exactly this order and the expander zips them back onto these names.
+# Exercises lead with their catalog ID; a string there is taken as a name.
+EXERCISE_FIELDS = ['exercise_id', 'notes', 'sets', 'reps', 'rest_time', 'progression']
+MEAL_FIELDS = ['name', 'calories', 'protein', 'carbs', 'fat', 'ingredients', 'prep_time', 'instructions']
+SNACK_FIELDS = ['name', 'calories', 'timing']
+
+# Short keys for the per-day objects
+WORKOUT_DAY_KEYS = {
+    't': 'workout_type',
+    'd': 'duration',
+    'i': 'intensity',
+    'x': 'exercises',
+    'w': 'warm_up',
+    'c': 'cool_down'
+}
+MEAL_DAY_KEYS = {
+    'b': 'breakfast',
+    'l': 'lunch',
+    'd': 'dinner',
+    's': 'snacks'
+}
+
+COMPACT_WORKOUTS_KEY = 'dw'
+COMPACT_MEALS_KEY = 'dm'
+
+
+class CompactSchemaService:
+    """
+    Optional compact wire schema for model output.
+    Daily entries use short keys and exercises/meals are positional arrays,
+    which removes the long keys the model would otherwise repeat for every
+    day of the month. Expansion restores the regular daily_workouts /
+    daily_meals structure before the plan reaches AIFilterService.
+    """
+
+    def __init__(self):
+        self._workout_day_keys_reverse = {v: k for k, v in WORKOUT_DAY_KEYS.items()}
+        self._meal_day_keys_reverse = {v: k for k, v in MEAL_DAY_KEYS.items()}
+
+    def workout_prompt_format(self) -> str:
+        """JSON format block describing compact daily workouts for the prompt."""
+        return (
+            '"dw": {\n'
+            '                "1": {\n'
+            '                    "t": "Upper Body | Lower Body | Full Body | Cardio | Rest",\n'
+            '                    "d": duration_minutes,\n'
+            '                    "i": "Low | Moderate | High",\n'
+            '                    "x": [[exercise_id, "notes"]],\n'
+            '                    "w": ["warm_up_exercise_1"],\n'
+            '                    "c": ["cool_down_exercise_1"]\n'
+            '                }\n'
+            '            }'
+        )
+
+    def meal_prompt_format(self) -> str:
+        """JSON format block describing compact daily meals for the prompt."""
+        return (
+            '"dm": {\n'
+            '                "1": {\n'
+            '                    "b": ["Meal name from template", calories, protein_g, carbs_g, fat_g, ["150g ingredient1", "1 cup ingredient2"], prep_minutes, "Brief cooking instructions"],\n'
+            '                    "l": [same layout as "b"],\n'
+            '                    "d": [same layout as "b"],\n'
+            '                    "s": [["Snack from template", calories, "morning/afternoon/evening"]]\n'
+            '                }\n'
+            '            }'
+        )
+
+    def expand_workout_plan(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Replace compact "dw" days with a regular daily_workouts mapping."""
+        if not isinstance(data, dict) or COMPACT_WORKOUTS_KEY not in data:
+            return data
+
+        compact_days = data.pop(COMPACT_WORKOUTS_KEY)
+        if not isinstance(compact_days, dict):
+            logger.warning("Compact workout days are not an object, dropping them")
+            compact_days = {}
+
+        daily_workouts = {}
+        for day, compact_day in compact_days.items():
+            if not isinstance(compact_day, dict):
+                continue
+            workout = {WORKOUT_DAY_KEYS.get(key, key): value for key, value in compact_day.items()}
+            workout['exercises'] = [
+                self._expand_exercise(row) for row in workout.get('exercises') or []
+            ]
+            daily_workouts[str(day)] = workout
+
+        data['daily_workouts'] = daily_workouts
+        return data
+
+    def expand_meal_plan(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Replace compact "dm" days with a regular daily_meals mapping."""
+        if not isinstance(data, dict) or COMPACT_MEALS_KEY not in data:
+            return data
+
+        compact_days = data.pop(COMPACT_MEALS_KEY)
+        if not isinstance(compact_days, dict):
+            logger.warning("Compact meal days are not an object, dropping them")
+            compact_days = {}
+
+        daily_meals = {}
+        for day, compact_day in compact_days.items():
+            if not isinstance(compact_day, dict):
+                continue
+            meals = {}
+            for key, value in compact_day.items():
+                meal_type = MEAL_DAY_KEYS.get(key, key)
+                if meal_type == 'snacks':
+                    meals['snacks'] = [self._expand_row(row, SNACK_FIELDS) for row in value or []]
+                else:
+                    meals[meal_type] = self._expand_row(value, MEAL_FIELDS)
+            daily_meals[str(day)] = {'meals': meals}
+
+        data['daily_meals'] = daily_meals
+        return data
+
+    def compact_workout_plan(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Encode a regular workout plan into the compact schema."""
+        compact = {key: value for key, value in data.items() if key != 'daily_workouts'}
+        compact_days = {}
+        for day, workout in data.get('daily_workouts', {}).items():
+            compact_day = {}
+            for key, value in workout.items():
+                if key not in self._workout_day_keys_reverse:
+                    continue
+                if key == 'exercises':
+                    value = [self._compact_exercise(exercise) for exercise in value]
+                compact_day[self._workout_day_keys_reverse[key]] = value
+            compact_days[day] = compact_day
+        compact[COMPACT_WORKOUTS_KEY] = compact_days
+        return compact
+
+    def compact_meal_plan(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Encode a regular meal plan into the compact schema."""
+        compact = {key: value for key, value in data.items() if key != 'daily_meals'}
+        compact_days = {}
+        for day, day_data in data.get('daily_meals', {}).items():
+            meals = day_data.get('meals') if isinstance(day_data.get('meals'), dict) else day_data
+            compact_day = {}
+            for meal_type, short_key in self._meal_day_keys_reverse.items():
+                if meal_type not in meals:
+                    continue
+                if meal_type == 'snacks':
+                    compact_day[short_key] = [self._compact_row(s, SNACK_FIELDS) for s in meals['snacks']]
+                else:
+                    compact_day[short_key] = self._compact_row(meals[meal_type], MEAL_FIELDS)
+            compact_days[day] = compact_day
+        compact[COMPACT_MEALS_KEY] = compact_days
+        return compact
+
+    def _expand_exercise(self, row: Any) -> Dict[str, Any]:
+        """Expand an exercise row whose first slot is a catalog ID or a name."""
+        exercise = self._expand_row(row, EXERCISE_FIELDS)
+        if isinstance(exercise.get('exercise_id'), str) and not exercise['exercise_id'].strip().isdigit():
+            exercise['name'] = exercise.pop('exercise_id')
+        return exercise
+
+    def _compact_exercise(self, exercise: Dict[str, Any]) -> List[Any]:
+        """Flatten an exercise, falling back to its name when it has no catalog ID."""
+        if exercise.get('exercise_id') is None:
+            exercise = dict(exercise, exercise_id=exercise.get('name'))
+        return self._compact_row(exercise, EXERCISE_FIELDS)
+
+    def _expand_row(self, row: Any, fields: List[str]) -> Dict[str, Any]:
+        """Zip a positional array back onto field names; objects pass through."""
+        if isinstance(row, dict):
+            return row
+        if not isinstance(row, list):
+            return {}
+        return dict(zip(fields, row))
+
+    def _compact_row(self, item: Dict[str, Any], fields: List[str]) -> List[Any]:
+        """Flatten an object into a positional array, trimming trailing gaps."""
+        row = [item.get(field) for field in fields]
+        while row and row[-1] is None:
+            row.pop()
+        return row
@@ -0,0 +1,201 @@
+import zlib
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+# Optional codecs: negotiated only when the package is installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Server preference when the client weights several encodings equally
+ENCODING_PREFERENCE = ['zstd', 'br', 'gzip']
+COMPRESSIBLE_TYPES = ('application/json', 'text/', 'application/javascript', 'application/xml')
+DEFAULT_MINIMUM_SIZE = 1024
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        # wbits 16+MAX_WBITS writes the gzip container
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdEncoder:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def available_encodings() -> List[str]:
+    """Encodings this process can produce, in server preference order."""
+    installed = {'gzip': True, 'br': brotli is not None, 'zstd': zstandard is not None}
+    return [name for name in ENCODING_PREFERENCE if installed[name]]
+
+
+def negotiate_encoding(accept_encoding: str, supported: List[str]) -> Optional[str]:
+    """
+    Pick the encoding with the highest q-value in an Accept-Encoding header,
+    breaking ties by server preference. None means send the body as is.
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(','):
+        name, _, params = part.strip().partition(';')
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip()] = q
+
+    best, best_q = None, 0.0
+    for name in supported:
+        q = weights.get(name, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that compresses responses with zstd, brotli or gzip as
+    negotiated from Accept-Encoding. Bodies sent in one message below
+    minimum_size are passed through. Streamed bodies (more_body=True) are
+    compressed chunk by chunk and flushed per chunk, so clients still
+    receive data as it is produced.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = DEFAULT_MINIMUM_SIZE,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+        zstd_level: int = 3,
+        encodings: Optional[List[str]] = None
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {'gzip': gzip_level, 'br': brotli_quality, 'zstd': zstd_level}
+        supported = available_encodings()
+        self.encodings = [e for e in supported if encodings is None or e in encodings]
+        logger.info(f"🗜️ Response compression: {self.encodings} (minimum {minimum_size} bytes)")
+
+    def _encoder(self, encoding: str):
+        if encoding == 'zstd':
+            return _ZstdEncoder(self.levels['zstd'])
+        if encoding == 'br':
+            return _BrotliEncoder(self.levels['br'])
+        return _GzipEncoder(self.levels['gzip'])
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get('accept-encoding', ''), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Per-request state: holds the start message until the first body chunk decides the mode."""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream = send
+        self.start_message = None
+        self.encoder = None
+        self.passthrough = False
+
+    async def send(self, message):
+        if message['type'] == 'http.response.start':
+            self.start_message = message
+            return
+        if message['type'] != 'http.response.body' or self.passthrough:
+            await self.downstream(message)
+            return
+
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+
+        if self.encoder is None:
+            headers = MutableHeaders(raw=self.start_message['headers'])
+            if not self._should_compress(headers, body, more_body):
+                self.passthrough = True
+                await self.downstream(self.start_message)
+                await self.downstream(message)
+                return
+
+            self.encoder = self.middleware._encoder(self.encoding)
+            headers['Content-Encoding'] = self.encoding
+            headers.add_vary_header('Accept-Encoding')
+            if not more_body:
+                # Whole body in one message: compress it and send an exact length
+                compressed = self.encoder.compress(body) + self.encoder.finish()
+                headers['Content-Length'] = str(len(compressed))
+                await self.downstream(self.start_message)
+                await self.downstream({'type': 'http.response.body', 'body': compressed})
+                return
+            del headers['Content-Length']
+            await self.downstream(self.start_message)
+
+        if more_body:
+            chunk = self.encoder.compress(body) + self.encoder.flush()
+        else:
+            chunk = self.encoder.compress(body) + self.encoder.finish()
+        await self.downstream({'type': 'http.response.body', 'body': chunk, 'more_body': more_body})
+
+    def _should_compress(self, headers: MutableHeaders, body: bytes, more_body: bool) -> bool:
+        if 'content-encoding' in headers:
+            return False
+        if not headers.get('content-type', '').startswith(COMPRESSIBLE_TYPES):
+            return False
+        return more_body or len(body) >= self.middleware.minimum_size
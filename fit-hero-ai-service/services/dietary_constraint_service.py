@@ -0,0 +1,288 @@
+import re
+import logging
+from bisect import bisect_right
+from collections import deque
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+MEAL_TYPES = ['breakfast', 'lunch', 'dinner']
+
+# Terms (with synonyms) that indicate each allergen
+ALLERGEN_TERMS = {
+    'peanut': ['peanut', 'groundnut', 'satay'],
+    'tree_nut': ['almond', 'walnut', 'cashew', 'pecan', 'pistachio', 'hazelnut', 'macadamia',
+                 'brazil nut', 'pine nut', 'nut', 'nut butter', 'trail mix', 'praline', 'marzipan'],
+    'dairy': ['milk', 'cheese', 'yogurt', 'yoghurt', 'butter', 'cream', 'whey', 'casein', 'ghee',
+              'kefir', 'parmesan', 'mozzarella', 'feta', 'ricotta', 'cottage cheese', 'protein powder'],
+    'egg': ['egg', 'mayonnaise', 'mayo', 'omelette', 'omelet', 'meringue', 'scramble', 'frittata'],
+    'gluten': ['wheat', 'bread', 'pasta', 'flour', 'barley', 'rye', 'couscous', 'wrap', 'tortilla',
+               'seitan', 'bulgur', 'cracker', 'noodle', 'granola', 'pancake', 'toast', 'bagel'],
+    'soy': ['soy', 'soya', 'tofu', 'tempeh', 'edamame', 'miso'],
+    'fish': ['fish', 'salmon', 'tuna', 'cod', 'tilapia', 'sardine', 'mackerel', 'anchovy', 'trout',
+             'halibut', 'omega 3'],
+    'shellfish': ['shellfish', 'shrimp', 'prawn', 'crab', 'lobster', 'mussel', 'clam', 'oyster',
+                  'scallop', 'squid'],
+    'sesame': ['sesame', 'tahini', 'hummus']
+}
+
+MEAT_TERMS = ['chicken', 'beef', 'pork', 'turkey', 'lamb', 'bacon', 'ham', 'sausage', 'meat',
+              'steak', 'veal', 'duck', 'gelatin', 'jerky', 'prosciutto', 'salami', 'pepperoni']
+
+# Terms excluded by each diet (allergen groups are expanded below)
+DIET_TERMS = {
+    'vegetarian': MEAT_TERMS + ['@fish', '@shellfish'],
+    'pescatarian': MEAT_TERMS,
+    'vegan': MEAT_TERMS + ['@fish', '@shellfish', '@dairy', '@egg', 'honey'],
+    'keto': ['sugar', 'rice', 'bread', 'pasta', 'oats', 'potato', 'quinoa', 'banana', 'honey',
+             'granola', 'wrap', 'tortilla', 'beans', 'pancake', 'toast', 'noodle', 'couscous'],
+    'paleo': ['@dairy', 'wheat', 'bread', 'pasta', 'rice', 'oats', 'beans', 'lentil', 'chickpea',
+              'peanut', 'sugar', 'quinoa', 'tofu', 'granola'],
+    'gluten_free': ['@gluten'],
+    'dairy_free': ['@dairy'],
+    'lactose_free': ['@dairy']
+}
+
+# Phrases that contain a term but do not violate the given constraints
+SAFE_PHRASES = {
+    'almond milk': {'dairy'}, 'oat milk': {'dairy'}, 'soy milk': {'dairy'}, 'rice milk': {'dairy'},
+    'coconut milk': {'dairy'}, 'cashew milk': {'dairy'}, 'coconut cream': {'dairy'},
+    'coconut yogurt': {'dairy'}, 'vegan cheese': {'dairy'}, 'plant protein powder': {'dairy'},
+    'peanut butter': {'dairy'}, 'nut butter': {'dairy'}, 'almond butter': {'dairy'},
+    'cashew butter': {'dairy'}, 'cocoa butter': {'dairy'}, 'butternut': {'dairy', 'tree_nut'},
+    'coconut': {'tree_nut'}, 'nutmeg': {'tree_nut'}, 'eggplant': {'egg'},
+    'gluten free bread': {'gluten'}, 'gluten free pasta': {'gluten'}, 'rice noodle': {'gluten'},
+    'lettuce wrap': {'gluten', 'keto', 'paleo'}, 'cauliflower rice': {'keto', 'paleo', 'gluten'},
+    'tofu scramble': {'egg'}, 'veggie burger': {'vegetarian', 'vegan'},
+    'sugar free': {'keto', 'paleo'}, 'sweet potato': {'keto'}, 'green beans': {'keto', 'paleo'}
+}
+
+# Free-text allergy/preference inputs mapped onto constraint keys
+CONSTRAINT_ALIASES = {
+    'nuts': ['peanut', 'tree_nut'], 'nut': ['peanut', 'tree_nut'], 'peanuts': ['peanut'],
+    'tree nuts': ['tree_nut'], 'tree_nuts': ['tree_nut'], 'milk': ['dairy'], 'lactose': ['dairy'],
+    'eggs': ['egg'], 'wheat': ['gluten'], 'celiac': ['gluten'], 'coeliac': ['gluten'],
+    'soya': ['soy'], 'seafood': ['fish', 'shellfish'], 'shrimp': ['shellfish'],
+    'crustacean': ['shellfish'], 'plant_based': ['vegan'], 'plant-based': ['vegan'],
+    'gluten-free': ['gluten_free'], 'dairy-free': ['dairy_free'], 'ketogenic': ['keto'],
+    'low_carb': ['keto'], 'low-carb': ['keto']
+}
+
+# Preferences that exclude no food, so they need no constraint key
+UNRESTRICTED_PREFERENCES = {'balanced', 'none', 'no restrictions', 'omnivore', 'anything', 'flexible'}
+
+
+def normalize_text(text: str) -> str:
+    """Lower-case and turn separators into spaces so terms match on word boundaries."""
+    return ' '.join(re.sub(r'[_\-/,()]+', ' ', str(text).lower()).split())
+
+
+class DietaryConstraintScanner:
+    """
+    Aho-Corasick matcher over allergen and diet-exclusion vocabularies.
+    The automaton is compiled once; a scan walks every meal name and
+    ingredient of a month in a single pass and reports the day/meal paths
+    that break the user's allergies or dietary preferences.
+    """
+
+    def __init__(self):
+        self._constraint_terms = self._expand_vocabulary()
+
+        # pattern -> constraints it signals; safe phrases suppress constraints instead
+        patterns: Dict[str, Set[str]] = {}
+        for constraint, terms in self._constraint_terms.items():
+            for term in terms:
+                patterns.setdefault(normalize_text(term), set()).add(constraint)
+        self._safe_phrases = {normalize_text(p): c for p, c in SAFE_PHRASES.items()}
+        for phrase in self._safe_phrases:
+            patterns.setdefault(phrase, set())
+
+        self._build_automaton(patterns)
+        logger.info(f"🥜 Dietary scanner compiled: {len(patterns)} patterns, {len(self._goto)} states")
+
+    def _expand_vocabulary(self) -> Dict[str, List[str]]:
+        """Resolve "@group" references in diet exclusions to the group's terms."""
+        vocabulary = {key: list(terms) for key, terms in ALLERGEN_TERMS.items()}
+        for diet, terms in DIET_TERMS.items():
+            expanded = []
+            for term in terms:
+                if term.startswith('@'):
+                    expanded.extend(ALLERGEN_TERMS[term[1:]])
+                else:
+                    expanded.append(term)
+            vocabulary[diet] = expanded
+        return vocabulary
+
+    def _build_automaton(self, patterns: Dict[str, Set[str]]):
+        """Build the goto/fail/output tables of the Aho-Corasick automaton."""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+        self._pattern_constraints = patterns
+
+        for pattern in patterns:
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(pattern)
+
+        # Breadth-first pass for failure links
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def resolve_constraints(self, allergies: Optional[List[str]], dietary_preferences: Optional[List[str]]) -> Set[str]:
+        """Map free-text allergies and preferences onto known constraint keys."""
+        active = set()
+        for value in (allergies or []) + (dietary_preferences or []):
+            active |= self._resolve(value)
+        return active
+
+    def unresolved_constraints(
+        self,
+        allergies: Optional[List[str]],
+        dietary_preferences: Optional[List[str]]
+    ) -> List[str]:
+        """
+        Allergies and restricting preferences that map onto no known
+        constraint key, and so would be silently ignored by a scan.
+        """
+        unresolved = [value for value in allergies or [] if not self._resolve(value)]
+        for value in dietary_preferences or []:
+            if normalize_text(value) not in UNRESTRICTED_PREFERENCES and not self._resolve(value):
+                unresolved.append(value)
+        return unresolved
+
+    def _resolve(self, value: Any) -> Set[str]:
+        key = str(value).strip().lower()
+        return {
+            candidate for candidate in CONSTRAINT_ALIASES.get(key, [key.replace(' ', '_'), key.rstrip('s')])
+            if candidate in self._constraint_terms
+        }
+
+    def find_matches(self, text: str) -> List[Tuple[int, int, str]]:
+        """Return (start, end, pattern) for every whole-word pattern occurrence."""
+        matches = []
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for pattern in self._output[state]:
+                start = index - len(pattern) + 1
+                if self._is_word(text, start, index + 1):
+                    matches.append((start, index + 1, pattern))
+        return matches
+
+    def _is_word(self, text: str, start: int, end: int) -> bool:
+        """Whole-word check that also accepts simple plurals ("eggs", "peaches")."""
+        if start > 0 and text[start - 1].isalnum():
+            return False
+        for suffix in ('', 's', 'es'):
+            tail = end + len(suffix)
+            if text[end:tail] == suffix and (tail >= len(text) or not text[tail].isalnum()):
+                return True
+        return False
+
+    def scan_meal_plan(
+        self,
+        daily_meals: Dict[str, Any],
+        allergies: Optional[List[str]] = None,
+        dietary_preferences: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Scan every meal name and ingredient of a month in one pass.
+        Returns violations with day, meal slot, offending text, matched term
+        and the constraint it breaks.
+        """
+        active = self.resolve_constraints(allergies, dietary_preferences)
+        if not active:
+            return []
+
+        # One newline-separated text with offsets back to (day, meal, text)
+        segments, offsets, parts, position = [], [], [], 0
+        for day, day_data in daily_meals.items():
+            if not isinstance(day_data, dict):
+                continue
+            meals = day_data.get('meals') if isinstance(day_data.get('meals'), dict) else day_data
+            for meal_type, item in self._iter_items(meals):
+                for text in [item.get('name', '')] + list(item.get('ingredients', []) or []):
+                    if not isinstance(text, str) or not text.strip():
+                        continue
+                    normalized = normalize_text(text)
+                    segments.append((day, meal_type, text))
+                    offsets.append(position)
+                    parts.append(normalized)
+                    position += len(normalized) + 1
+
+        matches = self.find_matches('\n'.join(parts))
+
+        # Safe phrases per segment, e.g. "almond milk" clears "milk" for dairy
+        safe_spans: Dict[int, List[Tuple[int, int, Set[str]]]] = {}
+        for start, end, pattern in matches:
+            if pattern in self._safe_phrases:
+                segment_index = bisect_right(offsets, start) - 1
+                safe_spans.setdefault(segment_index, []).append((start, end, self._safe_phrases[pattern]))
+
+        violations = []
+        seen = set()
+        for start, end, pattern in matches:
+            constraints = self._pattern_constraints[pattern] & active
+            if not constraints:
+                continue
+            segment_index = bisect_right(offsets, start) - 1
+            spans = safe_spans.get(segment_index, ())
+            for constraint in constraints:
+                if any(s <= start and end <= e and constraint in cleared for s, e, cleared in spans):
+                    continue
+                day, meal_type, text = segments[segment_index]
+                key = (day, meal_type, text, constraint)
+                if key in seen:
+                    continue
+                seen.add(key)
+                violations.append({
+                    'day': day,
+                    'meal': meal_type,
+                    'text': text,
+                    'term': pattern,
+                    'constraint': constraint
+                })
+
+        return violations
+
+    def _iter_items(self, meals: Dict[str, Any]):
+        """Yield (slot, meal) for main meals and snacks of a day."""
+        for meal_type in MEAL_TYPES:
+            if isinstance(meals.get(meal_type), dict):
+                yield meal_type, meals[meal_type]
+        for snack in meals.get('snacks', []) or []:
+            if isinstance(snack, dict):
+                yield 'snacks', snack
+
+    def offending_slots(self, violations: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+        """Group violations into {day: [meal slots]} for targeted regeneration."""
+        slots: Dict[str, List[str]] = {}
+        for violation in violations:
+            day_slots = slots.setdefault(violation['day'], [])
+            if violation['meal'] not in day_slots:
+                day_slots.append(violation['meal'])
+        return slots
+
+
+# Global scanner instance, compiled once at import
+dietary_scanner = DietaryConstraintScanner()
@@ -0,0 +1,268 @@
+import os
+import re
+import sys
+import json
+import hashlib
+import logging
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Template keys under training environments that list equipment, not exercises
+NON_EXERCISE_KEYS = {'equipment_available', 'equipment_options', 'equipment_needed'}
+
+# Exercise type implied by the template category
+CATEGORY_TYPES = {
+    'warm_up': 'flexibility',
+    'cool_down': 'flexibility',
+    'strength_training': 'strength',
+    'exercises': 'strength',
+    'cardio': 'cardio',
+    'conditioning': 'cardio'
+}
+
+RANGE = r'(\d+)(?:\s*-\s*(\d+))?'
+SETS_PATTERN = re.compile(RANGE + r'\s*sets?\b', re.IGNORECASE)
+REPS_PATTERN = re.compile(RANGE + r'\s*(?:reps?\b|each\b)', re.IGNORECASE)
+SECONDS_PATTERN = re.compile(RANGE + r'\s*(?:seconds?|secs?)\b', re.IGNORECASE)
+MINUTES_PATTERN = re.compile(RANGE + r'\s*(?:minutes?|mins?)\b', re.IGNORECASE)
+
+# Numeric fields of a filtered workout day; every other value there is a string
+NUMERIC_PLAN_FIELDS = {'duration', 'sets', 'exercise_id'}
+
+
+def normalize_exercise_name(name: str) -> str:
+    """Lower-case, drop the parenthesised hint and collapse whitespace."""
+    name = re.sub(r'\(.*?\)', ' ', str(name))
+    name = re.sub(r'[^a-z0-9/\-\' ]', ' ', name.lower())
+    return ' '.join(name.split())
+
+
+class ExerciseCatalog:
+    """
+    Compiled catalog of the exercises listed in workout_templates.json.
+    Every distinct exercise gets an integer ID in template order, and the
+    free-text "(2-3 sets, 12-15 reps)" hints are parsed into fields.
+    Plans reference exercises by ID; names are filled back in from here.
+    """
+
+    def __init__(self, workout_template: Optional[Dict[str, Any]] = None):
+        if workout_template is None:
+            workout_template = self._load_workout_template()
+
+        self.entries: List[Dict[str, Any]] = []
+        self._by_id: Dict[int, Dict[str, Any]] = {}
+        self._by_name: Dict[str, int] = {}
+        self._by_raw: Dict[str, int] = {}
+        self._build(workout_template)
+
+        digest = hashlib.sha1(
+            json.dumps([e['raw'] for e in self.entries]).encode('utf-8')
+        ).hexdigest()
+        self.version = digest[:12]
+        logger.info(f"🏋️ Exercise catalog compiled: {len(self.entries)} exercises (version {self.version})")
+
+    def _load_workout_template(self) -> Dict[str, Any]:
+        """Load the unified workout template from JSON file"""
+        template_path = os.path.join(os.path.dirname(__file__), "../templates/workout_templates.json")
+        try:
+            with open(template_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            logger.warning(f"Workout template file not found at {template_path}")
+            return {}
+
+    def _build(self, workout_template: Dict[str, Any]):
+        """Walk the training environments in file order and assign IDs."""
+        environments = workout_template.get('workout_template', {}).get('training_environments', {})
+
+        for environment, levels in environments.items():
+            if not isinstance(levels, dict):
+                continue
+            for level, categories in levels.items():
+                if not isinstance(categories, dict):
+                    continue
+                for category, items in categories.items():
+                    if category in NON_EXERCISE_KEYS or not isinstance(items, list):
+                        continue
+                    for raw in items:
+                        if isinstance(raw, str) and raw.strip():
+                            self._add(raw.strip(), environment, level, category)
+
+    def _add(self, raw: str, environment: str, level: str, category: str):
+        """Register one template string, reusing the ID of an existing name."""
+        key = normalize_exercise_name(raw)
+        context = {'environment': environment, 'level': level, 'category': category}
+
+        if key in self._by_name:
+            entry = self._by_id[self._by_name[key]]
+            entry['contexts'].append(context)
+            self._by_raw.setdefault(raw.lower(), entry['id'])
+            return
+
+        entry = self.parse_template_string(raw)
+        entry['id'] = len(self.entries) + 1
+        entry['type'] = CATEGORY_TYPES.get(category, 'strength')
+        entry['contexts'] = [context]
+
+        self.entries.append(entry)
+        self._by_id[entry['id']] = entry
+        self._by_name[key] = entry['id']
+        self._by_raw[raw.lower()] = entry['id']
+
+    def parse_template_string(self, raw: str) -> Dict[str, Any]:
+        """Split "Leg press machine (2-3 sets, 12-15 reps)" into name and parsed hints."""
+        match = re.match(r'^(.*?)\s*\((.*)\)\s*$', raw)
+        name, hint = (match.group(1), match.group(2)) if match else (raw, '')
+
+        entry = {
+            'name': sys.intern(name.strip()),
+            'raw': raw,
+            'hint': hint.strip()
+        }
+        self._parse_range(SETS_PATTERN, hint, entry, 'sets')
+        self._parse_range(REPS_PATTERN, hint, entry, 'reps')
+        self._parse_range(SECONDS_PATTERN, raw, entry, 'duration_seconds')
+        self._parse_range(MINUTES_PATTERN, raw, entry, 'duration_minutes')
+        return entry
+
+    def _parse_range(self, pattern, text: str, entry: Dict[str, Any], field: str):
+        """Store "<field>_min"/"<field>_max" when the pattern matches."""
+        match = pattern.search(text)
+        if not match:
+            return
+        low = int(match.group(1))
+        high = int(match.group(2)) if match.group(2) else low
+        entry[f'{field}_min'] = low
+        entry[f'{field}_max'] = high
+
+    def get(self, exercise_id: Any) -> Optional[Dict[str, Any]]:
+        """O(1) lookup by catalog ID (accepts ints or numeric strings)."""
+        try:
+            return self._by_id.get(int(exercise_id))
+        except (TypeError, ValueError):
+            return None
+
+    def lookup_name(self, name: str) -> Optional[Dict[str, Any]]:
+        """Exact lookup by raw template string or normalized exercise name."""
+        if not isinstance(name, str):
+            return None
+        exercise_id = self._by_raw.get(name.strip().lower())
+        if exercise_id is None:
+            exercise_id = self._by_name.get(normalize_exercise_name(name))
+        return self._by_id.get(exercise_id) if exercise_id is not None else None
+
+    def _template_entries(self, exercises: Dict[str, Any]) -> Iterator[Tuple[str, Optional[str], Optional[Dict[str, Any]]]]:
+        """(category, raw string, catalog entry) for a template's exercises; raw is None on a category header."""
+        for category, items in exercises.items():
+            if category in NON_EXERCISE_KEYS or not isinstance(items, list):
+                continue
+            yield category, None, None
+            for raw in items:
+                entry = self.lookup_name(raw) if isinstance(raw, str) else None
+                if entry:
+                    yield category, raw, entry
+
+    def prompt_table(self, exercises: Dict[str, Any]) -> str:
+        """Render template exercises as "id: raw string" lines, grouped by category."""
+        lines = []
+        for category, raw, entry in self._template_entries(exercises):
+            lines.append(f"  {entry['id']}: {raw}" if entry else f"{category}:")
+        return '\n'.join(lines)
+
+    def template_ids(self, exercises: Dict[str, Any]) -> List[int]:
+        """Catalog IDs prompt_table lists for a template: the only exercises a plan for it may use."""
+        return sorted({entry['id'] for _, _, entry in self._template_entries(exercises) if entry})
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable catalog for downstream consumers."""
+        return {
+            'version': self.version,
+            'exercises': {
+                str(entry['id']): {k: v for k, v in entry.items() if k != 'id'}
+                for entry in self.entries
+            }
+        }
+
+    def pack_workout_plan(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Encode daily workouts with catalog IDs and an interned string table.
+        Catalog exercises drop their name; every other string in the days is
+        stored once in "string_table" and referenced by index. Expects a
+        filtered plan, where NUMERIC_PLAN_FIELDS are the only non-strings.
+        """
+        strings: List[str] = []
+        index: Dict[str, int] = {}
+
+        def ref(value, key=None):
+            if key in NUMERIC_PLAN_FIELDS or not isinstance(value, str):
+                return value
+            if value not in index:
+                index[value] = len(strings)
+                strings.append(value)
+            return index[value]
+
+        packed_days = {}
+        for day, workout in data.get('daily_workouts', {}).items():
+            packed_day = {}
+            for key, value in workout.items():
+                if key == 'exercises':
+                    packed_day[key] = [self._pack_exercise(exercise, ref) for exercise in value]
+                elif isinstance(value, list):
+                    packed_day[key] = [ref(item) for item in value]
+                else:
+                    packed_day[key] = ref(value, key)
+            packed_days[day] = packed_day
+
+        packed = {key: value for key, value in data.items() if key != 'daily_workouts'}
+        packed['daily_workouts'] = packed_days
+        packed['string_table'] = strings
+        packed['catalog_version'] = self.version
+        return packed
+
+    def unpack_workout_plan(self, packed: Dict[str, Any]) -> Dict[str, Any]:
+        """Inverse of pack_workout_plan."""
+        strings = packed.get('string_table', [])
+
+        def deref(value, key=None):
+            if key in NUMERIC_PLAN_FIELDS or not isinstance(value, int) or isinstance(value, bool):
+                return value
+            return strings[value]
+
+        daily_workouts = {}
+        for day, packed_day in packed.get('daily_workouts', {}).items():
+            workout = {}
+            for key, value in packed_day.items():
+                if key == 'exercises':
+                    workout[key] = [self._unpack_exercise(exercise, deref) for exercise in value]
+                elif isinstance(value, list):
+                    workout[key] = [deref(item) for item in value]
+                else:
+                    workout[key] = deref(value, key)
+            daily_workouts[day] = workout
+
+        data = {k: v for k, v in packed.items() if k not in ('daily_workouts', 'string_table', 'catalog_version')}
+        data['daily_workouts'] = daily_workouts
+        return data
+
+    def _pack_exercise(self, exercise: Dict[str, Any], ref) -> Dict[str, Any]:
+        entry = self.get(exercise.get('exercise_id'))
+        packed = {}
+        for key, value in exercise.items():
+            if key == 'name' and entry and entry['name'] == value:
+                continue
+            packed[key] = ref(value, key)
+        return packed
+
+    def _unpack_exercise(self, packed: Dict[str, Any], deref) -> Dict[str, Any]:
+        exercise = {}
+        entry = self.get(packed.get('exercise_id'))
+        if 'name' not in packed and entry:
+            exercise['name'] = entry['name']
+        for key, value in packed.items():
+            exercise[key] = deref(value, key)
+        return exercise
+
+
+# Global exercise catalog instance, compiled once at import
+exercise_catalog = ExerciseCatalog()
@@ -0,0 +1,106 @@
+import re
+import logging
+from collections import defaultdict, OrderedDict
+from typing import Dict, Any, List, Optional, Collection
+
+from services.exercise_catalog_service import ExerciseCatalog, exercise_catalog, normalize_exercise_name
+
+logger = logging.getLogger(__name__)
+
+# Minimum Dice similarity over trigrams for a name to count as a catalog exercise
+DEFAULT_MATCH_THRESHOLD = 0.5
+# Resolved names kept per resolver; keys are free text from the model, so the cache is bounded
+DEFAULT_CACHE_SIZE = 4096
+
+
+def trigrams(text: str) -> List[str]:
+    """Character trigrams of a padded, normalized name."""
+    text = re.sub(r'[/\-]', ' ', normalize_exercise_name(text))
+    padded = f"  {' '.join(text.split())} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+class ExerciseNameResolver:
+    """
+    Trigram index over the exercise catalog.
+    Maps free-text exercise names from the model onto the nearest canonical
+    catalog exercise and flags names that are too far from any of them.
+    """
+
+    def __init__(
+        self,
+        catalog: Optional[ExerciseCatalog] = None,
+        threshold: float = DEFAULT_MATCH_THRESHOLD,
+        cache_size: int = DEFAULT_CACHE_SIZE
+    ):
+        self.catalog = catalog or exercise_catalog
+        self.threshold = threshold
+        self.cache_size = cache_size
+
+        # Inverted index: trigram -> catalog IDs, plus trigram counts per ID
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._gram_counts: Dict[int, int] = {}
+        for entry in self.catalog.entries:
+            grams = set(trigrams(entry['name']))
+            self._gram_counts[entry['id']] = len(grams)
+            for gram in grams:
+                self._postings[gram].append(entry['id'])
+
+        # Least recently used names are evicted first
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def resolve(self, name: str, allowed_ids: Optional[Collection[int]] = None) -> Dict[str, Any]:
+        """
+        Resolve one name. Returns the matched catalog ID and canonical name
+        (None when out of catalog), the similarity score and an in_catalog flag.
+        With allowed_ids (a template's exercises), only those IDs count as a match.
+        """
+        result = self._resolve_cached(name)
+        if allowed_ids is None or not result['in_catalog'] or result['exercise_id'] in allowed_ids:
+            return result
+        # A catalog exercise from another environment or level: nearest template exercise instead
+        return self._nearest(name, allowed_ids)
+
+    def _resolve_cached(self, name: str) -> Dict[str, Any]:
+        key = normalize_exercise_name(name) if isinstance(name, str) else ''
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        entry = self.catalog.lookup_name(name) if key else None
+        if entry:
+            result = {'exercise_id': entry['id'], 'name': entry['name'], 'score': 1.0, 'in_catalog': True}
+        else:
+            result = self._nearest(name) if key else {
+                'exercise_id': None, 'name': None, 'score': 0.0, 'in_catalog': False
+            }
+
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def _nearest(self, name: str, allowed_ids: Optional[Collection[int]] = None) -> Dict[str, Any]:
+        """Score candidates sharing at least one trigram by Dice coefficient."""
+        grams = set(trigrams(name))
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for exercise_id in self._postings.get(gram, ()):
+                if allowed_ids is None or exercise_id in allowed_ids:
+                    shared[exercise_id] += 1
+
+        best_id, best_score = None, 0.0
+        for exercise_id, count in shared.items():
+            score = 2.0 * count / (len(grams) + self._gram_counts[exercise_id])
+            if score > best_score:
+                best_id, best_score = exercise_id, score
+
+        if best_id is None or best_score < self.threshold:
+            return {'exercise_id': None, 'name': None, 'score': round(best_score, 3), 'in_catalog': False}
+
+        entry = self.catalog.get(best_id)
+        return {'exercise_id': best_id, 'name': entry['name'], 'score': round(best_score, 3), 'in_catalog': True}
+
+
+# Global resolver instance over the global exercise catalog
+exercise_resolver = ExerciseNameResolver()
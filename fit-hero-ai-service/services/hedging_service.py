@@ -0,0 +1,145 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, Any, Callable, Awaitable, Optional
+
+from services.retry_policy_service import RetryBudget
+from services.rate_limiter_service import model_rate_limiter
+from services.priority_lane_service import lane_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Latencies kept per plan type for thresholds and percentiles
+LATENCY_SAMPLES = 200
+
+
+def model_calls_congested() -> bool:
+    """
+    True while model calls wait for a lane slot, or the rate limiter is
+    saturated or backing off after a 429 or latency spike.
+    """
+    return lane_scheduler.queued() > 0 or model_rate_limiter.concurrency.congested()
+
+
+def percentile(samples, q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class RequestHedger:
+    """
+    Hedged model requests for month-long plans. When an attempt has not
+    returned after the running `hedge_percentile` latency of its plan type,
+    an identical second attempt starts; the first attempt that returns a
+    parsed plan wins and the other is cancelled. A failed attempt does not
+    end the race while the other can still succeed. Hedges need a token
+    from their own budget (about MODEL_HEDGE_BUDGET_RATIO of calls), and no hedging
+    happens until a plan type has `min_samples` latencies. No hedge is
+    sent while `congested()` holds: a primary that is slow because it is
+    queued for a lane slot or backing off would only be joined by a second
+    call competing for the same capacity. Latencies are
+    tracked with hedging off too, so single-attempt p99 (a slightly low
+    estimate once slow primaries get cancelled) can be compared with the
+    delivered p99.
+    """
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        hedge_percentile: float = 0.9,
+        min_samples: int = 20,
+        budget: Optional[RetryBudget] = None,
+        congested: Callable[[], bool] = model_calls_congested
+    ):
+        self.enabled = enabled if enabled is not None else os.getenv('MODEL_HEDGING_ENABLED', 'false').lower() == 'true'
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.budget = budget or RetryBudget(ratio=float(os.getenv('MODEL_HEDGE_BUDGET_RATIO', '0.1')), reserve=5)
+        self.congested = congested
+        # Latency of each successful attempt from its own start, and of each call
+        self.attempts: Dict[str, deque] = {}
+        self.delivered: Dict[str, deque] = {}
+        self.counters = {'calls': 0, 'hedged': 0, 'hedge_wins': 0, 'budget_skipped': 0, 'congestion_skipped': 0}
+
+    def threshold(self, label: str) -> Optional[float]:
+        """Seconds to wait before hedging `label`; None until enough samples."""
+        samples = self.attempts.get(label)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        return percentile(samples, self.hedge_percentile)
+
+    def _record(self, series: Dict[str, deque], label: str, seconds: float):
+        series.setdefault(label, deque(maxlen=LATENCY_SAMPLES)).append(seconds)
+
+    async def run(self, attempt: Callable[[], Awaitable[Any]], label: str = "plan") -> Any:
+        """Return the first successful attempt() result, hedging a slow one if allowed."""
+        self.counters['calls'] += 1
+        self.budget.deposit()
+        started = time.monotonic()
+        threshold = self.threshold(label) if self.enabled else None
+        primary = asyncio.ensure_future(attempt())
+        tasks = {primary: started}
+        try:
+            if threshold is not None:
+                await asyncio.wait({primary}, timeout=threshold)
+                if not primary.done():
+                    if self.congested():
+                        self.counters['congestion_skipped'] += 1
+                    elif self.budget.withdraw():
+                        self.counters['hedged'] += 1
+                        logger.info(f"🪁 {label} call slower than {threshold:.1f}s; sending a hedge request")
+                        tasks[asyncio.ensure_future(attempt())] = time.monotonic()
+                    else:
+                        self.counters['budget_skipped'] += 1
+
+            pending = set(tasks)
+            first_error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        first_error = first_error or task.exception()
+                        continue
+                    now = time.monotonic()
+                    self._record(self.attempts, label, now - tasks[task])
+                    self._record(self.delivered, label, now - started)
+                    if task is not primary:
+                        self.counters['hedge_wins'] += 1
+                    return task.result()
+            raise first_error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def metrics(self) -> Dict[str, Any]:
+        plan_types = {}
+        for label, delivered in self.delivered.items():
+            p99 = percentile(delivered, 0.99)
+            p99_attempt = percentile(self.attempts.get(label), 0.99)
+            threshold = self.threshold(label)
+            plan_types[label] = {
+                "samples": len(delivered),
+                "hedge_threshold_seconds": round(threshold, 2) if threshold is not None else None,
+                "p50_seconds": round(percentile(delivered, 0.5), 2),
+                "p99_seconds": round(p99, 2),
+                "p99_single_attempt_seconds": round(p99_attempt, 2),
+                "p99_improvement_seconds": round(p99_attempt - p99, 2)
+            }
+        calls = self.counters['calls']
+        return {
+            "enabled": self.enabled,
+            "hedge_percentile": self.hedge_percentile,
+            "hedge_rate": round(self.counters['hedged'] / calls, 3) if calls else 0.0,
+            "budget_balance": round(self.budget.balance, 2),
+            **self.counters,
+            "plan_types": plan_types
+        }
+
+
+# Global hedger for month-long plan generation
+model_hedger = RequestHedger()
@@ -0,0 +1,330 @@
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from services.dietary_constraint_service import (
+    DietaryConstraintScanner, dietary_scanner, ALLERGEN_TERMS, DIET_TERMS, normalize_text
+)
+from services.nutrition_engine_service import (
+    MACROS, KCAL_PER_GRAM, CALORIE_CONSISTENCY_TOLERANCE, parse_amount
+)
+from services.serialization_service import loads
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIBRARY_PATH = os.getenv(
+    'MEAL_LIBRARY_PATH',
+    os.path.join(os.path.dirname(__file__), "../data/meal_library.json")
+)
+
+MAIN_SLOTS = ['breakfast', 'lunch', 'dinner']
+LIBRARY_SLOTS = MAIN_SLOTS + ['snacks']
+CONSTRAINT_KEYS = list(ALLERGEN_TERMS) + list(DIET_TERMS)
+
+# Calorie bounds for a library entry, per slot
+CALORIE_BOUNDS = {'breakfast': (150, 1200), 'lunch': (200, 1500), 'dinner': (200, 1500), 'snacks': (50, 500)}
+
+# Assembly tuning
+MAIN_MEAL_SHARE = 0.9          # main meals aim for this share of the day; snacks fill the rest
+MAX_CANDIDATES_PER_SLOT = 40   # caps the breakfast x lunch x dinner grid at 64k combinations
+MIN_OPTIONS_PER_SLOT = 7       # eligible main meals needed per slot before assembling
+MIN_REPEAT_GAP = 7             # days before the same main meal may appear again
+MAX_SNACKS_PER_DAY = 2
+SCORE_WEIGHTS = np.array([2.0, 1.0, 0.5, 0.5], dtype=np.float32)
+
+
+class MealLibrary:
+    """
+    Validated, tagged meals stored on disk and compiled into per-slot arrays.
+    Each entry carries numeric macros, prep time and the dietary constraints
+    it conflicts with (as tagged by DietaryConstraintScanner), so eligibility
+    for a user is one bitmask test per slot.
+    """
+
+    def __init__(self, path: Optional[str] = None, scanner: Optional[DietaryConstraintScanner] = None):
+        self.path = path or DEFAULT_LIBRARY_PATH
+        self.scanner = scanner or dietary_scanner
+        self.meals: Dict[str, List[Dict[str, Any]]] = {slot: [] for slot in LIBRARY_SLOTS}
+        self.version = None
+        self._constraint_bits = {key: 1 << i for i, key in enumerate(CONSTRAINT_KEYS)}
+        self._load()
+
+    def _load(self):
+        """Load the library file if it exists; an empty library is valid."""
+        try:
+            with open(self.path, 'rb') as f:
+                data = loads(f.read())
+        except FileNotFoundError:
+            logger.info(f"Meal library not found at {self.path}, starting empty")
+            data = {}
+        except json.JSONDecodeError as e:
+            logger.warning(f"Meal library at {self.path} is not valid JSON: {e}")
+            data = {}
+
+        for slot in LIBRARY_SLOTS:
+            self.meals[slot] = [m for m in data.get('meals', {}).get(slot, []) if isinstance(m, dict)]
+        self.version = data.get('version')
+        self._compile()
+
+    def save(self, path: Optional[str] = None):
+        """Write the library with a content version for cache invalidation."""
+        path = path or self.path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        payload = {'meals': self.meals}
+        self.version = hashlib.sha1(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+        payload.update({'version': self.version, 'generated_at': datetime.now().isoformat()})
+        with open(path, 'w') as f:
+            json.dump(payload, f, indent=1)
+        logger.info(f"📚 Meal library saved to {path}: {self.stats()}")
+
+    def add_meals(self, slot: str, meals: List[Dict[str, Any]], source: str = "generated") -> int:
+        """
+        Validate, deduplicate and tag meals for a slot. Returns how many were added.
+        Meals are rejected when the name is empty, calories are out of bounds
+        or the stated calories disagree with 4/4/9 x macros.
+        """
+        if slot not in self.meals:
+            raise ValueError(f"Unknown meal slot: {slot}")
+
+        known = {normalize_text(m['name']) for m in self.meals[slot]}
+        low, high = CALORIE_BOUNDS[slot]
+        added = []
+        for meal in meals:
+            entry = self._normalize_entry(meal, source)
+            if entry is None or not low <= entry['calories'] <= high:
+                continue
+            key = normalize_text(entry['name'])
+            if key in known:
+                continue
+            known.add(key)
+            added.append(entry)
+
+        self._tag(added)
+        self.meals[slot].extend(added)
+        self._compile()
+        return len(added)
+
+    def _normalize_entry(self, meal: Dict[str, Any], source: str) -> Optional[Dict[str, Any]]:
+        """Turn a model or plan meal into a library entry, or None if it is unusable."""
+        if not isinstance(meal, dict):
+            return None
+        name = str(meal.get('name', '')).strip()
+        if not name:
+            return None
+
+        calories, protein, carbs, fat = (parse_amount(meal.get(m)) for m in MACROS)
+        macro_calories = protein * KCAL_PER_GRAM[0] + carbs * KCAL_PER_GRAM[1] + fat * KCAL_PER_GRAM[2]
+        if macro_calories > 0 and abs(calories - macro_calories) / max(calories, macro_calories) > CALORIE_CONSISTENCY_TOLERANCE:
+            return None
+
+        instructions = meal.get('instructions', [])
+        if isinstance(instructions, str):
+            instructions = [instructions]
+        return {
+            'name': name,
+            'calories': int(round(calories)),
+            'protein': int(round(protein)),
+            'carbs': int(round(carbs)),
+            'fat': int(round(fat)),
+            'prep_time': int(parse_amount(meal.get('prep_time'))),
+            'ingredients': [str(i).strip() for i in meal.get('ingredients', []) or [] if str(i).strip()],
+            'instructions': [str(i).strip() for i in instructions or [] if str(i).strip()],
+            'source': source
+        }
+
+    def _tag(self, entries: List[Dict[str, Any]]):
+        """Tag entries with every constraint they conflict with, in one scanner pass."""
+        as_plan = {str(i): {'breakfast': entry} for i, entry in enumerate(entries)}
+        conflicts: Dict[str, set] = {str(i): set() for i in range(len(entries))}
+        for violation in self.scanner.scan_meal_plan(as_plan, CONSTRAINT_KEYS, []):
+            conflicts[violation['day']].add(violation['constraint'])
+        for i, entry in enumerate(entries):
+            entry['conflicts'] = sorted(conflicts[str(i)])
+
+    def retag(self):
+        """Re-run tagging after the scanner vocabulary changes."""
+        for slot in LIBRARY_SLOTS:
+            self._tag(self.meals[slot])
+        self._compile()
+
+    def _compile(self):
+        """Build per-slot macro, prep-time and conflict-bitmask arrays."""
+        self.macros: Dict[str, np.ndarray] = {}
+        self.prep_times: Dict[str, np.ndarray] = {}
+        self.conflict_masks: Dict[str, np.ndarray] = {}
+        for slot, entries in self.meals.items():
+            self.macros[slot] = np.array(
+                [[m.get(key, 0) for key in MACROS] for m in entries], dtype=np.float32
+            ).reshape(len(entries), len(MACROS))
+            self.prep_times[slot] = np.array([m.get('prep_time', 0) for m in entries], dtype=np.int32)
+            self.conflict_masks[slot] = np.array(
+                [self.constraint_mask(m.get('conflicts', [])) for m in entries], dtype=np.int64
+            )
+
+    def constraint_mask(self, constraints) -> int:
+        """Bitmask for a collection of constraint keys."""
+        mask = 0
+        for constraint in constraints:
+            mask |= self._constraint_bits.get(constraint, 0)
+        return mask
+
+    def eligible(self, slot: str, constraints, max_prep_time: Optional[int] = None) -> np.ndarray:
+        """Indices of meals in a slot that conflict with none of the constraints."""
+        ok = (self.conflict_masks[slot] & self.constraint_mask(constraints)) == 0
+        if max_prep_time:
+            ok &= self.prep_times[slot] <= max_prep_time
+        return np.flatnonzero(ok)
+
+    def stats(self) -> Dict[str, int]:
+        return {slot: len(entries) for slot, entries in self.meals.items()}
+
+
+class MonthMealAssembler:
+    """
+    Builds a month of daily_meals from the meal library instead of the model.
+    Main meals: every breakfast x lunch x dinner combination of the eligible
+    candidates is scored against the daily targets once. Each day then takes
+    the best-scoring combination whose meals are still under their monthly
+    use cap and were not served in the last MIN_REPEAT_GAP days. Snacks
+    close the remaining gap to the targets.
+    """
+
+    def __init__(self, library: Optional[MealLibrary] = None):
+        self.library = library or MealLibrary()
+
+    def assemble(
+        self,
+        days_in_month: int,
+        targets: Dict[str, float],
+        allergies: Optional[List[str]] = None,
+        dietary_preferences: Optional[List[str]] = None,
+        max_prep_time: Optional[int] = None,
+        seed: Optional[str] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Return a schema-compatible daily_meals mapping for the month.
+        Raises ValueError when an allergy or preference is not a known
+        constraint (library meals could not be checked against it) or the
+        library does not hold enough eligible meals.
+        """
+        unresolved = self.library.scanner.unresolved_constraints(allergies, dietary_preferences)
+        if unresolved:
+            raise ValueError(f"Unknown allergies or dietary preferences: {', '.join(map(str, unresolved))}")
+        constraints = self.library.scanner.resolve_constraints(allergies, dietary_preferences)
+        rng = np.random.default_rng(int(hashlib.md5(str(seed).encode('utf-8')).hexdigest()[:8], 16))
+        target = np.array([float(targets.get(m, 0)) for m in MACROS], dtype=np.float32)
+        target = np.maximum(target, 1.0)
+
+        candidates = {}
+        for slot in MAIN_SLOTS:
+            indices = self.library.eligible(slot, constraints, max_prep_time)
+            if len(indices) < MIN_OPTIONS_PER_SLOT:
+                raise ValueError(
+                    f"Meal library has {len(indices)} eligible {slot} options, need {MIN_OPTIONS_PER_SLOT}"
+                )
+            if len(indices) > MAX_CANDIDATES_PER_SLOT:
+                indices = rng.choice(indices, MAX_CANDIDATES_PER_SLOT, replace=False)
+            candidates[slot] = indices
+        snacks = self.library.eligible('snacks', constraints, max_prep_time)
+
+        scores = self._score_combinations(candidates, target * MAIN_MEAL_SHARE)
+        grid = scores.shape
+
+        # Spread meals evenly: each may be used ceil(days / options) times a month
+        gaps = {slot: min(MIN_REPEAT_GAP, len(candidates[slot]) - 1) for slot in MAIN_SLOTS}
+        max_uses = {slot: -(-days_in_month // len(candidates[slot])) for slot in MAIN_SLOTS}
+        last_used = {slot: np.full(len(candidates[slot]), -days_in_month, dtype=np.int32) for slot in MAIN_SLOTS}
+        uses = {slot: np.zeros(len(candidates[slot]), dtype=np.int32) for slot in MAIN_SLOTS}
+        last_snack = np.full(len(snacks), -2, dtype=np.int32)
+
+        daily_meals = {}
+        for day in range(days_in_month):
+            allowed = {
+                slot: (day - last_used[slot] >= gaps[slot]) & (uses[slot] < max_uses[slot])
+                for slot in MAIN_SLOTS
+            }
+            mask = allowed['breakfast'][:, None, None] & allowed['lunch'][None, :, None] & allowed['dinner'][None, None, :]
+            best = int(np.argmin(np.where(mask, scores, np.inf))) if mask.any() else int(np.argmin(scores))
+            picked = dict(zip(MAIN_SLOTS, (int(i) for i in np.unravel_index(best, grid))))
+            for slot, local in picked.items():
+                last_used[slot][local] = day
+                uses[slot][local] += 1
+
+            day_data = {slot: self._meal_output(slot, candidates[slot][local]) for slot, local in picked.items()}
+            main_totals = sum(self.library.macros[slot][candidates[slot][local]] for slot, local in picked.items())
+            snack_picks = self._pick_snacks(snacks, target - main_totals, day - last_snack >= 2)
+            for local in snack_picks:
+                last_snack[local] = day
+            day_data['snacks'] = [self._snack_output(snacks[local]) for local in snack_picks]
+            daily_meals[str(day + 1)] = day_data
+
+        return daily_meals
+
+    def _score_combinations(self, candidates: Dict[str, np.ndarray], target: np.ndarray) -> np.ndarray:
+        """Weighted relative deviation from the target for every (b, l, d) combination."""
+        macros = {slot: self.library.macros[slot][candidates[slot]] for slot in MAIN_SLOTS}
+        totals = (
+            macros['breakfast'][:, None, None, :]
+            + macros['lunch'][None, :, None, :]
+            + macros['dinner'][None, None, :, :]
+        )
+        return (np.abs(totals - target) / target * SCORE_WEIGHTS).sum(axis=-1)
+
+    def _pick_snacks(self, snacks: np.ndarray, remaining: np.ndarray, available: np.ndarray) -> List[int]:
+        """Choose up to MAX_SNACKS_PER_DAY snacks (by local index) that best close the gap."""
+        if not len(snacks) or remaining[0] <= 0:
+            return []
+        usable = np.flatnonzero(available) if available.any() else np.arange(len(snacks))
+        macros = self.library.macros['snacks'][snacks[usable]]
+
+        # Options: no snack, each single snack, and (optionally) each pair
+        options = [np.zeros((1, len(MACROS)), dtype=np.float32), macros]
+        first, second = np.triu_indices(len(usable), 1)
+        if MAX_SNACKS_PER_DAY > 1:
+            options.append(macros[first] + macros[second])
+        sums = np.concatenate(options)
+
+        deviation = (np.abs(sums - remaining) / np.maximum(np.abs(remaining), 1.0) * SCORE_WEIGHTS).sum(axis=1)
+        best = int(np.argmin(deviation))
+        if best == 0:
+            return []
+        if best <= len(usable):
+            return [int(usable[best - 1])]
+        pair = best - 1 - len(usable)
+        return [int(usable[first[pair]]), int(usable[second[pair]])]
+
+    def _meal_output(self, slot: str, index: int) -> Dict[str, Any]:
+        """Library entry in the filtered meal schema."""
+        entry = self.library.meals[slot][index]
+        return {
+            'name': entry['name'],
+            'calories': entry['calories'],
+            'protein': f"{entry['protein']}g",
+            'carbs': f"{entry['carbs']}g",
+            'fat': f"{entry['fat']}g",
+            'prep_time': str(entry.get('prep_time', 10)),
+            'ingredients': list(entry.get('ingredients', [])),
+            'instructions': list(entry.get('instructions', [])),
+            'meal_prep_notes': ''
+        }
+
+    def _snack_output(self, index: int) -> Dict[str, Any]:
+        entry = self.library.meals['snacks'][index]
+        return {
+            'name': entry['name'],
+            'calories': entry['calories'],
+            'protein': f"{entry['protein']}g",
+            'carbs': f"{entry['carbs']}g",
+            'fat': f"{entry['fat']}g",
+            'ingredients': list(entry.get('ingredients', []))
+        }
+
+
+# Global library and assembler, loaded once at startup
+meal_library = MealLibrary()
+meal_assembler = MonthMealAssembler(meal_library)
@@ -7,6 +7,78 @@ import calendar
 from datetime import datetime, timedelta
 from services.standardized_template_service import StandardizedTemplateService
 from services.webhook_service import webhook_service
+from services.plan_derivation_service import PlanDerivationService
+from services.compact_schema_service import CompactSchemaService
+from services.exercise_catalog_service import exercise_catalog
+from services.periodization_service import PeriodizationEngine
+from services.meal_library_service import meal_assembler
+from services.rolling_plan_service import rolling_planner
+from services.plan_delta_service import workout_delta, DELTA_FORMAT
+from services.rate_limiter_service import model_rate_limiter
+from services.priority_lane_service import lane_scheduler
+from services.retry_policy_service import model_retry_policy, check_response, classify_error
+from services.hedging_service import model_hedger
+
+# Regular (verbose) daily schemas used in the prompt RETURN FORMAT
+DAILY_WORKOUTS_FORMAT = """"daily_workouts": {
+                "1": {
+                    "workout_type": "Upper Body | Lower Body | Full Body | Cardio | Rest",
+                    "duration": "number",
+                    "intensity": "Low | Moderate | High",
+                    "exercises": [
+                        {
+                            "exercise_id": "number from EXERCISE CATALOG",
+                            "notes": "Form cues or modifications from template"
+                        }
+                    ],
+                    "warm_up": ["warm_up_exercise_1", "warm_up_exercise_2"],
+                    "cool_down": ["cool_down_exercise_1", "cool_down_exercise_2"]
+                }
+            }"""
+
+DAILY_MEALS_FORMAT = """"daily_meals": {
+                "1": {
+                    "meals": {
+                        "breakfast": {
+                            "name": "Meal name from template",
+                            "calories": "number",
+                            "protein": "number",
+                            "carbs": "number",
+                            "fat": "number",
+                            "ingredients": ["150g ingredient1", "1 cup ingredient2"],
+                            "prep_time": "number",
+                            "instructions": "Brief cooking instructions"
+                        },
+                        "lunch": {
+                            "name": "Meal name from template",
+                            "calories": "number",
+                            "protein": "number",
+                            "carbs": "number",
+                            "fat": "number",
+                            "ingredients": ["150g ingredient1", "1 cup ingredient2"],
+                            "prep_time": "number",
+                            "instructions": "Brief cooking instructions"
+                        },
+                        "dinner": {
+                            "name": "Meal name from template",
+                            "calories": "number",
+                            "protein": "number",
+                            "carbs": "number",
+                            "fat": "number",
+                            "ingredients": ["150g ingredient1", "1 cup ingredient2"],
+                            "prep_time": "number",
+                            "instructions": "Brief cooking instructions"
+                        },
+                        "snacks": [
+                            {
+                                "name": "Snack from template",
+                                "calories": "number",
+                                "timing": "morning/afternoon/evening"
+                            }
+                        ]
+                    }
+                }
+            }"""
 
 class MonthlyPlanService:
     def __init__(self):
@@ -21,6 +93,15 @@ class MonthlyPlanService:
         
         # Initialize template service
         self.template_service = StandardizedTemplateService()
+        
+        # Derived fields (counts, dates, totals) are computed server-side
+        self.derivation_service = PlanDerivationService()
+        
+        # Optional compact wire schema for model output
+        self.compact_schema = CompactSchemaService()
+        
+        # Weekly structure and sets/reps/rest are computed, not generated
+        self.periodization = PeriodizationEngine(self.template_service)
 
     async def generate_monthly_workout_plan(
         self,
@@ -34,8 +115,18 @@ class MonthlyPlanService:
         age: int = 30,
         weight: float = 75.0,
         injuries_limitations: Optional[List[str]] = None,
-        preferred_activities: Optional[List[str]] = None
+        preferred_activities: Optional[List[str]] = None,
+        compact_output: bool = False,
+        through_day: Optional[int] = None,
+        previous_plan: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
+        """
+        Generate the month's workout plan. With through_day (rolling mode),
+        only days 1..through_day are generated; later weeks come from
+        regenerate_workout_days as the month goes on. With previous_plan,
+        only the changes to last month's weekly sessions are generated
+        (services/plan_delta_service.py).
+        """
         
         # Get number of days in the month
         days_in_month = calendar.monthrange(year, month)[1]
@@ -59,120 +150,125 @@ class MonthlyPlanService:
             session_duration=available_time
         )
         
+        # Exercises go into the prompt as a compact id table instead of JSON
+        exercise_table = exercise_catalog.prompt_table(workout_plan.get('exercises', {}))
+        template_context = {
+            k: v for k, v in workout_plan.items() if k not in ('exercises', 'execution_defaults')
+        }
+        periodization = self.periodization.build(fitness_level, days_in_month)
+        
+        # Daily schema: verbose objects or the compact positional wire format
+        if compact_output:
+            daily_workouts_format = self.compact_schema.workout_prompt_format()
+        else:
+            daily_workouts_format = DAILY_WORKOUTS_FORMAT
+        
+        # Month-over-month mode: only the changes to last month's weekly sessions are requested
+        delta_summary = workout_delta.summarize(previous_plan) if previous_plan else None
+        
         # Create prompt for Google AI
-        prompt = f"""
-        You are an expert fitness coach. Create a comprehensive monthly workout plan for {month_name} {year} using the provided template structure:
+        if delta_summary is not None:
+            prompt = f"""
+            You are an expert fitness coach. Progress last month's workout plan into {month_name} {year}.
+            
+            USER PROFILE:
+            - Age: {age}
+            - Weight: {weight}kg
+            - Fitness Level: {fitness_level}
+            - Goals: {', '.join(goals)}
+            - Available Time per Session: {available_time} minutes
+            - Available Equipment: {', '.join(equipment)}
+            - Injuries/Limitations: {injuries_limitations or 'None'}
+            
+            LAST MONTH, ONE SESSION PER WEEKDAY (weekday: type, intensity, duration [exercise ids]):
+            {workout_delta.prompt_lines(delta_summary)}
+            
+            EXERCISE CATALOG (id: exercise):
+            {exercise_table}
+            
+            PERIODIZATION (fixed by the server, same for every month):
+            {self.periodization.prompt_summary(periodization)}
+            
+            Apply progressive overload from last month: harder variations, new stimulus where
+            exercises have stalled, and changes for any new injuries or goals. Return ONLY what changes:
+            weekdays whose session changes, and exercise swaps applied to every day.
+            
+            RETURN FORMAT - STRICT JSON ONLY:
+            {DELTA_FORMAT}
+            
+            IMPORTANT:
+            1. Use ONLY exercises from the EXERCISE CATALOG, referenced by exercise_id
+            2. Leave out weekdays and fields that stay the same
+            3. Return ONLY valid JSON with double quotes and no comments or trailing commas
+            """
+        else:
+            prompt = f"""
+            You are an expert fitness coach. Create a comprehensive monthly workout plan for {month_name} {year} using the provided template structure:
         
-        USER PROFILE:
-        - User ID: {user_id}
-        - Age: {age}
-        - Weight: {weight}kg
-        - Fitness Level: {fitness_level}
-        - Goals: {', '.join(goals)}
-        - Available Time per Session: {available_time} minutes
-        - Available Equipment: {', '.join(equipment)}
-        - Injuries/Limitations: {injuries_limitations or 'None'}
-        - Preferred Activities: {preferred_activities or 'No specific preferences'}
+            USER PROFILE:
+            - User ID: {user_id}
+            - Age: {age}
+            - Weight: {weight}kg
+            - Fitness Level: {fitness_level}
+            - Goals: {', '.join(goals)}
+            - Available Time per Session: {available_time} minutes
+            - Available Equipment: {', '.join(equipment)}
+            - Injuries/Limitations: {injuries_limitations or 'None'}
+            - Preferred Activities: {preferred_activities or 'No specific preferences'}
         
-        TEMPLATE CONTEXT:
-        {json.dumps(workout_plan, indent=2)}
+            TEMPLATE CONTEXT:
+            {json.dumps(template_context, indent=2)}
         
-        MONTHLY REQUIREMENTS:
-        - Month: {month_name} {year} ({days_in_month} days)
-        - Create a complete day-by-day workout schedule
-        - Use the exercises and structure from the template above
-        - Include progressive overload throughout the month based on template progression
-        - Plan proper rest and recovery days according to age considerations
-        - Vary workout types to prevent boredom
-        - Consider weekly micro-cycles within the monthly plan
+            EXERCISE CATALOG (id: exercise):
+            {exercise_table}
         
-        RETURN FORMAT - STRICT JSON ONLY:
-        {{
-            "monthly_overview": {{
-                "month": {month},
-                "year": {year},
-                "total_days": {days_in_month},
-                "workout_days": "number",
-                "rest_days": "number",
-                "training_phases": ["week1_focus", "week2_focus", "week3_focus", "week4_focus"]
-            }},
-            "weekly_structure": {{
-                "week_1": {{
-                    "focus": "Foundation/Adaptation",
-                    "intensity": "Low-Moderate",
-                    "volume": "Moderate"
-                }},
-                "week_2": {{
-                    "focus": "Progressive Overload",
-                    "intensity": "Moderate",
-                    "volume": "Moderate-High"
-                }},
-                "week_3": {{
-                    "focus": "Peak Training",
-                    "intensity": "Moderate-High",
-                    "volume": "High"
+            PERIODIZATION (fixed by the server):
+            {self.periodization.prompt_summary(periodization)}
+        
+            MONTHLY REQUIREMENTS:
+            - Month: {month_name} {year} ({days_in_month} days)
+            - {f"Create the day-by-day workout schedule for days 1-{through_day} only; later weeks are generated separately" if through_day else "Create a complete day-by-day workout schedule"}
+            - Use the exercises and structure from the template above
+            - Match each week's session count and workout intensity to the PERIODIZATION above
+            - Plan proper rest and recovery days according to age considerations
+            - Vary workout types to prevent boredom
+            - Consider weekly micro-cycles within the monthly plan
+        
+            RETURN FORMAT - STRICT JSON ONLY:
+            {{
+                "monthly_overview": {{
+                    "month": {month},
+                    "year": {year}
                 }},
-                "week_4": {{
-                    "focus": "Recovery/Deload",
-                    "intensity": "Low-Moderate",
-                    "volume": "Low-Moderate"
-                }}
-            }},
-            "daily_workouts": {{
-                "1": {{
-                    "day_of_week": "day_name",
-                    "workout_type": "Upper Body | Lower Body | Full Body | Cardio | Rest",
-                    "duration": "number",
-                    "intensity": "Low | Moderate | High",
-                    "exercises": [
-                        {{
-                            "name": "Exercise Name (from template)",
-                            "type": "strength | cardio | flexibility",
-                            "sets": "number",
-                            "reps": "number or range",
-                            "rest_time": "seconds",
-                            "notes": "Form cues or modifications from template",
-                            "progression": "How to advance this exercise"
-                        }}
-                    ],
-                    "warm_up": ["warm_up_exercise_1", "warm_up_exercise_2"],
-                    "cool_down": ["cool_down_exercise_1", "cool_down_exercise_2"]
+                {daily_workouts_format},
+                "safety_guidelines": [
+                    "Important safety consideration 1",
+                    "Important safety consideration 2"
+                ],
+                "template_context": {{
+                    "user_profile": {json.dumps(workout_plan.get('user_profile', {}))},
+                    "age_considerations": {json.dumps(workout_plan.get('age_considerations', {}))},
+                    "objective_modifications": {json.dumps(workout_plan.get('objective_modifications', {}))}
                 }}
-            }},
-            "progression_plan": {{
-                "week_1_adjustments": "What to focus on in week 1",
-                "week_2_adjustments": "How to progress in week 2",
-                "week_3_adjustments": "Peak training adjustments",
-                "week_4_adjustments": "Recovery week modifications"
-            }},
-            "safety_guidelines": [
-                "Important safety consideration 1",
-                "Important safety consideration 2"
-            ],
-            "template_context": {{
-                "user_profile": {json.dumps(workout_plan.get('user_profile', {}))},
-                "age_considerations": {json.dumps(workout_plan.get('age_considerations', {}))},
-                "objective_modifications": {json.dumps(workout_plan.get('objective_modifications', {}))}
             }}
-        }}
         
-        IMPORTANT:
-        1. Use ONLY exercises from the provided template
-        2. Follow the workout structure guidelines from the template
-        3. Apply age-specific considerations from the template
-        4. Include objective-specific modifications from the template
-        5. Return ONLY valid JSON - no additional text, explanations, markdown, or code blocks
-        6. Ensure all property names are enclosed in double quotes
-        7. Use double quotes for all string values, never single quotes
-        8. Do NOT include trailing commas before closing brackets or braces
-        9. Do NOT include comments in the JSON
-        10. The response must start with {{ and end with }}
-        """
+            IMPORTANT:
+            1. Use ONLY exercises from the EXERCISE CATALOG, referenced by exercise_id
+            2. Follow the workout structure guidelines from the template
+            3. Apply age-specific considerations from the template
+            4. Include objective-specific modifications from the template
+            5. Return ONLY valid JSON - no additional text, explanations, markdown, or code blocks
+            6. Ensure all property names are enclosed in double quotes
+            7. Use double quotes for all string values, never single quotes
+            8. Do NOT include trailing commas before closing brackets or braces
+            9. Do NOT include comments in the JSON
+            10. The response must start with {{ and end with }}
+            11. Do NOT add fields that are not in the format above (dates, day names, counts, totals, sets, reps, rest times and progression are computed by the server)
+            """
         
         try:
-            # Generate content using Google AI
-            response = self.model.generate_content(prompt)
-            result_text = response.text
+            # Generate content using Google AI (hedged: the first response that parses wins)
+            result_text, workout_plan_data = await self._generate_hedged(prompt, label="workout plan")
             
             # Log raw AI response for debugging
             import logging
@@ -182,13 +278,13 @@ class MonthlyPlanService:
             if len(result_text) > 1000:
                 logger.info(f"🏋️ Raw AI Response (last 500 chars): {repr(result_text[-500:])}")
             
-            # Clean up the response (remove markdown formatting if present)
-            if result_text.startswith('```json'):
-                result_text = result_text.replace('```json', '').replace('```', '').strip()
-                logger.info("🧹 Cleaned markdown formatting from AI workout response")
-            
-            # Use robust JSON parsing with multiple fallback strategies
-            workout_plan_data = self._robust_json_parse(result_text)
+            if delta_summary is not None:
+                workout_plan_data = workout_delta.apply(delta_summary, workout_plan_data, month, year)
+            elif compact_output:
+                workout_plan_data = self.compact_schema.expand_workout_plan(workout_plan_data)
+            workout_plan_data = self.periodization.apply(workout_plan_data, fitness_level, days_in_month)
+            if through_day:
+                workout_plan_data = rolling_planner.limit(workout_plan_data, 'daily_workouts', through_day)
             
             # Send webhook notification for successful generation
             await webhook_service.notify_workout_plan_generated(
@@ -196,7 +292,9 @@ class MonthlyPlanService:
                 plan_data={
                     'month': month,
                     'year': year,
-                    'workout_days': workout_plan_data.get('monthly_overview', {}).get('workout_days', 'unknown'),
+                    'workout_days': self.derivation_service.count_workout_days(
+                        workout_plan_data.get('daily_workouts', {})
+                    ),
                     'plan_id': f"{user_id}_{month}_{year}_workout",
                     'success': True
                 }
@@ -206,9 +304,14 @@ class MonthlyPlanService:
                 "success": True,
                 "workout_plan": workout_plan_data,
                 "template_used": workout_plan.get('user_profile', {}),
+                "template_exercise_ids": exercise_catalog.template_ids(workout_plan.get('exercises', {})),
+                "generation_mode": "delta" if delta_summary is not None else "full",
                 "generation_timestamp": datetime.now().isoformat()
             }
         except json.JSONDecodeError as e:
+            # The text that failed to parse (every hedged attempt failed)
+            result_text = e.doc
+            
             # Enhanced error reporting for JSON parsing issues
             error_line = e.lineno if hasattr(e, 'lineno') else "unknown"
             error_col = e.colno if hasattr(e, 'colno') else "unknown"
@@ -235,7 +338,8 @@ class MonthlyPlanService:
         except Exception as e:
             return {
                 "success": False,
-                "error": f"Generation error: {str(e)}"
+                "error": f"Generation error: {str(e)}",
+                "error_kind": classify_error(e)
             }
 
     async def generate_monthly_meal_plan(
@@ -251,8 +355,16 @@ class MonthlyPlanService:
         allergies: Optional[List[str]] = None,
         calorie_target: Optional[int] = None,
         meal_prep_time: Optional[int] = None,
-        budget_range: Optional[str] = None
+        budget_range: Optional[str] = None,
+        compact_output: bool = False,
+        use_meal_library: bool = False,
+        through_day: Optional[int] = None
     ) -> Dict[str, Any]:
+        """
+        Generate the month's meal plan. With through_day (rolling mode), only
+        days 1..through_day are generated by the model; later weeks come from
+        regenerate_meal_days. Library plans are always assembled in full.
+        """
         
         # Get number of days in the month
         days_in_month = calendar.monthrange(year, month)[1]
@@ -265,12 +377,48 @@ class MonthlyPlanService:
             "objectives": goals,
             "activity_level": activity_level,
             "dietary_preferences": dietary_preferences,
-            "allergies": allergies or []
+            "allergies": allergies or [],
+            "calorie_target": calorie_target
         }
         
         meal_plan = self.template_service.get_meal_plan(
             user_profile=user_profile
         )
+        targets = meal_plan['nutrition_targets']
+        
+        # Assemble from the pre-generated meal library when possible
+        if use_meal_library:
+            try:
+                meal_plan_data = self._assemble_from_library(
+                    user_id, month, year, days_in_month, targets,
+                    allergies, dietary_preferences, meal_prep_time
+                )
+                await webhook_service.notify_meal_plan_generated(
+                    player_id=user_id,
+                    plan_data={
+                        'month': month,
+                        'year': year,
+                        'daily_calories': targets['daily_calories'],
+                        'plan_id': f"{user_id}_{month}_{year}_meal",
+                        'success': True
+                    }
+                )
+                return {
+                    "success": True,
+                    "meal_plan": meal_plan_data,
+                    "source": "meal_library",
+                    "library_version": meal_assembler.library.version,
+                    "generation_timestamp": datetime.now().isoformat()
+                }
+            except ValueError as e:
+                import logging
+                logging.getLogger(__name__).info(f"📚 Meal library unavailable for {user_id}, using AI: {e}")
+        
+        # Daily schema: verbose objects or the compact positional wire format
+        if compact_output:
+            daily_meals_format = self.compact_schema.meal_prompt_format()
+        else:
+            daily_meals_format = DAILY_MEALS_FORMAT
         
         # Create prompt for Google AI
         prompt = f"""
@@ -284,7 +432,7 @@ class MonthlyPlanService:
         - Activity Level: {activity_level}
         - Dietary Preferences: {', '.join(dietary_preferences)}
         - Allergies: {allergies or 'None'}
-        - Calorie Target: {calorie_target or 'Auto-calculated'}
+        - Daily Targets: {targets['daily_calories']} kcal, {targets['protein_grams']}g protein, {targets['carbs_grams']}g carbs, {targets['fat_grams']}g fat
         - Meal Prep Time: {meal_prep_time or 'Flexible'} minutes
         - Budget Range: {budget_range or 'Moderate'}
         
@@ -293,101 +441,39 @@ class MonthlyPlanService:
         
         MONTHLY REQUIREMENTS:
         - Month: {month_name} {year} ({days_in_month} days)
-        - Create complete daily meal plans for all {days_in_month} days
+        - {f"Create daily meal plans for days 1-{through_day} only; later weeks are generated separately" if through_day else f"Create complete daily meal plans for all {days_in_month} days"}
         - Use nutrition targets and meal options from the template above
         - Include variety to prevent dietary boredom
         - Consider seasonal ingredients for {month_name}
         - Include meal prep suggestions for efficiency
-        - Plan weekly grocery lists
+        - Give each ingredient with its quantity for one serving (e.g. "150g chicken breast"); shopping lists are built from them
         
         RETURN FORMAT - STRICT JSON ONLY:
         {{
             "monthly_overview": {{
                 "month": {month},
                 "year": {year},
-                "total_days": {days_in_month},
-                "nutrition_targets": {{
-                    "daily_calories": "from template",
-                    "protein_grams": "number",
-                    "carbs_grams": "number",
-                    "fat_grams": "number"
-                }},
                 "meal_themes": ["week1_theme", "week2_theme", "week3_theme", "week4_theme"]
             }},
             "weekly_meal_prep": {{
                 "week_1": {{
                     "prep_focus": "Basic meal prep introduction",
-                    "batch_cook_items": ["item1", "item2"],
-                    "shopping_list": ["ingredient1", "ingredient2"]
+                    "batch_cook_items": ["item1", "item2"]
                 }},
                 "week_2": {{
                     "prep_focus": "Protein prep and snack planning",
-                    "batch_cook_items": ["item1", "item2"],
-                    "shopping_list": ["ingredient1", "ingredient2"]
+                    "batch_cook_items": ["item1", "item2"]
                 }},
                 "week_3": {{
                     "prep_focus": "Advanced meal combinations",
-                    "batch_cook_items": ["item1", "item2"],
-                    "shopping_list": ["ingredient1", "ingredient2"]
+                    "batch_cook_items": ["item1", "item2"]
                 }},
                 "week_4": {{
                     "prep_focus": "Sustainable long-term habits",
-                    "batch_cook_items": ["item1", "item2"],
-                    "shopping_list": ["ingredient1", "ingredient2"]
-                }}
-            }},
-            "daily_meals": {{
-                "1": {{
-                    "date": "YYYY-MM-DD",
-                    "day_of_week": "day_name",
-                    "meals": {{
-                        "breakfast": {{
-                            "name": "Meal name from template",
-                            "calories": "number",
-                            "protein": "number",
-                            "carbs": "number",
-                            "fat": "number",
-                            "ingredients": ["ingredient1", "ingredient2"],
-                            "prep_time": "number",
-                            "instructions": "Brief cooking instructions"
-                        }},
-                        "lunch": {{
-                            "name": "Meal name from template",
-                            "calories": "number",
-                            "protein": "number",
-                            "carbs": "number",
-                            "fat": "number",
-                            "ingredients": ["ingredient1", "ingredient2"],
-                            "prep_time": "number",
-                            "instructions": "Brief cooking instructions"
-                        }},
-                        "dinner": {{
-                            "name": "Meal name from template",
-                            "calories": "number",
-                            "protein": "number",
-                            "carbs": "number",
-                            "fat": "number",
-                            "ingredients": ["ingredient1", "ingredient2"],
-                            "prep_time": "number",
-                            "instructions": "Brief cooking instructions"
-                        }},
-                        "snacks": [
-                            {{
-                                "name": "Snack from template",
-                                "calories": "number",
-                                "timing": "morning/afternoon/evening"
-                            }}
-                        ]
-                    }},
-                    "daily_totals": {{
-                        "calories": "number",
-                        "protein": "number",
-                        "carbs": "number",
-                        "fat": "number",
-                        "water_glasses": "number"
-                    }}
+                    "batch_cook_items": ["item1", "item2"]
                 }}
             }},
+            {daily_meals_format},
             "nutrition_education": {{
                 "weekly_tips": [
                     "Week 1 nutrition tip based on template",
@@ -407,7 +493,7 @@ class MonthlyPlanService:
         
         IMPORTANT:
         1. Use ONLY meal options from the provided template
-        2. Follow nutrition targets from the template
+        2. Each day's meals and snacks must add up to the daily targets above
         3. Apply age-specific guidance from the template
         4. Include hydration guidelines from the template
         5. Return ONLY valid JSON - no additional text, explanations, markdown, or code blocks
@@ -416,12 +502,12 @@ class MonthlyPlanService:
         8. Do NOT include trailing commas before closing brackets or braces
         9. Do NOT include comments in the JSON
         10. The response must start with {{ and end with }}
+        11. Do NOT add fields that are not in the format above (dates, day names, counts and totals are computed by the server)
         """
         
         try:
-            # Generate content using Google AI
-            response = self.model.generate_content(prompt)
-            result_text = response.text
+            # Generate content using Google AI (hedged: the first response that parses wins)
+            result_text, meal_plan_data = await self._generate_hedged(prompt, label="meal plan")
             
             # Log raw AI response for debugging
             import logging
@@ -431,13 +517,10 @@ class MonthlyPlanService:
             if len(result_text) > 1000:
                 logger.info(f"🤖 Raw AI Response (last 500 chars): {repr(result_text[-500:])}")
             
-            # Clean up the response (remove markdown formatting if present)
-            if result_text.startswith('```json'):
-                result_text = result_text.replace('```json', '').replace('```', '').strip()
-                logger.info("🧹 Cleaned markdown formatting from AI response")
-            
-            # Use robust JSON parsing with multiple fallback strategies
-            meal_plan_data = self._robust_json_parse(result_text)
+            if compact_output:
+                meal_plan_data = self.compact_schema.expand_meal_plan(meal_plan_data)
+            if through_day:
+                meal_plan_data = rolling_planner.limit(meal_plan_data, 'daily_meals', through_day)
             
             # Send webhook notification for successful generation
             await webhook_service.notify_meal_plan_generated(
@@ -445,7 +528,7 @@ class MonthlyPlanService:
                 plan_data={
                     'month': month,
                     'year': year,
-                    'daily_calories': meal_plan_data.get('monthly_overview', {}).get('nutrition_targets', {}).get('daily_calories', 'unknown'),
+                    'daily_calories': targets['daily_calories'],
                     'plan_id': f"{user_id}_{month}_{year}_meal",
                     'success': True
                 }
@@ -458,6 +541,9 @@ class MonthlyPlanService:
                 "generation_timestamp": datetime.now().isoformat()
             }
         except json.JSONDecodeError as e:
+            # The text that failed to parse (every hedged attempt failed)
+            result_text = e.doc
+            
             # Enhanced error reporting for JSON parsing issues
             error_line = e.lineno if hasattr(e, 'lineno') else "unknown"
             error_col = e.colno if hasattr(e, 'colno') else "unknown"
@@ -484,9 +570,411 @@ class MonthlyPlanService:
         except Exception as e:
             return {
                 "success": False,
-                "error": f"Generation error: {str(e)}"
+                "error": f"Generation error: {str(e)}",
+                "error_kind": classify_error(e)
             }
 
+    async def regenerate_workout_days(
+        self,
+        user_id: str,
+        month: int,
+        year: int,
+        plan: Dict[str, Any],
+        days: List[str],
+        fitness_level: str,
+        goals: List[str],
+        available_time: int,
+        equipment: List[str],
+        age: int = 30,
+        weight: float = 75.0,
+        injuries_limitations: Optional[List[str]] = None,
+        reason: str = ""
+    ) -> Dict[str, Any]:
+        """
+        Re-request only the given days of an existing workout plan.
+        The rest of the month is passed as a one-line-per-day summary so the
+        new days fit the existing split.
+        """
+        month_name = calendar.month_name[month]
+        equipment_type = "gym" if "gym" in equipment else "home"
+        user_profile = {
+            "age": age,
+            "weight": weight,
+            "goals": goals,
+            "fitness_level": fitness_level,
+            "training_environment": equipment_type.upper() + "_TRAINING",
+            "goal": goals[0].upper() if goals else "GENERAL_FITNESS"
+        }
+        workout_plan = self.template_service.get_workout_plan(
+            user_profile=user_profile,
+            session_duration=available_time
+        )
+        exercise_table = exercise_catalog.prompt_table(workout_plan.get('exercises', {}))
+        
+        # Compact context: "day: workout_type [exercise ids]" for the untouched days
+        context_lines = []
+        for day, workout in plan.get('daily_workouts', {}).items():
+            if day in days or not isinstance(workout, dict):
+                continue
+            exercise_ids = [str(e.get('exercise_id')) for e in workout.get('exercises', []) if e.get('exercise_id')]
+            context_lines.append(f"{day}: {workout.get('workout_type', 'Rest')} [{' '.join(exercise_ids)}]")
+        
+        prompt = f"""
+        You are an expert fitness coach. Replace some days of an existing {month_name} {year} workout plan.
+        
+        USER PROFILE:
+        - Age: {age}
+        - Weight: {weight}kg
+        - Fitness Level: {fitness_level}
+        - Goals: {', '.join(goals)}
+        - Available Time per Session: {available_time} minutes
+        - Available Equipment: {', '.join(equipment)}
+        - Injuries/Limitations: {injuries_limitations or 'None'}
+        
+        REASON FOR REPLACEMENT: {reason or 'Previous version did not meet requirements'}
+        
+        EXISTING DAYS (day: workout type [exercise ids]):
+        {chr(10).join(context_lines) or 'None'}
+        
+        EXERCISE CATALOG (id: exercise):
+        {exercise_table}
+        
+        DAYS TO GENERATE: {', '.join(days)}
+        
+        RETURN FORMAT - STRICT JSON ONLY, one entry per day to generate:
+        {{
+            {DAILY_WORKOUTS_FORMAT}
+        }}
+        
+        IMPORTANT:
+        1. Use ONLY exercises from the EXERCISE CATALOG, referenced by exercise_id
+        2. Keep the weekly split consistent with the existing days
+        3. Return ONLY valid JSON with double quotes and no comments or trailing commas
+        """
+        
+        try:
+            result = await self._generate_json(prompt, label="workout days")
+            daily_workouts = result.get('daily_workouts', {}) if isinstance(result, dict) else {}
+            if isinstance(daily_workouts, dict):
+                self.periodization.prescribe_days(
+                    daily_workouts, fitness_level, calendar.monthrange(year, month)[1]
+                )
+            return {
+                "success": True,
+                "daily_workouts": {day: daily_workouts[day] for day in days if day in daily_workouts},
+                "template_exercise_ids": exercise_catalog.template_ids(workout_plan.get('exercises', {})),
+                "generation_timestamp": datetime.now().isoformat()
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Regeneration error: {str(e)}"
+            }
+
+    async def regenerate_meals(
+        self,
+        user_id: str,
+        month: int,
+        year: int,
+        plan: Dict[str, Any],
+        slots: Dict[str, List[str]],
+        dietary_preferences: List[str],
+        age: int = 30,
+        weight: float = 75.0,
+        goals: List[str] = ["maintenance"],
+        activity_level: str = "moderately_active",
+        allergies: Optional[List[str]] = None,
+        reason: str = ""
+    ) -> Dict[str, Any]:
+        """
+        Re-request only specific meals of an existing meal plan.
+        slots maps day -> meal slots ("breakfast", "lunch", "dinner", "snacks").
+        """
+        month_name = calendar.month_name[month]
+        meal_plan = self.template_service.get_meal_plan(user_profile={
+            "age": age,
+            "weight": weight,
+            "objectives": goals,
+            "activity_level": activity_level,
+            "dietary_preferences": dietary_preferences,
+            "allergies": allergies or []
+        })
+        
+        # Compact context: what each affected day keeps, and the calories to match
+        context_lines = []
+        for day, day_slots in slots.items():
+            day_data = plan.get('daily_meals', {}).get(day, {})
+            kept = [f"{m}={day_data[m].get('name', '')}" for m in ('breakfast', 'lunch', 'dinner')
+                    if m not in day_slots and isinstance(day_data.get(m), dict)]
+            replaced = [f"{m}~{day_data[m].get('calories', '?')}kcal" for m in day_slots
+                        if isinstance(day_data.get(m), dict)]
+            context_lines.append(f"Day {day}: replace {', '.join(day_slots)} ({', '.join(replaced) or 'no calorie hint'}); keeps {', '.join(kept) or 'nothing'}")
+        
+        prompt = f"""
+        You are a certified nutritionist. Replace some meals of an existing {month_name} {year} meal plan.
+        
+        USER PROFILE:
+        - Age: {age}
+        - Weight: {weight}kg
+        - Goals: {', '.join(goals)}
+        - Activity Level: {activity_level}
+        - Dietary Preferences: {', '.join(dietary_preferences)}
+        - Allergies: {allergies or 'None'}
+        
+        REASON FOR REPLACEMENT: {reason or 'Previous version did not meet requirements'}
+        
+        MEALS TO REPLACE:
+        {chr(10).join(context_lines)}
+        
+        TEMPLATE MEAL OPTIONS:
+        {json.dumps(meal_plan.get('meal_structure', {}), separators=(',', ':'))}
+        
+        RETURN FORMAT - STRICT JSON ONLY, only the listed days and meal slots:
+        {{
+            "daily_meals": {{
+                "<day>": {{
+                    "<meal slot>": {{"name": "...", "calories": 0, "protein": 0, "carbs": 0, "fat": 0, "ingredients": ["..."], "prep_time": 0, "instructions": "..."}},
+                    "snacks": [{{"name": "...", "calories": 0, "ingredients": ["..."]}}]
+                }}
+            }}
+        }}
+        
+        IMPORTANT:
+        1. Every ingredient must respect the allergies and dietary preferences above
+        2. Keep calories close to the replaced meal
+        3. Return ONLY valid JSON with double quotes and no comments or trailing commas
+        """
+        
+        try:
+            result = await self._generate_json(prompt, label="meals")
+            daily_meals = result.get('daily_meals', {}) if isinstance(result, dict) else {}
+            replaced = {}
+            for day, day_slots in slots.items():
+                generated = daily_meals.get(day)
+                if isinstance(generated, dict):
+                    replaced[day] = {slot: generated[slot] for slot in day_slots if slot in generated}
+            return {
+                "success": True,
+                "daily_meals": replaced,
+                "generation_timestamp": datetime.now().isoformat()
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Regeneration error: {str(e)}"
+            }
+
+    async def regenerate_meal_days(
+        self,
+        user_id: str,
+        month: int,
+        year: int,
+        plan: Dict[str, Any],
+        days: List[str],
+        dietary_preferences: List[str],
+        age: int = 30,
+        weight: float = 75.0,
+        goals: List[str] = ["maintenance"],
+        activity_level: str = "moderately_active",
+        allergies: Optional[List[str]] = None,
+        calorie_target: Optional[int] = None,
+        meal_prep_time: Optional[int] = None,
+        reason: str = ""
+    ) -> Dict[str, Any]:
+        """
+        Re-request whole days of an existing meal plan.
+        The rest of the month is passed as a one-line-per-day list of meal
+        names so the new days add variety instead of repeating them.
+        """
+        month_name = calendar.month_name[month]
+        meal_plan = self.template_service.get_meal_plan(user_profile={
+            "age": age,
+            "weight": weight,
+            "objectives": goals,
+            "activity_level": activity_level,
+            "dietary_preferences": dietary_preferences,
+            "allergies": allergies or [],
+            "calorie_target": calorie_target
+        })
+        targets = meal_plan['nutrition_targets']
+        
+        # Compact context: "day: breakfast | lunch | dinner" for the untouched days
+        context_lines = []
+        for day, day_data in plan.get('daily_meals', {}).items():
+            if day in days or not isinstance(day_data, dict):
+                continue
+            names = [day_data[m].get('name', '') for m in ('breakfast', 'lunch', 'dinner')
+                     if isinstance(day_data.get(m), dict)]
+            context_lines.append(f"{day}: {' | '.join(names)}")
+        
+        prompt = f"""
+        You are a certified nutritionist. Replace some days of an existing {month_name} {year} meal plan.
+        
+        USER PROFILE:
+        - Age: {age}
+        - Weight: {weight}kg
+        - Goals: {', '.join(goals)}
+        - Activity Level: {activity_level}
+        - Dietary Preferences: {', '.join(dietary_preferences)}
+        - Allergies: {allergies or 'None'}
+        - Daily Targets: {targets['daily_calories']} kcal, {targets['protein_grams']}g protein, {targets['carbs_grams']}g carbs, {targets['fat_grams']}g fat
+        - Meal Prep Time: {meal_prep_time or 'Flexible'} minutes
+        
+        REASON FOR REPLACEMENT: {reason or 'Previous version did not meet requirements'}
+        
+        EXISTING DAYS (day: breakfast | lunch | dinner):
+        {chr(10).join(context_lines) or 'None'}
+        
+        TEMPLATE MEAL OPTIONS:
+        {json.dumps(meal_plan.get('meal_structure', {}), separators=(',', ':'))}
+        
+        DAYS TO GENERATE: {', '.join(days)}
+        
+        RETURN FORMAT - STRICT JSON ONLY, one entry per day to generate:
+        {{
+            {DAILY_MEALS_FORMAT}
+        }}
+        
+        IMPORTANT:
+        1. Every ingredient must respect the allergies and dietary preferences above
+        2. Do not repeat meals from the existing days
+        3. Give each ingredient with its quantity for one serving (e.g. "150g chicken breast")
+        4. Return ONLY valid JSON with double quotes and no comments or trailing commas
+        """
+        
+        try:
+            result = await self._generate_json(prompt, label="meal days")
+            daily_meals = result.get('daily_meals', {}) if isinstance(result, dict) else {}
+            return {
+                "success": True,
+                "daily_meals": {day: daily_meals[day] for day in days if day in daily_meals},
+                "generation_timestamp": datetime.now().isoformat()
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Regeneration error: {str(e)}"
+            }
+
+    def _assemble_from_library(
+        self,
+        user_id: str,
+        month: int,
+        year: int,
+        days_in_month: int,
+        targets: Dict[str, Any],
+        allergies: Optional[List[str]],
+        dietary_preferences: List[str],
+        meal_prep_time: Optional[int]
+    ) -> Dict[str, Any]:
+        """Build a meal plan from the meal library (raises ValueError if it is too small)."""
+        daily_meals = meal_assembler.assemble(
+            days_in_month,
+            {
+                'calories': targets['daily_calories'],
+                'protein': targets['protein_grams'],
+                'carbs': targets['carbs_grams'],
+                'fat': targets['fat_grams']
+            },
+            allergies=allergies,
+            dietary_preferences=dietary_preferences,
+            max_prep_time=meal_prep_time,
+            seed=f"{user_id}_{month}_{year}"
+        )
+        progression = self.template_service.meal_template.get('meal_template', {}).get('monthly_progression', {})
+        return {
+            "monthly_overview": {"month": month, "year": year},
+            "weekly_themes": {week: dict(theme) for week, theme in progression.items()},
+            "daily_meals": daily_meals
+        }
+
+    async def generate_library_meals(
+        self,
+        slot: str,
+        count: int,
+        dietary_preference: Optional[str] = None,
+        avoid_names: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Ask the model for a batch of standalone meals for the offline meal
+        library (see build_meal_library.py). Validation and tagging happen in
+        MealLibrary.add_meals.
+        """
+        meal_options = self.template_service.meal_template.get('meal_template', {}).get('meal_options', {})
+        prompt = f"""
+        You are a certified nutritionist. Create {count} distinct {slot} recipes{f' that are {dietary_preference}' if dietary_preference else ''}.
+        
+        TEMPLATE OPTIONS FOR INSPIRATION:
+        {json.dumps(meal_options.get(slot, []), separators=(',', ':'))}
+        
+        DO NOT REPEAT THESE NAMES:
+        {', '.join(avoid_names or []) or 'None'}
+        
+        RETURN FORMAT - STRICT JSON ONLY:
+        {{
+            "meals": [
+                {{"name": "...", "calories": 0, "protein": 0, "carbs": 0, "fat": 0, "prep_time": 0, "ingredients": ["..."], "instructions": ["..."]}}
+            ]
+        }}
+        
+        IMPORTANT:
+        1. protein, carbs and fat are grams; calories must match 4/4/9 kcal per gram within 10%
+        2. List every ingredient explicitly (e.g. "almond milk", not "milk alternative")
+        3. Return ONLY valid JSON with double quotes and no comments or trailing commas
+        """
+        result = await self._generate_json(prompt, label="meal library")
+        meals = result.get('meals', []) if isinstance(result, dict) else []
+        return [meal for meal in meals if isinstance(meal, dict)]
+
+    async def _call_model(self, prompt: str, label: str = "plan"):
+        """
+        Every model request goes through here: admitted by priority lane, then
+        rate limited, with transient failures and blocked or empty responses
+        retried under the shared retry policy. Only the model call itself is
+        held to the attempt timeout, not the wait for admission.
+        """
+        async def attempt(timed):
+            async with lane_scheduler.slot():
+                response = await model_rate_limiter.run(
+                    lambda: timed(self.model.generate_content_async(prompt)), prompt, label
+                )
+            check_response(response)
+            return response
+        
+        return await model_retry_policy.run(attempt, label, timed_call=True)
+
+    async def _generate_hedged(self, prompt: str, label: str) -> tuple:
+        """
+        Model call plus JSON parse for a month-long plan, under the shared
+        hedger: a second identical call may race a slow one, and the first
+        response that parses wins. Returns (raw text, parsed plan).
+        """
+        async def attempt():
+            response = await self._call_model(prompt, label=label)
+            result_text = response.text
+            # Remove markdown formatting if present, then parse with the fallback strategies
+            cleaned = result_text
+            if cleaned.startswith('```json'):
+                cleaned = cleaned.replace('```json', '').replace('```', '').strip()
+            return result_text, self._robust_json_parse(cleaned)
+        
+        return await model_hedger.run(attempt, label)
+
+    async def _generate_json(self, prompt: str, label: str = "plan") -> Any:
+        """Run a prompt through the model and parse the JSON it returns."""
+        import logging
+        logger = logging.getLogger(__name__)
+        
+        response = await self._call_model(prompt, label=label)
+        result_text = response.text
+        logger.info(f"🤖 AI {label} response received. Length: {len(result_text)}")
+        
+        # Clean up the response (remove markdown formatting if present)
+        if result_text.startswith('```json'):
+            result_text = result_text.replace('```json', '').replace('```', '').strip()
+        
+        return self._robust_json_parse(result_text)
+
     def _clean_ai_json_response(self, json_text: str) -> str:
         """
         Clean up common AI-generated JSON issues that cause parsing errors.
@@ -0,0 +1,255 @@
+import os
+import re
+import json
+import logging
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Array layout: plans x days x slots x macros
+MACROS = ['calories', 'protein', 'carbs', 'fat']
+SLOTS = ['breakfast', 'lunch', 'dinner', 'snacks']
+MAX_DAYS = 31
+DAYS_PER_WEEK = 7
+
+# Energy per gram, used to turn macro percentages into gram targets and to
+# check that a meal's stated calories agree with its macros
+KCAL_PER_GRAM = np.array([4.0, 4.0, 9.0], dtype=np.float32)
+
+# Relative tolerances before a day counts as missing its target
+DEFAULT_TOLERANCES = {'calories': 0.10, 'protein': 0.20, 'carbs': 0.25, 'fat': 0.25}
+# Stated meal calories may differ this much from 4/4/9 x macros
+CALORIE_CONSISTENCY_TOLERANCE = 0.20
+
+# User goals mapped onto macro_distributions / calorie_targets_by_profile keys
+OBJECTIVE_ALIASES = {
+    'weight_loss': 'weight_loss',
+    'fat_loss': 'weight_loss',
+    'muscle_building': 'muscle_building',
+    'muscle_gain': 'muscle_building',
+    'strength': 'muscle_building',
+    'endurance': 'athletic_performance',
+    'athletic_performance': 'athletic_performance',
+    'general_health': 'health_focus',
+    'health_focus': 'health_focus',
+    'maintenance': 'maintenance'
+}
+DEFAULT_OBJECTIVE = 'maintenance'
+
+AMOUNT_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+
+
+def parse_amount(value: Any) -> float:
+    """Parse numbers that may arrive as strings such as "25g" or "400 kcal"."""
+    if isinstance(value, bool) or value is None:
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = AMOUNT_PATTERN.search(str(value))
+    return float(match.group()) if match else 0.0
+
+
+class NutritionEngine:
+    """
+    NumPy nutrition consistency checks for meal plans.
+    Plans are packed into one (plans x days x slots x macros) array so daily
+    and weekly totals, target checks and calorie/macro agreement are computed
+    for a whole batch in a few array operations.
+    """
+
+    def __init__(self, meal_template: Optional[Dict[str, Any]] = None):
+        if meal_template is None:
+            meal_template = self._load_meal_template()
+        template = meal_template.get('meal_template', {})
+        self.macro_distributions = template.get('macro_distributions', {})
+        self.calorie_targets = template.get('calorie_targets_by_profile', {})
+        self.tolerances = np.array([DEFAULT_TOLERANCES[m] for m in MACROS], dtype=np.float32)
+
+    def _load_meal_template(self) -> Dict[str, Any]:
+        """Load the unified meal template from JSON file"""
+        template_path = os.path.join(os.path.dirname(__file__), "../templates/meal_templates.json")
+        try:
+            with open(template_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            logger.warning(f"Meal template file not found at {template_path}")
+            return {}
+
+    def resolve_objective(self, goals: Any) -> str:
+        """Map a goal or list of goals onto a macro_distributions key."""
+        if isinstance(goals, str):
+            goals = [goals]
+        for goal in goals or []:
+            objective = OBJECTIVE_ALIASES.get(str(goal).lower())
+            if objective in self.macro_distributions:
+                return objective
+        return DEFAULT_OBJECTIVE
+
+    def default_calorie_target(self, objective: str) -> float:
+        """Midpoint of the medium_person range for the objective."""
+        ranges = self.calorie_targets.get(objective) or self.calorie_targets.get(DEFAULT_OBJECTIVE, {})
+        numbers = [float(n) for n in AMOUNT_PATTERN.findall(str(ranges.get('medium_person', '')))]
+        return sum(numbers) / len(numbers) if numbers else 2000.0
+
+    def daily_targets(self, objectives: Sequence[str], calorie_targets: Sequence[Optional[float]]) -> np.ndarray:
+        """
+        (plans x macros) daily targets: calories plus protein/carbs/fat grams
+        from the objective's macro_distributions percentages.
+        """
+        targets = np.zeros((len(objectives), len(MACROS)), dtype=np.float32)
+        percentages = np.zeros((len(objectives), 3), dtype=np.float32)
+        for i, (objective, calories) in enumerate(zip(objectives, calorie_targets)):
+            distribution = self.macro_distributions.get(objective) or self.macro_distributions.get(DEFAULT_OBJECTIVE, {})
+            percentages[i] = [distribution.get(m, 0) for m in MACROS[1:]]
+            targets[i, 0] = calories or self.default_calorie_target(objective)
+        targets[:, 1:] = targets[:, :1] * percentages / 100.0 / KCAL_PER_GRAM
+        return targets
+
+    def pack_plans(self, plans: Sequence[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Parse a batch of filtered meal plans into a float32 array of shape
+        (plans, MAX_DAYS, slots, macros) and a (plans, MAX_DAYS) day mask.
+        Snacks are summed into the last slot.
+        """
+        # Collect flat (plan, day, slot) indices and raw macro values, then
+        # parse and scatter once; per-element NumPy assignment would dominate
+        positions: List[int] = []
+        raw: List[Any] = []
+        days: List[int] = []
+        slot_count = len(SLOTS)
+        snack_slot = slot_count - 1
+        main_slots = list(enumerate(SLOTS[:snack_slot]))
+
+        # A batch repeats few distinct values ("25g", 400, ...), so parse each once
+        parsed: Dict[Any, float] = {None: 0.0}
+
+        def amount(value: Any) -> float:
+            try:
+                return parsed[value]
+            except KeyError:
+                parsed[value] = result = parse_amount(value)
+                return result
+            except TypeError:
+                return parse_amount(value)
+
+        for p, plan in enumerate(plans):
+            daily_meals = plan.get('daily_meals', {}) if isinstance(plan, dict) else {}
+            for day_str, day_data in daily_meals.items():
+                try:
+                    day = int(day_str)
+                except (TypeError, ValueError):
+                    continue
+                if not 1 <= day <= MAX_DAYS or not isinstance(day_data, dict):
+                    continue
+                base = (p * MAX_DAYS + day - 1)
+                days.append(base)
+                base *= slot_count
+                for s, slot in main_slots:
+                    meal = day_data.get(slot)
+                    if isinstance(meal, dict):
+                        positions.append(base + s)
+                        raw.extend(map(meal.get, MACROS))
+                for snack in day_data.get('snacks') or []:
+                    if isinstance(snack, dict):
+                        positions.append(base + snack_slot)
+                        raw.extend(map(snack.get, MACROS))
+
+        size = len(plans) * MAX_DAYS * slot_count
+        values = np.zeros((size, len(MACROS)), dtype=np.float32)
+        if positions:
+            rows = np.fromiter(map(amount, raw), dtype=np.float32, count=len(raw)).reshape(-1, len(MACROS))
+            index = np.array(positions)
+            for m in range(len(MACROS)):
+                values[:, m] = np.bincount(index, weights=rows[:, m], minlength=size)
+        mask = np.zeros(len(plans) * MAX_DAYS, dtype=bool)
+        mask[days] = True
+
+        values = values.reshape(len(plans), MAX_DAYS, slot_count, len(MACROS))
+        mask = mask.reshape(len(plans), MAX_DAYS)
+        return values, mask
+
+    def evaluate(self, values: np.ndarray, mask: np.ndarray, targets: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Vectorized checks over packed plans:
+        - daily_totals (P, D, M) and weekly_totals (P, W, M)
+        - off_target (P, D, M): day totals outside the tolerance around targets
+        - inconsistent_meals (P, D, S-1): stated calories disagree with 4/4/9 x macros
+        """
+        daily = values.sum(axis=2)
+        daily[~mask] = 0.0
+
+        weeks = -(-MAX_DAYS // DAYS_PER_WEEK)
+        padded = np.zeros((values.shape[0], weeks * DAYS_PER_WEEK, len(MACROS)), dtype=np.float32)
+        padded[:, :MAX_DAYS] = daily
+        weekly = padded.reshape(values.shape[0], weeks, DAYS_PER_WEEK, len(MACROS)).sum(axis=2)
+
+        deviation = np.abs(daily - targets[:, None, :]) / np.maximum(targets[:, None, :], 1.0)
+        off_target = (deviation > self.tolerances) & mask[:, :, None]
+
+        # Snacks usually carry calories only, so agreement is checked on main meals
+        meals = values[:, :, :-1]
+        macro_calories = meals[..., 1:] @ KCAL_PER_GRAM
+        stated = meals[..., 0]
+        present = (stated > 0) | (macro_calories > 0)
+        mismatch = np.abs(stated - macro_calories) / np.maximum(np.maximum(stated, macro_calories), 1.0)
+        inconsistent = (mismatch > CALORIE_CONSISTENCY_TOLERANCE) & present & mask[:, :, None]
+
+        return {
+            'daily_totals': daily,
+            'weekly_totals': weekly,
+            'off_target': off_target,
+            'inconsistent_meals': inconsistent
+        }
+
+    def validate_plans(
+        self,
+        plans: Sequence[Dict[str, Any]],
+        goals: Sequence[Any],
+        calorie_targets: Optional[Sequence[Optional[float]]] = None
+    ) -> List[Dict[str, Any]]:
+        """Validate a batch of meal plans and return one JSON-ready report per plan."""
+        if not plans:
+            return []
+        objectives = [self.resolve_objective(g) for g in goals]
+        targets = self.daily_targets(objectives, calorie_targets or [None] * len(plans))
+        values, mask = self.pack_plans(plans)
+        result = self.evaluate(values, mask, targets)
+
+        # Convert to Python once for the whole batch instead of per plan
+        days_checked = mask.sum(axis=1).tolist()
+        weekly = np.rint(result['weekly_totals']).astype(int).tolist()
+        weeks = result['weekly_totals'].shape[1]
+        padded_mask = np.zeros((len(plans), weeks * DAYS_PER_WEEK), dtype=bool)
+        padded_mask[:, :MAX_DAYS] = mask
+        week_used = padded_mask.reshape(len(plans), weeks, DAYS_PER_WEEK).any(axis=2).tolist()
+        daily_targets = np.rint(targets).astype(int).tolist()
+
+        reports = [{
+            'objective': objectives[i],
+            'daily_targets': dict(zip(MACROS, daily_targets[i])),
+            'weekly_totals': {
+                f"week_{w + 1}": dict(zip(MACROS, weekly[i][w])) for w, used in enumerate(week_used[i]) if used
+            },
+            'off_target_days': {},
+            'inconsistent_meals': [],
+            'days_checked': days_checked[i],
+            'days_on_target': days_checked[i]
+        } for i in range(len(plans))]
+
+        for p, d, m in zip(*(a.tolist() for a in np.nonzero(result['off_target']))):
+            reports[p]['off_target_days'].setdefault(str(d + 1), []).append(MACROS[m])
+        for p, d, s in zip(*(a.tolist() for a in np.nonzero(result['inconsistent_meals']))):
+            reports[p]['inconsistent_meals'].append({'day': str(d + 1), 'meal': SLOTS[s]})
+        for report in reports:
+            report['days_on_target'] -= len(report['off_target_days'])
+        return reports
+
+    def validate_plan(self, plan: Dict[str, Any], goals: Any, calorie_target: Optional[float] = None) -> Dict[str, Any]:
+        """Single-plan convenience wrapper around validate_plans."""
+        return self.validate_plans([plan], [goals], [calorie_target])[0]
+
+
+# Global nutrition engine instance
+nutrition_engine = NutritionEngine()
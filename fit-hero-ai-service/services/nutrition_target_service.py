@@ -0,0 +1,190 @@
+import os
+import re
+import json
+import bisect
+import logging
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
+
+from services.nutrition_engine_service import (
+    MACROS, KCAL_PER_GRAM, OBJECTIVE_ALIASES, DEFAULT_OBJECTIVE
+)
+
+logger = logging.getLogger(__name__)
+
+# Table axes. Age groups and weight categories use the same cut points as
+# StandardizedTemplateService._determine_age_group / _determine_weight_category.
+AGE_GROUPS = ['age_under_20', 'age_20_25', 'age_26_35', 'age_36_45', 'age_46_55', 'age_over_55']
+AGE_BOUNDS = [20, 26, 36, 46, 56]
+WEIGHT_CATEGORIES = ['under_60kg', '60_80kg', 'over_80kg']
+WEIGHT_BOUNDS = [60, 80]
+ACTIVITY_LEVELS = ['sedentary', 'lightly_active', 'moderately_active', 'very_active']
+DEFAULT_ACTIVITY_LEVEL = 'moderately_active'
+
+# Weight category -> calorie_targets_by_profile column
+WEIGHT_PROFILES = {
+    'under_60kg': 'light_person',
+    '60_80kg': 'medium_person',
+    'over_80kg': 'heavy_person'
+}
+
+# Objectives without their own calorie row use the maintenance ranges
+CALORIE_PROFILE_KEYS = {
+    'weight_loss': 'weight_loss',
+    'muscle_building': 'muscle_building',
+    'maintenance': 'maintenance',
+    'athletic_performance': 'maintenance',
+    'health_focus': 'maintenance'
+}
+
+# Share of the template's "very_active: add X-Y calories" applied per level
+ACTIVITY_ADJUSTMENT = {
+    'sedentary': -0.5,
+    'lightly_active': 0.0,
+    'moderately_active': 0.5,
+    'very_active': 1.0
+}
+
+# Resting energy falls slowly with age; the template ranges are for adults
+AGE_CALORIE_FACTORS = {
+    'age_under_20': 1.05,
+    'age_20_25': 1.0,
+    'age_26_35': 1.0,
+    'age_36_45': 0.97,
+    'age_46_55': 0.94,
+    'age_over_55': 0.90
+}
+
+NUMBER_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+
+
+def _midpoint(text: Any) -> float:
+    """Midpoint of a "1400-1600" / "add 200-400 calories" range, 0 if none."""
+    numbers = [float(n) for n in NUMBER_PATTERN.findall(str(text))]
+    return sum(numbers) / len(numbers) if numbers else 0.0
+
+
+class NutritionTargetTable:
+    """
+    Precomputed daily calorie and macro gram targets for every
+    age group x weight category x objective x activity level, built from
+    calorie_targets_by_profile and macro_distributions in meal_templates.json.
+    Lookups are plain array indexing; lookup_batch does the same for arrays
+    of profiles at once.
+    """
+
+    def __init__(self, meal_template: Optional[Dict[str, Any]] = None):
+        if meal_template is None:
+            meal_template = self._load_meal_template()
+        template = meal_template.get('meal_template', {})
+        self.objectives: List[str] = list(template.get('macro_distributions', {})) or [DEFAULT_OBJECTIVE]
+
+        self._age_bounds = np.array(AGE_BOUNDS)
+        self._weight_bounds = np.array(WEIGHT_BOUNDS)
+        self._objective_index = {name: i for i, name in enumerate(self.objectives)}
+        self._activity_index = {name: i for i, name in enumerate(ACTIVITY_LEVELS)}
+
+        self.table = self._build(template)
+        logger.info(f"🍽️ Nutrition target table built: {self.table.shape[:-1]} profiles")
+
+    def _load_meal_template(self) -> Dict[str, Any]:
+        """Load the unified meal template from JSON file"""
+        template_path = os.path.join(os.path.dirname(__file__), "../templates/meal_templates.json")
+        try:
+            with open(template_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            logger.warning(f"Meal template file not found at {template_path}")
+            return {}
+
+    def _build(self, template: Dict[str, Any]) -> np.ndarray:
+        """Fill the (age x weight x objective x activity x macros) integer table."""
+        calorie_rows = template.get('calorie_targets_by_profile', {})
+        distributions = template.get('macro_distributions', {})
+
+        # Calories: template midpoint per objective/weight, then activity and age
+        base = np.zeros((len(self.objectives), len(WEIGHT_CATEGORIES)), dtype=np.float64)
+        very_active_add = np.zeros(len(self.objectives), dtype=np.float64)
+        percentages = np.zeros((len(self.objectives), 3), dtype=np.float64)
+        for o, objective in enumerate(self.objectives):
+            row = calorie_rows.get(CALORIE_PROFILE_KEYS.get(objective, 'maintenance'), {})
+            for w, category in enumerate(WEIGHT_CATEGORIES):
+                base[o, w] = _midpoint(row.get(WEIGHT_PROFILES[category])) or 2000.0
+            very_active_add[o] = _midpoint(row.get('very_active'))
+            distribution = distributions.get(objective, {})
+            percentages[o] = [distribution.get(m, 0) for m in MACROS[1:]]
+
+        age_factors = np.array([AGE_CALORIE_FACTORS[a] for a in AGE_GROUPS])
+        activity_share = np.array([ACTIVITY_ADJUSTMENT[a] for a in ACTIVITY_LEVELS])
+
+        # (objective, weight, activity) then broadcast over age
+        calories = base[:, :, None] + very_active_add[:, None, None] * activity_share[None, None, :]
+        calories = age_factors[:, None, None, None] * calories[None]
+        calories = np.round(calories / 10.0) * 10.0
+
+        grams = calories[..., None] * percentages[None, :, None, None, :] / 100.0 / KCAL_PER_GRAM
+        table = np.concatenate([calories[..., None], np.round(grams)], axis=-1).astype(np.int32)
+        # Stored as (age, weight, objective, activity, macros)
+        return np.ascontiguousarray(table.transpose(0, 2, 1, 3, 4))
+
+    def resolve_objective(self, goals: Any) -> str:
+        """Map a goal or list of goals onto a table objective."""
+        if isinstance(goals, str):
+            goals = [goals]
+        for goal in goals or []:
+            objective = OBJECTIVE_ALIASES.get(str(goal).lower())
+            if objective in self._objective_index:
+                return objective
+        return DEFAULT_OBJECTIVE if DEFAULT_OBJECTIVE in self._objective_index else self.objectives[0]
+
+    def lookup(
+        self,
+        age: float,
+        weight: float,
+        goals: Any,
+        activity_level: str = DEFAULT_ACTIVITY_LEVEL,
+        calorie_target: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Daily targets for one profile. An explicit calorie_target overrides the
+        table calories and the macro grams are rescaled to it.
+        """
+        objective = self.resolve_objective(goals)
+        a = bisect.bisect_right(AGE_BOUNDS, age)
+        w = bisect.bisect_right(WEIGHT_BOUNDS, weight)
+        l = self._activity_index.get(activity_level, self._activity_index[DEFAULT_ACTIVITY_LEVEL])
+        row = self.table[a, w, self._objective_index[objective], l]
+
+        values = row.tolist()
+        if calorie_target:
+            scale = float(calorie_target) / max(values[0], 1)
+            values = [int(calorie_target)] + [int(round(v * scale)) for v in values[1:]]
+
+        targets = dict(zip(MACROS, values))
+        targets['objective'] = objective
+        targets['age_group'] = AGE_GROUPS[a]
+        targets['weight_category'] = WEIGHT_CATEGORIES[w]
+        targets['activity_level'] = ACTIVITY_LEVELS[l]
+        return targets
+
+    def lookup_batch(
+        self,
+        ages: Sequence[float],
+        weights: Sequence[float],
+        goals: Sequence[Any],
+        activity_levels: Sequence[str]
+    ) -> np.ndarray:
+        """(profiles x macros) targets for arrays of profiles in one gather."""
+        a = np.searchsorted(self._age_bounds, np.asarray(ages, dtype=np.float64), side='right')
+        w = np.searchsorted(self._weight_bounds, np.asarray(weights, dtype=np.float64), side='right')
+        o = np.fromiter((self._objective_index[self.resolve_objective(g)] for g in goals),
+                        dtype=np.intp, count=len(goals))
+        default_level = self._activity_index[DEFAULT_ACTIVITY_LEVEL]
+        l = np.fromiter((self._activity_index.get(level, default_level) for level in activity_levels),
+                        dtype=np.intp, count=len(activity_levels))
+        return self.table[a, w, o, l]
+
+
+# Global target table, built once at startup
+nutrition_targets = NutritionTargetTable()
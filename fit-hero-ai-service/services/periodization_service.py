@@ -0,0 +1,201 @@
+import re
+import logging
+from typing import Dict, Any, Optional, Tuple
+
+from services.exercise_catalog_service import ExerciseCatalog, exercise_catalog
+
+logger = logging.getLogger(__name__)
+
+DAYS_PER_WEEK = 7
+
+# Four-week block: where each week sits inside the level's set range (volume)
+# and rep/rest range (intensity). Reps fall and rest grows as intensity rises.
+PHASES = [
+    {'phase': 'Foundation', 'focus': 'Foundation/Adaptation', 'intensity': 'Low-Moderate',
+     'volume': 'Moderate', 'volume_position': 0.0, 'intensity_position': 0.0},
+    {'phase': 'Build', 'focus': 'Progressive Overload', 'intensity': 'Moderate',
+     'volume': 'Moderate-High', 'volume_position': 0.5, 'intensity_position': 0.5},
+    {'phase': 'Peak', 'focus': 'Peak Training', 'intensity': 'Moderate-High',
+     'volume': 'High', 'volume_position': 1.0, 'intensity_position': 1.0},
+    {'phase': 'Recovery', 'focus': 'Recovery/Deload', 'intensity': 'Low-Moderate',
+     'volume': 'Low-Moderate', 'volume_position': 0.0, 'intensity_position': 0.25}
+]
+
+NUMBER_PATTERN = re.compile(r'\d+')
+
+
+def _lerp(low: float, high: float, position: float) -> float:
+    return low + (high - low) * position
+
+
+def _range(text: Any, default: Tuple[int, int]) -> Tuple[int, int]:
+    """First "a-b" (or single number) in a template string."""
+    numbers = [int(n) for n in NUMBER_PATTERN.findall(str(text))[:2]]
+    if not numbers:
+        return default
+    return numbers[0], numbers[-1]
+
+
+class PeriodizationEngine:
+    """
+    Computes the month's week-by-week training prescription from the
+    execution defaults of StandardizedTemplateService and the template's
+    workout_structure_by_level / monthly_progression_framework, and applies
+    it to generated plans. weekly_structure, progression_plan and the
+    per-exercise sets/reps/rest are therefore no longer asked of the model.
+    """
+
+    def __init__(self, template_service, catalog: Optional[ExerciseCatalog] = None):
+        self.template_service = template_service
+        self.catalog = catalog or exercise_catalog
+        workout_template = template_service.workout_template.get('workout_template', {})
+        self.structure_by_level = workout_template.get('workout_structure_by_level', {})
+        self.framework = workout_template.get('monthly_progression_framework', {})
+        self._cache: Dict[Tuple[str, int], Dict[str, Any]] = {}
+
+    def build(self, fitness_level: str, days_in_month: int) -> Dict[str, Any]:
+        """Weekly structure, progression plan and phase names for a level and month length."""
+        key = (fitness_level, days_in_month)
+        if key in self._cache:
+            return self._cache[key]
+
+        defaults = self.template_service.get_execution_defaults(
+            age=30, training_environment="", goal="", fitness_level=fitness_level
+        )
+        structure = self.structure_by_level.get(fitness_level, self.structure_by_level.get('beginner', {}))
+        sessions_low, sessions_high = _range(structure.get('weekly_sessions'), (3, 3))
+        sessions = (sessions_low + sessions_high) // 2
+
+        weekly_structure = {}
+        progression_plan = {}
+        weeks = -(-days_in_month // DAYS_PER_WEEK)
+        for week in range(weeks):
+            # Days past the fourth week carry the deload on into the next block
+            phase = PHASES[min(week, len(PHASES) - 1)]
+            framework = self.framework.get(f"week_{min(week, len(PHASES) - 1) + 1}", {})
+            prescription = self._prescription(defaults, phase)
+            first_day = week * DAYS_PER_WEEK + 1
+            last_day = min(first_day + DAYS_PER_WEEK - 1, days_in_month)
+
+            weekly_structure[f"week_{week + 1}"] = {
+                'focus': phase['focus'],
+                'intensity': phase['intensity'],
+                'volume': phase['volume'],
+                'days': [first_day, last_day],
+                'sessions': sessions,
+                'intensity_percent': framework.get('intensity', ''),
+                **prescription
+            }
+            progression_plan[f"week_{week + 1}_adjustments"] = (
+                f"{framework.get('focus', phase['focus'])}. "
+                f"{prescription['sets']} sets x {prescription['reps']} reps, "
+                f"{prescription['rest_seconds']}s rest"
+                + (f" at {framework['intensity']}" if framework.get('intensity') else "")
+                + (f"; {framework['volume'].lower()}" if framework.get('volume') else "")
+                + "."
+            )
+
+        result = {
+            'weekly_structure': weekly_structure,
+            'progression_plan': progression_plan,
+            'training_phases': [p['phase'] for p in PHASES],
+            'progression_rule': structure.get('progression', '')
+        }
+        self._cache[key] = result
+        return result
+
+    def _prescription(self, defaults: Dict[str, Any], phase: Dict[str, Any]) -> Dict[str, int]:
+        sets = defaults.get('sets', {})
+        reps = defaults.get('reps', {})
+        rest = defaults.get('rest_seconds', {})
+        return {
+            'sets': int(round(_lerp(sets.get('min', 2), sets.get('max', 3), phase['volume_position']))),
+            'reps': int(round(_lerp(reps.get('max', 12), reps.get('min', 8), phase['intensity_position']))),
+            'rest_seconds': int(round(_lerp(rest.get('min', 60), rest.get('max', 90), phase['intensity_position']) / 5) * 5)
+        }
+
+    def prompt_summary(self, periodization: Dict[str, Any]) -> str:
+        """One line per week for the prompt, so workout days follow the block."""
+        lines = []
+        for week, info in periodization['weekly_structure'].items():
+            lines.append(
+                f"{week.replace('_', ' ').title()} (days {info['days'][0]}-{info['days'][1]}): "
+                f"{info['focus']}, {info['intensity']} intensity, {info['sessions']} training sessions"
+            )
+        return '\n'.join(lines)
+
+    def apply(self, data: Dict[str, Any], fitness_level: str, days_in_month: int) -> Dict[str, Any]:
+        """Set the computed weekly structure and fill exercise prescriptions in a parsed plan."""
+        if not isinstance(data, dict):
+            return data
+        periodization = self.build(fitness_level, days_in_month)
+
+        data['weekly_structure'] = periodization['weekly_structure']
+        data['progression_plan'] = periodization['progression_plan']
+        overview = data.get('monthly_overview')
+        if not isinstance(overview, dict):
+            overview = {}
+        overview['training_phases'] = periodization['training_phases']
+        data['monthly_overview'] = overview
+
+        daily_workouts = data.get('daily_workouts')
+        if isinstance(daily_workouts, dict):
+            self.prescribe_days(daily_workouts, fitness_level, days_in_month)
+        return data
+
+    def prescribe_days(self, daily_workouts: Dict[str, Any], fitness_level: str, days_in_month: int):
+        """
+        Fill sets/reps/rest_time/progression of each exercise from its week's
+        prescription. Values the model did send are kept as deliberate overrides.
+        """
+        periodization = self.build(fitness_level, days_in_month)
+        weeks = list(periodization['weekly_structure'].values())
+
+        for day_str, workout in daily_workouts.items():
+            if not isinstance(workout, dict):
+                continue
+            try:
+                index = min((int(day_str) - 1) // DAYS_PER_WEEK, len(weeks) - 1)
+            except (TypeError, ValueError):
+                continue
+            phase = PHASES[min(index, len(PHASES) - 1)]
+            for exercise in workout.get('exercises') or []:
+                if isinstance(exercise, dict):
+                    self._prescribe_exercise(exercise, weeks[index], phase, periodization['progression_rule'])
+
+    def _prescribe_exercise(
+        self,
+        exercise: Dict[str, Any],
+        week: Dict[str, Any],
+        phase: Dict[str, Any],
+        progression_rule: str
+    ):
+        entry = self.catalog.get(exercise.get('exercise_id')) or self.catalog.lookup_name(exercise.get('name'))
+        entry = entry or {}
+        position = phase['volume_position']
+
+        if exercise.get('sets') is None:
+            if 'sets_min' in entry:
+                exercise['sets'] = int(round(_lerp(entry['sets_min'], entry['sets_max'], position)))
+            elif 'duration_minutes_min' in entry:
+                exercise['sets'] = 1
+            else:
+                exercise['sets'] = week['sets']
+
+        if exercise.get('reps') is None:
+            # Timed template exercises progress in duration instead of reps
+            if 'duration_seconds_min' in entry:
+                seconds = _lerp(entry['duration_seconds_min'], entry['duration_seconds_max'], position)
+                exercise['reps'] = f"{int(round(seconds))} seconds"
+            elif 'duration_minutes_min' in entry:
+                minutes = _lerp(entry['duration_minutes_min'], entry['duration_minutes_max'], position)
+                exercise['reps'] = f"{int(round(minutes))} minutes"
+            elif 'reps_min' in entry:
+                exercise['reps'] = str(int(round(_lerp(entry['reps_max'], entry['reps_min'], position))))
+            else:
+                exercise['reps'] = str(week['reps'])
+
+        if exercise.get('rest_time') is None:
+            exercise['rest_time'] = str(week['rest_seconds'])
+        if not exercise.get('progression') and progression_rule:
+            exercise['progression'] = progression_rule
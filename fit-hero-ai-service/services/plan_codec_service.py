@@ -0,0 +1,139 @@
+import os
+import re
+import hashlib
+import logging
+from typing import Dict, Any, Optional, Iterable
+
+import zstandard
+
+from services.serialization_service import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DICTIONARY_DIR = os.path.join(os.path.dirname(__file__), "../data/plan_dictionaries")
+DICTIONARY_PATTERN = re.compile(r'^plan-v(\d+)-([0-9a-f]{8})\.zstdict$')
+
+# Entry layout: MAGIC | id length (1 byte) | dictionary id | zstd frame.
+# Entries without the magic are plain JSON written before the codec existed.
+MAGIC = b'FHZ\x02'
+MAX_DICTIONARY_SIZE = 32 * 1024
+COMPRESSION_LEVEL = 19
+
+
+class UnknownDictionaryError(ValueError):
+    """An entry references a dictionary that is not installed."""
+
+
+def dictionary_id(dictionary: bytes) -> str:
+    return hashlib.sha1(dictionary).hexdigest()[:8]
+
+
+def train_dictionary(
+    samples: Iterable[bytes],
+    vocabulary: Iterable[bytes] = (),
+    size: int = MAX_DICTIONARY_SIZE
+) -> bytes:
+    """
+    Train a zstd dictionary on serialized plans. Template vocabulary
+    (exercise and meal names) is added as extra samples. The trainer may
+    return less than `size` when the corpus is small, and fails when there
+    are too few samples to train on at all.
+    """
+    samples = list(samples) + list(vocabulary)
+    try:
+        return zstandard.train_dictionary(size, samples).as_bytes()
+    except zstandard.ZstdError as e:
+        raise ValueError(f"Cannot train a plan dictionary on {len(samples)} samples: {e}") from e
+
+
+class PlanStorageCodec:
+    """
+    Storage codec for cached and persisted plans: compact JSON compressed
+    with zstd against a dictionary trained on generated plans
+    (build_plan_dictionary.py). Each entry records the dictionary it was
+    written with, and every dictionary found in the dictionary directory
+    stays loaded, so entries written before a retrain remain readable.
+    """
+
+    def __init__(self, dictionary_dir: Optional[str] = None):
+        self.dictionary_dir = dictionary_dir or os.getenv('PLAN_DICTIONARY_DIR', DEFAULT_DICTIONARY_DIR)
+        self.dictionaries: Dict[str, zstandard.ZstdCompressionDict] = {}
+        self.current_id: Optional[str] = None
+        self._load()
+
+    def _load(self):
+        """Load all installed dictionaries; the highest version is used for writing."""
+        try:
+            names = os.listdir(self.dictionary_dir)
+        except FileNotFoundError:
+            logger.warning(f"Plan dictionary directory not found at {self.dictionary_dir}, compressing without one")
+            names = []
+
+        latest = -1
+        for name in names:
+            match = DICTIONARY_PATTERN.match(name)
+            if not match:
+                continue
+            with open(os.path.join(self.dictionary_dir, name), 'rb') as f:
+                dictionary = f.read()
+            if dictionary_id(dictionary) != match.group(2):
+                logger.warning(f"Plan dictionary {name} does not match its checksum, skipping")
+                continue
+            self.dictionaries[match.group(2)] = self._prepare(dictionary)
+            if int(match.group(1)) > latest:
+                latest, self.current_id = int(match.group(1)), match.group(2)
+
+    def _prepare(self, dictionary: bytes) -> zstandard.ZstdCompressionDict:
+        """Wrap dictionary bytes, precomputing the compression tables once."""
+        prepared = zstandard.ZstdCompressionDict(dictionary)
+        prepared.precompute_compress(level=COMPRESSION_LEVEL)
+        return prepared
+
+    def install(self, dictionary: bytes) -> str:
+        """Write a new dictionary version and make it current. Returns its id."""
+        os.makedirs(self.dictionary_dir, exist_ok=True)
+        versions = [int(m.group(1)) for m in map(DICTIONARY_PATTERN.match, os.listdir(self.dictionary_dir)) if m]
+        new_id = dictionary_id(dictionary)
+        if new_id not in self.dictionaries:
+            version = max(versions, default=0) + 1
+            with open(os.path.join(self.dictionary_dir, f"plan-v{version}-{new_id}.zstdict"), 'wb') as f:
+                f.write(dictionary)
+            self.dictionaries[new_id] = self._prepare(dictionary)
+        self.current_id = new_id
+        return new_id
+
+    def encode(self, value: Any) -> bytes:
+        """Serialize and compress a plan (or any JSON value) for storage."""
+        dictionary_key = (self.current_id or '').encode('ascii')
+        # Compressors are not thread safe; with a precomputed dictionary one per call is cheap.
+        # The header already names the dictionary, so the frame does not repeat its id.
+        compressor = zstandard.ZstdCompressor(
+            level=COMPRESSION_LEVEL,
+            dict_data=self.dictionaries[self.current_id] if self.current_id else None,
+            write_dict_id=False
+        )
+        payload = compressor.compress(dumps(value))
+        return MAGIC + bytes([len(dictionary_key)]) + dictionary_key + payload
+
+    def decode(self, data: bytes) -> Any:
+        """Read an entry written by encode() with any installed dictionary, or plain JSON."""
+        if not data.startswith(MAGIC):
+            return loads(data)
+        key_length = data[len(MAGIC)]
+        start = len(MAGIC) + 1
+        key = data[start:start + key_length].decode('ascii')
+        if key and key not in self.dictionaries:
+            raise UnknownDictionaryError(f"Plan dictionary {key} is not installed in {self.dictionary_dir}")
+        decompressor = zstandard.ZstdDecompressor(dict_data=self.dictionaries[key] if key else None)
+        return loads(decompressor.decompress(data[start + key_length:]))
+
+    def entry_dictionary(self, data: bytes) -> Optional[str]:
+        """Dictionary id an entry was written with (None for plain or dictionary-less entries)."""
+        if not data.startswith(MAGIC):
+            return None
+        key_length = data[len(MAGIC)]
+        return data[len(MAGIC) + 1:len(MAGIC) + 1 + key_length].decode('ascii') or None
+
+
+# Global codec instance
+plan_codec = PlanStorageCodec()
@@ -0,0 +1,137 @@
+import copy
+import calendar
+import logging
+from collections import Counter
+from typing import Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = list(calendar.day_name)
+# Fields a template day keeps; sets/reps/rest/progression are recomputed by periodization
+DAY_FIELDS = ('workout_type', 'duration', 'intensity', 'exercises', 'warm_up', 'cool_down')
+EXERCISE_FIELDS = ('exercise_id', 'name', 'notes')
+
+DELTA_FORMAT = """{
+            "monthly_overview": {
+                "month": number,
+                "year": number,
+                "progression_focus": "What changes from last month and why"
+            },
+            "weekday_changes": {
+                "Monday": {
+                    "workout_type": "Upper Body | Lower Body | Full Body | Cardio | Rest",
+                    "duration": "number",
+                    "intensity": "Low | Moderate | High",
+                    "exercises": [{"exercise_id": "number from EXERCISE CATALOG", "notes": "Form cues"}]
+                }
+            },
+            "exercise_swaps": {"<old exercise_id>": "<new exercise_id>"},
+            "safety_guidelines": ["Only if they change"]
+        }"""
+
+
+class WorkoutDeltaService:
+    """
+    Month-over-month workout generation. The previous month's plan is
+    reduced to one template day per weekday (its most common session),
+    the model is asked only for what changes (weekday_changes and
+    exercise_swaps), and the new month is expanded from the updated
+    templates. Sets, reps and rest come from periodization as usual.
+    """
+
+    def summarize(self, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """Weekday templates and safety guidelines of a stored workout plan."""
+        overview = plan.get('monthly_overview') or {}
+        month, year = overview.get('month'), overview.get('year')
+        by_weekday: Dict[str, List[Dict[str, Any]]] = {weekday: [] for weekday in WEEKDAYS}
+
+        for day, workout in (plan.get('daily_workouts') or {}).items():
+            if not isinstance(workout, dict):
+                continue
+            weekday = workout.get('day_of_week')
+            if weekday not in by_weekday and month and year and str(day).isdigit():
+                weekday = WEEKDAYS[calendar.weekday(year, month, int(day))]
+            if weekday in by_weekday:
+                by_weekday[weekday].append(self._template_day(workout))
+
+        weekdays = {}
+        for weekday, days in by_weekday.items():
+            if not days:
+                weekdays[weekday] = {'workout_type': 'Rest', 'duration': 0, 'intensity': 'Low', 'exercises': []}
+                continue
+            # Most common session for the weekday; ties go to the earliest day
+            signatures = [self._signature(day) for day in days]
+            common = Counter(signatures).most_common(1)[0][0]
+            weekdays[weekday] = days[signatures.index(common)]
+
+        return {
+            'month': month,
+            'year': year,
+            'weekdays': weekdays,
+            'safety_guidelines': plan.get('safety_guidelines') or []
+        }
+
+    def prompt_lines(self, summary: Dict[str, Any]) -> str:
+        """One line per weekday: "Monday: Upper Body, Moderate, 45 min [3 7 12]"."""
+        lines = []
+        for weekday, day in summary['weekdays'].items():
+            ids = ' '.join(str(e['exercise_id']) for e in day.get('exercises', []) if e.get('exercise_id') is not None)
+            lines.append(f"{weekday}: {day.get('workout_type', 'Rest')}, {day.get('intensity', '')}, "
+                         f"{day.get('duration', 0)} min [{ids}]")
+        return '\n'.join(lines)
+
+    def apply(self, summary: Dict[str, Any], delta: Dict[str, Any], month: int, year: int) -> Dict[str, Any]:
+        """Expand the updated weekday templates into the new month's plan."""
+        delta = delta if isinstance(delta, dict) else {}
+        weekdays = copy.deepcopy(summary['weekdays'])
+
+        for weekday, changes in (delta.get('weekday_changes') or {}).items():
+            weekday = str(weekday).strip().capitalize()
+            if weekday not in weekdays or not isinstance(changes, dict):
+                logger.warning(f"Ignoring change for unknown weekday {weekday!r}")
+                continue
+            weekdays[weekday].update({k: v for k, v in changes.items() if k in DAY_FIELDS})
+
+        swaps = {}
+        for old, new in (delta.get('exercise_swaps') or {}).items():
+            try:
+                swaps[int(old)] = int(new)
+            except (TypeError, ValueError):
+                continue
+        if swaps:
+            for day in weekdays.values():
+                for exercise in day.get('exercises') or []:
+                    if isinstance(exercise, dict) and exercise.get('exercise_id') in swaps:
+                        exercise['exercise_id'] = swaps[exercise['exercise_id']]
+                        # The resolver fills the new name from the id
+                        exercise.pop('name', None)
+
+        daily_workouts = {}
+        for day in range(1, calendar.monthrange(year, month)[1] + 1):
+            weekday = WEEKDAYS[calendar.weekday(year, month, day)]
+            daily_workouts[str(day)] = copy.deepcopy(weekdays[weekday])
+
+        overview = delta.get('monthly_overview') if isinstance(delta.get('monthly_overview'), dict) else {}
+        overview.update({'month': month, 'year': year})
+        if summary.get('month') and summary.get('year'):
+            overview['based_on'] = {'month': summary['month'], 'year': summary['year']}
+        return {
+            'monthly_overview': overview,
+            'daily_workouts': daily_workouts,
+            'safety_guidelines': delta.get('safety_guidelines') or summary['safety_guidelines']
+        }
+
+    def _template_day(self, workout: Dict[str, Any]) -> Dict[str, Any]:
+        day = {k: copy.deepcopy(workout[k]) for k in DAY_FIELDS if k in workout}
+        day['exercises'] = [
+            {k: e[k] for k in EXERCISE_FIELDS if e.get(k) not in (None, '')}
+            for e in workout.get('exercises') or [] if isinstance(e, dict)
+        ]
+        return day
+
+    def _signature(self, day: Dict[str, Any]) -> tuple:
+        return (day.get('workout_type'), tuple(e.get('exercise_id') or e.get('name') for e in day['exercises']))
+
+
+# Global delta service instance
+workout_delta = WorkoutDeltaService()
@@ -0,0 +1,159 @@
+import re
+import calendar
+import logging
+from datetime import date
+from typing import Dict, Any
+
+from services.shopping_list_service import shopping_list_aggregator
+from services.rolling_plan_service import HORIZON_KEY
+
+logger = logging.getLogger(__name__)
+
+MEAL_TYPES = ['breakfast', 'lunch', 'dinner']
+MACRO_KEYS = ['calories', 'protein', 'carbs', 'fat']
+
+
+class PlanDerivationService:
+    """
+    Post-processing stage that computes plan fields which follow directly
+    from the calendar or from the per-meal data.
+    The model is no longer asked for these fields; whatever it sends is
+    overwritten here so the stored plan is always internally consistent.
+    """
+
+    def derive_workout_fields(self, data: Dict[str, Any], month: int, year: int) -> Dict[str, Any]:
+        """
+        Compute day names and workout/rest day counts for a workout plan.
+        Rest days are counted up to the rolling horizon, so days of a rolling
+        plan that are not generated yet are not counted as rest.
+        """
+        days_in_month = calendar.monthrange(year, month)[1]
+        daily_workouts = data.get('daily_workouts', {})
+
+        for day_str, workout in daily_workouts.items():
+            day = self._parse_day(day_str, days_in_month)
+            if day is None or not isinstance(workout, dict):
+                continue
+            workout['day_of_week'] = calendar.day_name[calendar.weekday(year, month, day)]
+
+        workout_days = self.count_workout_days(daily_workouts)
+
+        overview = data.get('monthly_overview')
+        if not isinstance(overview, dict):
+            overview = {}
+        overview['month'] = month
+        overview['year'] = year
+        overview['total_days'] = days_in_month
+        overview['workout_days'] = workout_days
+        overview['rest_days'] = self._planned_days(overview, days_in_month) - workout_days
+        data['monthly_overview'] = overview
+
+        return data
+
+    def derive_meal_fields(self, data: Dict[str, Any], month: int, year: int) -> Dict[str, Any]:
+        """Compute dates, day names, daily totals, averages and shopping lists for a meal plan."""
+        days_in_month = calendar.monthrange(year, month)[1]
+        daily_meals = data.get('daily_meals', {})
+
+        totals_by_day = []
+        for day_str, day_data in daily_meals.items():
+            day = self._parse_day(day_str, days_in_month)
+            if day is None or not isinstance(day_data, dict):
+                continue
+
+            day_data['date'] = date(year, month, day).isoformat()
+            day_data['day_of_week'] = calendar.day_name[calendar.weekday(year, month, day)]
+
+            totals = self.compute_daily_totals(day_data)
+            # Keep non-derivable extras (fiber, water) if the model provided them
+            existing = day_data.get('daily_totals')
+            if isinstance(existing, dict):
+                for key, value in existing.items():
+                    if key not in totals:
+                        totals[key] = value
+            day_data['daily_totals'] = totals
+            totals_by_day.append(totals)
+
+        overview = data.get('monthly_overview')
+        if not isinstance(overview, dict):
+            overview = {}
+        overview['month'] = month
+        overview['year'] = year
+        overview['total_days'] = days_in_month
+        if totals_by_day:
+            overview['average_daily_calories'] = round(
+                sum(t['calories'] for t in totals_by_day) / len(totals_by_day)
+            )
+        data['monthly_overview'] = overview
+
+        balance = data.get('nutritional_balance')
+        if not isinstance(balance, dict):
+            balance = {}
+        if totals_by_day:
+            count = len(totals_by_day)
+            balance['monthly_protein_avg'] = round(sum(t['protein'] for t in totals_by_day) / count)
+            balance['monthly_carb_avg'] = round(sum(t['carbs'] for t in totals_by_day) / count)
+            balance['monthly_fat_avg'] = round(sum(t['fat'] for t in totals_by_day) / count)
+        data['nutritional_balance'] = balance
+
+        data['weekly_shopping_lists'] = self.build_weekly_shopping_lists(daily_meals, days_in_month)
+
+        return data
+
+    def count_workout_days(self, daily_workouts: Dict[str, Any]) -> int:
+        """Count days that are not rest days."""
+        count = 0
+        for workout in daily_workouts.values():
+            if not isinstance(workout, dict):
+                continue
+            workout_type = str(workout.get('workout_type', 'Rest')).strip().lower()
+            if workout_type and workout_type != 'rest':
+                count += 1
+        return count
+
+    def compute_daily_totals(self, day_data: Dict[str, Any]) -> Dict[str, int]:
+        """Sum calories and macros over the main meals and snacks of a day."""
+        totals = {key: 0.0 for key in MACRO_KEYS}
+
+        for meal_type in MEAL_TYPES:
+            meal = day_data.get(meal_type)
+            if not isinstance(meal, dict):
+                continue
+            for key in MACRO_KEYS:
+                totals[key] += self.parse_amount(meal.get(key))
+
+        for snack in day_data.get('snacks', []) or []:
+            if not isinstance(snack, dict):
+                continue
+            for key in MACRO_KEYS:
+                totals[key] += self.parse_amount(snack.get(key))
+
+        return {key: int(round(value)) for key, value in totals.items()}
+
+    def build_weekly_shopping_lists(self, daily_meals: Dict[str, Any], days_in_month: int) -> Dict[str, Any]:
+        """Merged ingredient quantities for each week of the month."""
+        return shopping_list_aggregator.build(daily_meals, days_in_month)
+
+    def parse_amount(self, value: Any) -> float:
+        """Parse numbers that may arrive as strings such as "25g" or "400 kcal"."""
+        if isinstance(value, bool) or value is None:
+            return 0.0
+        if isinstance(value, (int, float)):
+            return float(value)
+        match = re.search(r'\d+(?:\.\d+)?', str(value))
+        return float(match.group()) if match else 0.0
+
+    def _planned_days(self, overview: Dict[str, Any], days_in_month: int) -> int:
+        """Days the plan covers: the rolling horizon if set, else the whole month."""
+        horizon = overview.get(HORIZON_KEY)
+        if isinstance(horizon, int) and not isinstance(horizon, bool) and 1 <= horizon < days_in_month:
+            return horizon
+        return days_in_month
+
+    def _parse_day(self, day_str: Any, days_in_month: int):
+        """Return the day number for a daily_* key, or None if it is not a valid day."""
+        try:
+            day = int(day_str)
+        except (TypeError, ValueError):
+            return None
+        return day if 1 <= day <= days_in_month else None
@@ -0,0 +1,322 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from services.plan_codec_service import PlanStorageCodec, plan_codec
+from services.serialization_service import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(__file__), "../data/plan_store.db")
+
+PLAN_TYPES = ('workout', 'meal')
+# Generation states, in pipeline order; failed can follow any of them
+PLAN_STATES = ('queued', 'generating', 'parsed', 'filtered', 'delivered', 'failed')
+DAILY_SECTIONS = {'workout': 'daily_workouts', 'meal': 'daily_meals'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS plans (
+    user_id TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    plan_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT,
+    timings TEXT NOT NULL DEFAULT '{}',
+    started_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    overview BLOB,
+    request TEXT,
+    PRIMARY KEY (user_id, year, month, plan_type)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS plan_days (
+    user_id TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    plan_type TEXT NOT NULL,
+    day TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (user_id, year, month, plan_type, day)
+) WITHOUT ROWID;
+"""
+
+
+def entry_etag(*blobs: bytes) -> str:
+    """Strong ETag over stored entries; computed from the bytes, so nothing is decoded."""
+    digest = hashlib.blake2b(digest_size=12)
+    for blob in blobs:
+        digest.update(len(blob).to_bytes(4, 'big'))
+        digest.update(blob)
+    return f'"{digest.hexdigest()}"'
+
+
+class PlanStore:
+    """
+    Embedded SQLite store (WAL mode) for generated plans and their
+    generation state, keyed on (user_id, year, month, plan_type).
+    A stored plan is split into an overview row (everything except the
+    daily section) and one row per day, each written with the plan
+    storage codec, so single days can be read without the whole month.
+    """
+
+    def __init__(self, path: Optional[str] = None, codec: Optional[PlanStorageCodec] = None):
+        self.path = path or os.getenv('PLAN_STORE_PATH', DEFAULT_STORE_PATH)
+        self.codec = codec or plan_codec
+        # One shared connection; sqlite calls are sub-millisecond so a lock is enough.
+        # It is opened on first use (or by open() at startup), not on import.
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """The shared connection, opened if needed. Callers hold self._lock."""
+        if self._connection is None:
+            self._connection = self._connect()
+        return self._connection
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        # Stores created before the request column existed
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(plans)")]
+        if 'request' not in columns:
+            conn.execute("ALTER TABLE plans ADD COLUMN request TEXT")
+        logger.info(f"🗄️ Plan store ready at {self.path}")
+        return conn
+
+    def open(self):
+        """Open the database now, so a bad path fails at startup instead of on the first request."""
+        with self._lock:
+            if self._connection is None:
+                self._connection = self._connect()
+
+    def mark(
+        self,
+        user_id: str,
+        year: int,
+        month: int,
+        plan_type: str,
+        status: str,
+        error: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Record a generation state. queued/generating start a new run; later
+        states add their elapsed milliseconds since the run started to timings.
+        """
+        if status not in PLAN_STATES:
+            raise ValueError(f"Unknown plan state: {status}")
+        now = time.time()
+        key = (user_id, year, month, plan_type)
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT started_at, timings, status FROM plans "
+                "WHERE user_id=? AND year=? AND month=? AND plan_type=?", key
+            ).fetchone()
+
+            new_run = row is None or status == 'queued' or (status == 'generating' and row[2] != 'queued')
+            started_at = now if new_run else row[0]
+            timings = {} if new_run else loads(row[1])
+            timings[status] = round((now - started_at) * 1000)
+
+            self._conn.execute(
+                "INSERT INTO plans (user_id, year, month, plan_type, status, error, timings, started_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (user_id, year, month, plan_type) DO UPDATE SET "
+                "status=excluded.status, error=excluded.error, timings=excluded.timings, "
+                "started_at=excluded.started_at, updated_at=excluded.updated_at",
+                (*key, status, error, dumps(timings).decode('utf-8'), started_at, now)
+            )
+        return {'status': status, 'timings': timings}
+
+    def queue(self, user_id: str, year: int, month: int, plan_type: str, request: Dict[str, Any]):
+        """Queue a plan for background generation with the request it should be generated from."""
+        self.mark(user_id, year, month, plan_type, 'queued')
+        with self._lock:
+            self._conn.execute(
+                "UPDATE plans SET request=? WHERE user_id=? AND year=? AND month=? AND plan_type=?",
+                (dumps(request).decode('utf-8'), user_id, year, month, plan_type)
+            )
+
+    def queued(self, limit: int = 1) -> List[Tuple[str, int, int, str, Dict[str, Any]]]:
+        """Oldest queued plans as (user_id, year, month, plan_type, request)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT user_id, year, month, plan_type, request FROM plans "
+                "WHERE status='queued' ORDER BY started_at LIMIT ?", (limit,)
+            ).fetchall()
+        return [(*row[:4], loads(row[4]) if row[4] else {}) for row in rows]
+
+    def month_plans(self, year: int, month: int) -> List[Dict[str, Any]]:
+        """State and request of every plan stored or queued for a month."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT user_id, plan_type, status, timings, request FROM plans WHERE year=? AND month=?",
+                (year, month)
+            ).fetchall()
+        return [{
+            'user_id': row[0],
+            'plan_type': row[1],
+            'status': row[2],
+            'timings': loads(row[3]),
+            'request': loads(row[4]) if row[4] else None
+        } for row in rows]
+
+    def save_plan(
+        self,
+        user_id: str,
+        year: int,
+        month: int,
+        plan_type: str,
+        plan: Dict[str, Any],
+        request: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Replace the stored plan: overview row plus one row per day, in one
+        transaction. request is the generation request the plan came from.
+        """
+        section = DAILY_SECTIONS[plan_type]
+        overview = {k: v for k, v in plan.items() if k != section}
+        days = plan.get(section) or {}
+        key = (user_id, year, month, plan_type)
+        now = time.time()
+
+        day_rows = [(*key, str(day), self.codec.encode(value)) for day, value in days.items()]
+        # Key order and day order are kept so get_plan returns the plan exactly as saved
+        overview_blob = self.codec.encode({
+            'overview': overview,
+            'order': list(plan),
+            'days': [str(day) for day in days]
+        })
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "INSERT INTO plans (user_id, year, month, plan_type, status, timings, started_at, updated_at, overview, request) "
+                    "VALUES (?, ?, ?, ?, 'filtered', '{}', ?, ?, ?, ?) "
+                    "ON CONFLICT (user_id, year, month, plan_type) DO UPDATE SET "
+                    "overview=excluded.overview, updated_at=excluded.updated_at, "
+                    "request=COALESCE(excluded.request, plans.request)",
+                    (*key, now, now, overview_blob, dumps(request).decode('utf-8') if request is not None else None)
+                )
+                self._conn.execute(
+                    "DELETE FROM plan_days WHERE user_id=? AND year=? AND month=? AND plan_type=?", key
+                )
+                self._conn.executemany("INSERT INTO plan_days VALUES (?, ?, ?, ?, ?, ?)", day_rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def status(self, user_id: str, year: int, month: int, plan_type: str) -> Optional[Dict[str, Any]]:
+        """Generation state of one plan from the primary-key index, or None if unknown."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, error, timings, started_at, updated_at, overview IS NOT NULL FROM plans "
+                "WHERE user_id=? AND year=? AND month=? AND plan_type=?",
+                (user_id, year, month, plan_type)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'status': row[0],
+            'error': row[1],
+            'timings': loads(row[2]),
+            'started_at': row[3],
+            'updated_at': row[4],
+            'has_plan': bool(row[5])
+        }
+
+    def get_plan(self, user_id: str, year: int, month: int, plan_type: str) -> Optional[Dict[str, Any]]:
+        """Reassemble a stored plan in its original key order, or None if none is stored."""
+        key = (user_id, year, month, plan_type)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT overview FROM plans WHERE user_id=? AND year=? AND month=? AND plan_type=?", key
+            ).fetchone()
+            if row is None or row[0] is None:
+                return None
+            day_rows = self._conn.execute(
+                "SELECT day, data FROM plan_days WHERE user_id=? AND year=? AND month=? AND plan_type=?", key
+            ).fetchall()
+
+        stored = self.codec.decode(row[0])
+        blobs = dict(day_rows)
+        section = DAILY_SECTIONS[plan_type]
+        days = {day: self.codec.decode(blobs[day]) for day in stored['days'] if day in blobs}
+        return {key: days if key == section else stored['overview'][key] for key in stored['order']}
+
+    def pregenerated_plan(
+        self,
+        user_id: str,
+        year: int,
+        month: int,
+        plan_type: str,
+        request: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        A plan generated ahead of time and not yet delivered, if it was
+        generated from exactly this request; None otherwise.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, request FROM plans WHERE user_id=? AND year=? AND month=? AND plan_type=?",
+                (user_id, year, month, plan_type)
+            ).fetchone()
+        if row is None or row[0] != 'filtered' or not row[1] or loads(row[1]) != request:
+            return None
+        return self.get_plan(user_id, year, month, plan_type)
+
+    def read_overview(self, user_id: str, year: int, month: int, plan_type: str) -> Optional[bytes]:
+        """Encoded overview entry of a stored plan, without decoding it."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT overview FROM plans WHERE user_id=? AND year=? AND month=? AND plan_type=?",
+                (user_id, year, month, plan_type)
+            ).fetchone()
+        return row[0] if row else None
+
+    def read_days(
+        self,
+        user_id: str,
+        year: int,
+        month: int,
+        plan_type: str,
+        start: int,
+        end: int
+    ) -> List[Tuple[str, bytes]]:
+        """Encoded (day, entry) rows for days start..end, in day order, without decoding them."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT day, data FROM plan_days WHERE user_id=? AND year=? AND month=? AND plan_type=? "
+                "AND CAST(day AS INTEGER) BETWEEN ? AND ? ORDER BY CAST(day AS INTEGER)",
+                (user_id, year, month, plan_type, start, end)
+            ).fetchall()
+        return rows
+
+    def decode_overview(self, blob: bytes) -> Dict[str, Any]:
+        """Plan fields other than the daily section."""
+        return self.codec.decode(blob)['overview']
+
+    def decode_day(self, blob: bytes) -> Any:
+        return self.codec.decode(blob)
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+# Global plan store, opened on first use or by the app's startup hook
+plan_store = PlanStore()
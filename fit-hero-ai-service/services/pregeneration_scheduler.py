@@ -0,0 +1,198 @@
+import time
+import asyncio
+import calendar
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable
+
+from services.plan_store_service import PlanStore, plan_store
+
+logger = logging.getLogger(__name__)
+
+MINUTES_PER_DAY = 24 * 60
+# States of a plan that is ready to be served
+DONE_STATES = ('filtered', 'delivered')
+
+
+def parse_windows(spec: str) -> List[Tuple[int, int]]:
+    """
+    "00:00-06:00,22:30-23:30" -> minute-of-day segments [(0, 360), (1350, 1410)].
+    A window that wraps midnight ("23:00-02:00") becomes two segments; an
+    empty spec means always.
+    """
+    segments = []
+    for part in filter(None, (p.strip() for p in (spec or '').split(','))):
+        start_text, _, end_text = part.partition('-')
+        start, end = (int(h) * 60 + int(m) for h, m in (t.strip().split(':') for t in (start_text, end_text)))
+        if end > start:
+            segments.append((start, end))
+        else:
+            segments.extend([(start, MINUTES_PER_DAY), (0, end)])
+    return segments or [(0, MINUTES_PER_DAY)]
+
+
+def next_month(year: int, month: int) -> Tuple[int, int]:
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+class PregenerationScheduler:
+    """
+    Spreads next month's plan generation over the end of the current month.
+    During the last lead_days days of a month, every user whose plan for
+    this month was generated successfully gets next month's plan queued in
+    the plan store, with their stored request moved to the new month. Queued
+    plans are generated one at a time, at most rate_per_minute, and only
+    inside the off-peak windows (UTC). The generation endpoints then serve
+    those plans from the store instead of calling the model.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[str, Dict[str, Any]], Awaitable[None]],
+        store: Optional[PlanStore] = None,
+        lead_days: int = 3,
+        windows: str = "00:00-06:00",
+        rate_per_minute: float = 2.0,
+        poll_seconds: float = 30.0,
+        clock: Callable[[], datetime] = datetime.utcnow
+    ):
+        self.runner = runner
+        self.store = store or plan_store
+        self.lead_days = lead_days
+        self.windows_spec = windows
+        self.windows = parse_windows(windows)
+        self.rate_per_minute = rate_per_minute
+        self.poll_seconds = poll_seconds
+        self.clock = clock
+        self._last_start: Optional[float] = None
+        self._enqueued_on = None
+        self._task: Optional[asyncio.Task] = None
+
+    def in_window(self, now: datetime) -> bool:
+        minute = now.hour * 60 + now.minute + now.second / 60
+        return any(start <= minute < end for start, end in self.windows)
+
+    def in_pregeneration_period(self, now: datetime) -> bool:
+        return calendar.monthrange(now.year, now.month)[1] - now.day < self.lead_days
+
+    def enqueue(self, plan_type: str, request: Dict[str, Any]):
+        """Queue one plan explicitly (e.g. a user the store has no history for)."""
+        self.store.queue(request['user_id'], request['year'], request['month'], plan_type, request)
+
+    def enqueue_renewals(self, now: datetime) -> int:
+        """Queue next month's plan for every plan generated successfully this month."""
+        year, month = next_month(now.year, now.month)
+        known = {(p['user_id'], p['plan_type']) for p in self.store.month_plans(year, month)}
+        queued = 0
+        for plan in self.store.month_plans(now.year, now.month):
+            if plan['request'] is None or plan['status'] not in DONE_STATES:
+                continue
+            if (plan['user_id'], plan['plan_type']) in known:
+                continue
+            self.enqueue(plan['plan_type'], dict(plan['request'], month=month, year=year))
+            queued += 1
+        return queued
+
+    async def tick(self, now: Optional[datetime] = None) -> bool:
+        """One scheduling step; returns True if a plan was generated."""
+        now = now or self.clock()
+        if self.in_pregeneration_period(now) and self._enqueued_on != now.date():
+            queued = self.enqueue_renewals(now)
+            self._enqueued_on = now.date()
+            logger.info(f"📆 Queued {queued} plans for pre-generation")
+
+        if not self.in_window(now):
+            return False
+        if self._last_start is not None and time.monotonic() - self._last_start < 60 / self.rate_per_minute:
+            return False
+        jobs = self.store.queued(limit=1)
+        if not jobs:
+            return False
+
+        user_id, year, month, plan_type, request = jobs[0]
+        self._last_start = time.monotonic()
+        self.store.mark(user_id, year, month, plan_type, 'generating')
+        try:
+            await self.runner(plan_type, request)
+        except Exception as e:
+            logger.error(f"Pre-generation of {plan_type} plan for {user_id} {month}/{year} failed: {e}")
+            self.store.mark(user_id, year, month, plan_type, 'failed', error=str(e))
+        return True
+
+    async def run(self):
+        while True:
+            try:
+                generated = await self.tick()
+            except Exception as e:
+                logger.error(f"Pre-generation scheduler step failed: {e}")
+                generated = False
+            if not generated:
+                await asyncio.sleep(self.poll_seconds)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+            logger.info(f"🌙 Pre-generation scheduler started: last {self.lead_days} days, "
+                        f"windows {self.windows_spec} UTC, {self.rate_per_minute}/min")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _next_boundary(self, now: datetime) -> datetime:
+        """Next time a window opens or closes (or midnight)."""
+        day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        minute = (now - day_start).total_seconds() / 60
+        boundaries = sorted({b for segment in self.windows for b in segment if 0 < b < MINUTES_PER_DAY} | {MINUTES_PER_DAY})
+        return day_start + timedelta(minutes=next(b for b in boundaries if b > minute))
+
+    def finish_time(self, now: datetime, seconds: float) -> datetime:
+        """When `seconds` of work done only inside the windows will be finished."""
+        t, left = now, seconds
+        while left > 0:
+            boundary = self._next_boundary(t)
+            if self.in_window(t):
+                span = (boundary - t).total_seconds()
+                if span >= left:
+                    return t + timedelta(seconds=left)
+                left -= span
+            t = boundary
+        return t
+
+    def progress(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Progress of next month's pre-generation, with an ETA for the queued plans."""
+        now = now or self.clock()
+        year, month = next_month(now.year, now.month)
+        plans = self.store.month_plans(year, month)
+
+        by_status: Dict[str, int] = {}
+        durations = []
+        for plan in plans:
+            by_status[plan['status']] = by_status.get(plan['status'], 0) + 1
+            timings = plan['timings']
+            if 'filtered' in timings and 'generating' in timings:
+                durations.append((timings['filtered'] - timings['generating']) / 1000)
+
+        completed = sum(by_status.get(state, 0) for state in DONE_STATES)
+        remaining = by_status.get('queued', 0) + by_status.get('generating', 0)
+        average = sum(durations) / len(durations) if durations else None
+        seconds_per_plan = max(60 / self.rate_per_minute, average or 0)
+        return {
+            "target": {"year": year, "month": month},
+            "active": self.in_pregeneration_period(now),
+            "in_window": self.in_window(now),
+            "windows_utc": self.windows_spec,
+            "rate_per_minute": self.rate_per_minute,
+            "total": len(plans),
+            "by_status": by_status,
+            "completed": completed,
+            "remaining": remaining,
+            "percent_complete": round(100 * completed / len(plans), 1) if plans else None,
+            "average_generation_seconds": round(average, 1) if average is not None else None,
+            "eta": self.finish_time(now, remaining * seconds_per_plan).isoformat() if remaining else None
+        }
@@ -0,0 +1,171 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Callable, Optional, Union
+
+from services.rate_limiter_service import model_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 'interactive'
+BATCH = 'batch'
+LANES = (INTERACTIVE, BATCH)
+# Waits kept per lane for the percentile in metrics()
+WAIT_SAMPLES = 500
+
+# Lane of the request being handled; endpoints set it, model calls read it
+current_lane: ContextVar[str] = ContextVar('current_lane', default=INTERACTIVE)
+
+
+def use_lane(lane: str):
+    """Run the rest of the current request (and tasks it starts) in `lane`."""
+    if lane not in LANES:
+        raise ValueError(f"Unknown priority lane {lane!r}; expected one of {', '.join(LANES)}")
+    current_lane.set(lane)
+
+
+class PriorityLaneScheduler:
+    """
+    Admission for model calls in two priority lanes. A player waiting on
+    /activate-ai is interactive; renewals and pre-generation are batch.
+    Queued interactive calls are admitted before queued batch calls, and
+    `interactive_reserved` slots are never given to batch. Batch cannot
+    starve: it gets the next slot after `batch_share_every` interactive
+    admissions in a row while it waits, or as soon as its oldest call has
+    waited `batch_max_wait_seconds`. Calls already running are never
+    interrupted, so preemption is at admission only. Capacity defaults to
+    the rate limiter's adaptive concurrency limit, so calls are ordered
+    here rather than in the limiter's own queue.
+    """
+
+    def __init__(
+        self,
+        capacity: Union[int, Callable[[], int], None] = None,
+        interactive_reserved: Optional[int] = None,
+        batch_share_every: Optional[int] = None,
+        batch_max_wait_seconds: Optional[float] = None
+    ):
+        if capacity is None:
+            capacity = lambda: model_rate_limiter.concurrency.limit
+        self._capacity = capacity if callable(capacity) else (lambda: capacity)
+        self.interactive_reserved = (interactive_reserved if interactive_reserved is not None
+                                     else int(os.getenv('LANE_INTERACTIVE_RESERVED', '1')))
+        self.batch_share_every = batch_share_every or int(os.getenv('LANE_BATCH_SHARE_EVERY', '4'))
+        self.batch_max_wait_seconds = (batch_max_wait_seconds if batch_max_wait_seconds is not None
+                                       else float(os.getenv('LANE_BATCH_MAX_WAIT_SECONDS', '60')))
+        self._queues: Dict[str, deque] = {lane: deque() for lane in LANES}
+        self.in_flight = {lane: 0 for lane in LANES}
+        self.admitted = {lane: 0 for lane in LANES}
+        self.starvation_admissions = 0
+        self._waits: Dict[str, deque] = {lane: deque(maxlen=WAIT_SAMPLES) for lane in LANES}
+        self._interactive_streak = 0
+
+    def capacity(self) -> int:
+        return max(int(self._capacity()), 1)
+
+    def batch_limit(self) -> int:
+        """Slots batch may hold at once; at least one so it always makes progress."""
+        return max(self.capacity() - self.interactive_reserved, 1)
+
+    @asynccontextmanager
+    async def slot(self, lane: Optional[str] = None):
+        """Wait for a slot in `lane` (default: the current request's lane) and hold it."""
+        lane = lane or current_lane.get()
+        if lane not in LANES:
+            raise ValueError(f"Unknown priority lane {lane!r}")
+        waiter = asyncio.get_running_loop().create_future()
+        queued_at = time.monotonic()
+        self._queues[lane].append((waiter, queued_at))
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Admitted and cancelled in the same step: give the slot back
+                self._release(lane)
+            else:
+                self._remove(lane, waiter)
+            raise
+        self._waits[lane].append(time.monotonic() - queued_at)
+        try:
+            yield
+        finally:
+            self._release(lane)
+
+    def queued(self) -> int:
+        """Calls waiting for a slot in any lane."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _remove(self, lane: str, waiter: asyncio.Future):
+        self._queues[lane] = deque(entry for entry in self._queues[lane] if entry[0] is not waiter)
+
+    def _release(self, lane: str):
+        self.in_flight[lane] -= 1
+        self._dispatch()
+
+    def _next_lane(self) -> Optional[str]:
+        if sum(self.in_flight.values()) >= self.capacity():
+            return None
+        interactive = bool(self._queues[INTERACTIVE])
+        batch = bool(self._queues[BATCH]) and self.in_flight[BATCH] < self.batch_limit()
+        if interactive and batch:
+            waited = time.monotonic() - self._queues[BATCH][0][1]
+            if self._interactive_streak >= self.batch_share_every or waited >= self.batch_max_wait_seconds:
+                self.starvation_admissions += 1
+                return BATCH
+            return INTERACTIVE
+        if interactive:
+            return INTERACTIVE
+        if batch:
+            return BATCH
+        return None
+
+    def _dispatch(self):
+        """Admit queued calls while there are free slots."""
+        while True:
+            lane = self._next_lane()
+            if lane is None:
+                return
+            waiter, _ = self._queues[lane].popleft()
+            if waiter.done():
+                continue
+            if lane == INTERACTIVE and self._queues[BATCH]:
+                self._interactive_streak += 1
+            elif lane == BATCH:
+                self._interactive_streak = 0
+            self.in_flight[lane] += 1
+            self.admitted[lane] += 1
+            waiter.set_result(None)
+
+    def metrics(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        lanes = {}
+        for lane in LANES:
+            waits = sorted(self._waits[lane])
+            queue = self._queues[lane]
+            lanes[lane] = {
+                "queue_depth": len(queue),
+                "in_flight": self.in_flight[lane],
+                "admitted": self.admitted[lane],
+                "oldest_wait_seconds": round(now - queue[0][1], 2) if queue else 0.0,
+                "average_wait_seconds": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                "p95_wait_seconds": round(waits[int(0.95 * (len(waits) - 1))], 3) if waits else 0.0,
+                "max_wait_seconds": round(waits[-1], 3) if waits else 0.0
+            }
+        return {
+            "capacity": self.capacity(),
+            "interactive_reserved": self.interactive_reserved,
+            "batch_limit": self.batch_limit(),
+            "batch_share_every": self.batch_share_every,
+            "batch_max_wait_seconds": self.batch_max_wait_seconds,
+            "starvation_admissions": self.starvation_admissions,
+            "lanes": lanes
+        }
+
+
+# Global scheduler in front of every model call in the process
+lane_scheduler = PriorityLaneScheduler()
@@ -0,0 +1,205 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, Any, Callable, Awaitable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Rough prompt size in tokens when the API has not reported usage yet
+CHARS_PER_TOKEN = 4
+# Output budget reserved per call until the response reports real usage
+DEFAULT_OUTPUT_TOKENS = 4000
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """429 / RESOURCE_EXHAUSTED from the model API, without importing google.api_core."""
+    if getattr(error, 'code', None) == 429 or type(error).__name__ in ('ResourceExhausted', 'TooManyRequests'):
+        return True
+    text = str(error)
+    return '429' in text or 'RESOURCE_EXHAUSTED' in text or 'quota' in text.lower()
+
+
+class TokenBucket:
+    """Classic token bucket: `capacity` tokens, refilled at `rate_per_minute`."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def take(self, amount: float) -> float:
+        """Wait until `amount` tokens are available and take them; returns the seconds waited."""
+        # A single call larger than the bucket waits for a full bucket instead of forever
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+    def adjust(self, amount: float):
+        """Return (positive) or charge (negative) tokens after the real cost is known."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def available(self) -> float:
+        self._refill()
+        return self.tokens
+
+
+class AIMDConcurrency:
+    """
+    Concurrency limit with additive increase / multiplicative decrease:
+    each successful call adds increase/limit (about +1 per limit's worth of
+    calls); a 429 or a latency spike multiplies the limit by `decrease`,
+    at most once per cooldown so one burst of errors counts once.
+    """
+
+    def __init__(
+        self,
+        initial: float = 2,
+        minimum: float = 1,
+        maximum: float = 16,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        cooldown_seconds: float = 5.0
+    ):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown_seconds = cooldown_seconds
+        self.in_flight = 0
+        self.decreases = 0
+        self._last_decrease = float('-inf')
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < max(int(self.limit), 1))
+            self.in_flight += 1
+
+    def congested(self) -> bool:
+        """True while every slot is taken or within the cooldown after a decrease."""
+        return (self.in_flight >= max(int(self.limit), 1)
+                or time.monotonic() - self._last_decrease < self.cooldown_seconds)
+
+    async def release(self, congested: bool):
+        async with self._condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if congested:
+                if now - self._last_decrease >= self.cooldown_seconds:
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    self._last_decrease = now
+                    self.decreases += 1
+                    logger.warning(f"🚦 Model concurrency limit decreased to {self.limit:.2f}")
+            else:
+                self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+            self._condition.notify_all()
+
+
+class ModelRateLimiter:
+    """
+    Gate in front of every model call: token buckets for requests/min and
+    tokens/min plus AIMD-adapted concurrency. Token use is estimated from
+    the prompt before the call and corrected with the usage the response
+    reports. A call counts as congestion when it fails with a 429 or takes
+    longer than latency_spike_factor times the running average for its
+    label (plan type), since month plans and single days differ tenfold.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        initial_concurrency: Optional[float] = None,
+        max_concurrency: Optional[float] = None,
+        latency_spike_factor: float = 2.5,
+        latency_smoothing: float = 0.2
+    ):
+        rpm = requests_per_minute or float(os.getenv('MODEL_REQUESTS_PER_MINUTE', '60'))
+        tpm = tokens_per_minute or float(os.getenv('MODEL_TOKENS_PER_MINUTE', '1000000'))
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.concurrency = AIMDConcurrency(
+            initial=initial_concurrency or float(os.getenv('MODEL_INITIAL_CONCURRENCY', '2')),
+            maximum=max_concurrency or float(os.getenv('MODEL_MAX_CONCURRENCY', '16'))
+        )
+        self.latency_spike_factor = latency_spike_factor
+        self.latency_smoothing = latency_smoothing
+        self.latency: Dict[str, float] = {}
+        self.counters = {'calls': 0, 'errors': 0, 'rate_limited': 0, 'latency_spikes': 0, 'queued_seconds': 0.0}
+
+    def estimate_tokens(self, prompt: str) -> int:
+        return len(prompt) // CHARS_PER_TOKEN + DEFAULT_OUTPUT_TOKENS
+
+    async def run(self, call: Callable[[], Awaitable[Any]], prompt: str, label: str = "plan") -> Any:
+        """Run one model call under the limits; exceptions are re-raised after accounting."""
+        estimate = self.estimate_tokens(prompt)
+        queued_at = time.monotonic()
+        await self.concurrency.acquire()
+        congested = False
+        try:
+            await self.requests.take(1)
+            await self.tokens.take(estimate)
+            started = time.monotonic()
+            self.counters['queued_seconds'] += started - queued_at
+            self.counters['calls'] += 1
+            try:
+                response = await call()
+            except Exception as e:
+                self.counters['errors'] += 1
+                if is_rate_limited(e):
+                    self.counters['rate_limited'] += 1
+                    congested = True
+                raise
+
+            congested = self._observe_latency(label, time.monotonic() - started)
+            usage = getattr(response, 'usage_metadata', None)
+            total = getattr(usage, 'total_token_count', None)
+            if total:
+                self.tokens.adjust(estimate - total)
+            return response
+        finally:
+            await self.concurrency.release(congested)
+
+    def _observe_latency(self, label: str, seconds: float) -> bool:
+        """Update the label's average latency; True if this call was a spike."""
+        average = self.latency.get(label)
+        spike = average is not None and seconds > average * self.latency_spike_factor
+        if spike:
+            self.counters['latency_spikes'] += 1
+        self.latency[label] = seconds if average is None else average + self.latency_smoothing * (seconds - average)
+        return spike
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "concurrency_limit": round(self.concurrency.limit, 2),
+            "in_flight": self.concurrency.in_flight,
+            "concurrency_decreases": self.concurrency.decreases,
+            "requests_per_minute": round(self.requests.rate * 60),
+            "requests_available": round(self.requests.available(), 1),
+            "tokens_per_minute": round(self.tokens.rate * 60),
+            "tokens_available": round(self.tokens.available()),
+            "average_latency_seconds": {label: round(value, 2) for label, value in self.latency.items()},
+            **{key: round(value, 2) if isinstance(value, float) else value for key, value in self.counters.items()}
+        }
+
+
+# Global limiter shared by every model call in the process
+model_rate_limiter = ModelRateLimiter()
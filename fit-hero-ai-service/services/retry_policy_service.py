@@ -0,0 +1,207 @@
+import os
+import re
+import time
+import random
+import asyncio
+import logging
+from typing import Dict, Any, Callable, Awaitable, Optional
+
+from services.rate_limiter_service import is_rate_limited
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMITED = 'rate_limited'
+SERVER_ERROR = 'server_error'
+DEADLINE = 'deadline'
+SAFETY_BLOCK = 'safety_block'
+EMPTY_RESPONSE = 'empty_response'
+PERMANENT = 'permanent'
+
+# Retries allowed per error kind (None: up to max_attempts). A safety block
+# is retried once since sampling may pass; bad requests are never retried.
+RETRY_LIMITS = {
+    RATE_LIMITED: None,
+    SERVER_ERROR: None,
+    DEADLINE: None,
+    EMPTY_RESPONSE: None,
+    SAFETY_BLOCK: 1,
+    PERMANENT: 0
+}
+# 429s back off longer: the limiter has already halved concurrency
+BACKOFF_MULTIPLIER = {RATE_LIMITED: 2.0}
+
+SERVER_ERROR_NAMES = ('InternalServerError', 'ServiceUnavailable', 'BadGateway', 'ServerError', 'InternalError')
+SAFETY_ERROR_NAMES = ('BlockedPromptException', 'StopCandidateException')
+SAFETY_FINISH_REASONS = ('SAFETY', 'BLOCKLIST', 'PROHIBITED_CONTENT', 'SPII', 'RECITATION')
+SERVER_ERROR_PATTERN = re.compile(r'\b(500|502|503)\b|INTERNAL|UNAVAILABLE')
+
+
+class ModelResponseError(Exception):
+    """A response that arrived but has no usable text (blocked or empty)."""
+
+    def __init__(self, kind: str, message: str):
+        super().__init__(message)
+        self.kind = kind
+
+
+def classify_error(error: Exception) -> str:
+    """Retry class of a model call failure, without importing google.api_core."""
+    if isinstance(error, ModelResponseError):
+        return error.kind
+    name = type(error).__name__
+    code = getattr(error, 'code', None)
+    if isinstance(error, asyncio.TimeoutError) or name in ('DeadlineExceeded', 'TimeoutError') or code == 504:
+        return DEADLINE
+    if is_rate_limited(error):
+        return RATE_LIMITED
+    if name in SAFETY_ERROR_NAMES:
+        return SAFETY_BLOCK
+    if (isinstance(code, int) and 500 <= code < 600) or name in SERVER_ERROR_NAMES:
+        return SERVER_ERROR
+    if SERVER_ERROR_PATTERN.search(str(error)):
+        return SERVER_ERROR
+    return PERMANENT
+
+
+def check_response(response) -> str:
+    """Text of a model response; raises ModelResponseError for blocked or empty ones."""
+    feedback = getattr(response, 'prompt_feedback', None)
+    if getattr(feedback, 'block_reason', None):
+        raise ModelResponseError(SAFETY_BLOCK, f"Prompt blocked: {feedback.block_reason}")
+    for candidate in getattr(response, 'candidates', None) or []:
+        reason = getattr(candidate, 'finish_reason', None)
+        if getattr(reason, 'name', str(reason)) in SAFETY_FINISH_REASONS:
+            raise ModelResponseError(SAFETY_BLOCK, f"Response stopped: {getattr(reason, 'name', reason)}")
+    try:
+        text = response.text
+    except ValueError as e:
+        # The SDK raises when the response has no text parts
+        raise ModelResponseError(EMPTY_RESPONSE, f"No text in response: {e}")
+    if not text or not text.strip():
+        raise ModelResponseError(EMPTY_RESPONSE, "Empty response text")
+    return text
+
+
+class RetryBudget:
+    """
+    Process-wide cap on retries: every first attempt deposits `ratio`
+    tokens and every retry spends one, so retries stay below about
+    `ratio` of traffic plus a `reserve` for quiet periods. When the model
+    API is failing for everyone this stops retries from multiplying load.
+    """
+
+    def __init__(self, ratio: float = 0.2, reserve: float = 10.0):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.balance = reserve
+
+    def deposit(self):
+        self.balance = min(self.reserve, self.balance + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.balance < 1:
+            return False
+        self.balance -= 1
+        return True
+
+
+class RetryPolicy:
+    """
+    Runs a model call with retries for transient failures: 429s, 5xx,
+    attempt timeouts, safety blocks (once) and empty responses. Delays are
+    full-jitter exponential backoff, and no attempt or delay runs past the
+    call's deadline. Retries also need a token from the shared budget.
+    """
+
+    def __init__(
+        self,
+        max_attempts: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: float = 30.0,
+        deadline_seconds: Optional[float] = None,
+        attempt_timeout: Optional[float] = None,
+        min_attempt_seconds: float = 1.0,
+        budget: Optional[RetryBudget] = None
+    ):
+        self.max_attempts = max_attempts or int(os.getenv('MODEL_RETRY_MAX_ATTEMPTS', '4'))
+        self.base_delay = base_delay if base_delay is not None else float(os.getenv('MODEL_RETRY_BASE_DELAY', '1.0'))
+        self.max_delay = max_delay
+        self.deadline_seconds = deadline_seconds or float(os.getenv('MODEL_RETRY_DEADLINE_SECONDS', '300'))
+        self.attempt_timeout = attempt_timeout or float(os.getenv('MODEL_ATTEMPT_TIMEOUT_SECONDS', '180'))
+        self.min_attempt_seconds = min_attempt_seconds
+        self.budget = budget or RetryBudget(ratio=float(os.getenv('MODEL_RETRY_BUDGET_RATIO', '0.2')))
+        self.counters: Dict[str, int] = {
+            'calls': 0, 'attempts': 0, 'retries': 0, 'recovered': 0,
+            'budget_exhausted': 0, 'deadline_exhausted': 0
+        }
+        self.errors: Dict[str, int] = {}
+
+    def backoff(self, kind: str, retry: int) -> float:
+        ceiling = min(self.max_delay, self.base_delay * BACKOFF_MULTIPLIER.get(kind, 1.0) * 2 ** retry)
+        return random.uniform(0, ceiling)
+
+    async def run(self, attempt: Callable[..., Awaitable[Any]], label: str = "plan", timed_call: bool = False) -> Any:
+        """
+        Await attempt() until it succeeds or the failure is not worth retrying.
+        With timed_call, attempt(timed) wraps only the model call in timed(...)
+        so time queued for a lane slot or the rate limiter is not cut short.
+        """
+        deadline = time.monotonic() + self.deadline_seconds
+        self.counters['calls'] += 1
+        self.budget.deposit()
+        retries: Dict[str, int] = {}
+        while True:
+            remaining = deadline - time.monotonic()
+            self.counters['attempts'] += 1
+            try:
+                if timed_call:
+                    result = await attempt(lambda call: self._timed(call, deadline))
+                else:
+                    result = await asyncio.wait_for(attempt(), timeout=min(self.attempt_timeout, remaining))
+                if retries:
+                    self.counters['recovered'] += 1
+                return result
+            except Exception as e:
+                kind = classify_error(e)
+                self.errors[kind] = self.errors.get(kind, 0) + 1
+                if not self._should_retry(kind, retries, deadline):
+                    raise
+                delay = min(self.backoff(kind, sum(retries.values())), max(deadline - time.monotonic() - self.min_attempt_seconds, 0))
+                retries[kind] = retries.get(kind, 0) + 1
+                self.counters['retries'] += 1
+                logger.warning(f"🔁 {label} call failed ({kind}: {e}); retry {sum(retries.values())} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def _timed(self, call: Awaitable[Any], deadline: float) -> Any:
+        """The attempt timeout, counted from when the call itself starts."""
+        return await asyncio.wait_for(call, timeout=min(self.attempt_timeout, deadline - time.monotonic()))
+
+    def _should_retry(self, kind: str, retries: Dict[str, int], deadline: float) -> bool:
+        limit = RETRY_LIMITS.get(kind, 0)
+        if limit is not None and retries.get(kind, 0) >= limit:
+            return False
+        if sum(retries.values()) + 1 >= self.max_attempts:
+            return False
+        # Not worth starting an attempt with almost no time left
+        if deadline - time.monotonic() < self.min_attempt_seconds:
+            self.counters['deadline_exhausted'] += 1
+            return False
+        if not self.budget.withdraw():
+            self.counters['budget_exhausted'] += 1
+            return False
+        return True
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "max_attempts": self.max_attempts,
+            "deadline_seconds": self.deadline_seconds,
+            "attempt_timeout_seconds": self.attempt_timeout,
+            "budget_balance": round(self.budget.balance, 2),
+            "budget_ratio": self.budget.ratio,
+            "errors": dict(self.errors),
+            **self.counters
+        }
+
+
+# Global retry policy shared by every model call in the process
+model_retry_policy = RetryPolicy()
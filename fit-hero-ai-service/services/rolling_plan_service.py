@@ -0,0 +1,80 @@
+import os
+import calendar
+import logging
+from datetime import date, timedelta
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DAYS_PER_WEEK = 7
+# How many days before a week starts it gets generated
+DEFAULT_LEAD_DAYS = 2
+# monthly_overview key holding the last generated day of a rolling plan
+HORIZON_KEY = 'generated_through'
+
+
+class RollingPlanner:
+    """
+    Rolling-horizon generation: a plan starts with its monthly overview and
+    week 1, and each later week (days 8-14, 15-21, ...) is generated
+    shortly before it starts, with the earlier weeks as context. The last
+    generated day is kept in monthly_overview.generated_through; plans
+    without it are complete months.
+    """
+
+    def __init__(self, lead_days: Optional[int] = None):
+        self.lead_days = lead_days if lead_days is not None else int(os.getenv('ROLLING_LEAD_DAYS', DEFAULT_LEAD_DAYS))
+
+    def first_window(self, month: int, year: int) -> int:
+        """Last day generated up front."""
+        return min(DAYS_PER_WEEK, calendar.monthrange(year, month)[1])
+
+    def generated_through(self, plan: Dict[str, Any], month: int, year: int) -> int:
+        overview = plan.get('monthly_overview') or {}
+        return overview.get(HORIZON_KEY) or calendar.monthrange(year, month)[1]
+
+    def next_window(self, plan: Dict[str, Any], month: int, year: int) -> List[str]:
+        """Day keys of the next week to generate; empty once the month is complete."""
+        days_in_month = calendar.monthrange(year, month)[1]
+        start = self.generated_through(plan, month, year) + 1
+        if start > days_in_month:
+            return []
+        end = min((start - 1) // DAYS_PER_WEEK * DAYS_PER_WEEK + DAYS_PER_WEEK, days_in_month)
+        return [str(day) for day in range(start, end + 1)]
+
+    def due_date(self, plan: Dict[str, Any], month: int, year: int) -> Optional[date]:
+        """Date from which the next week should be generated (None when complete)."""
+        window = self.next_window(plan, month, year)
+        if not window:
+            return None
+        return date(year, month, int(window[0])) - timedelta(days=self.lead_days)
+
+    def is_due(self, plan: Dict[str, Any], month: int, year: int, today: Optional[date] = None) -> bool:
+        due = self.due_date(plan, month, year)
+        return due is not None and (today or date.today()) >= due
+
+    def limit(self, plan: Dict[str, Any], section: str, through_day: int) -> Dict[str, Any]:
+        """Drop days past the window from freshly generated output and record the horizon."""
+        days = plan.get(section)
+        if isinstance(days, dict):
+            plan[section] = {day: value for day, value in days.items()
+                             if not str(day).isdigit() or int(day) <= through_day}
+        overview = plan.get('monthly_overview')
+        if not isinstance(overview, dict):
+            overview = plan['monthly_overview'] = {}
+        overview[HORIZON_KEY] = through_day
+        return plan
+
+    def advance(self, plan: Dict[str, Any], days: List[str], month: int, year: int) -> Dict[str, Any]:
+        """Move the horizon past newly generated days; a completed month drops the marker."""
+        through = max([self.generated_through(plan, month, year)] + [int(day) for day in days])
+        overview = plan.setdefault('monthly_overview', {})
+        if through >= calendar.monthrange(year, month)[1]:
+            overview.pop(HORIZON_KEY, None)
+        else:
+            overview[HORIZON_KEY] = through
+        return plan
+
+
+# Global planner instance
+rolling_planner = RollingPlanner()
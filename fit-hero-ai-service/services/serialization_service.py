@@ -0,0 +1,56 @@
+import json
+import logging
+from datetime import date, datetime
+from typing import Any
+
+from fastapi.responses import Response
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; stdlib json keeps the service working without it
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    """Types found in plan dicts that neither encoder handles natively."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    # numpy scalars and arrays (nutrition checks) without importing numpy here
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if hasattr(value, 'model_dump'):
+        return value.model_dump()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    """Compact UTF-8 JSON bytes; orjson when installed, stdlib json otherwise."""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=ORJSON_OPTIONS)
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data: Any) -> Any:
+    """Parse JSON from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class PlanJSONResponse(Response):
+    """
+    JSON response rendered straight to bytes with dumps().
+    Returning an instance from an endpoint also skips FastAPI's
+    jsonable_encoder pass, which walks every value of a plan first.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
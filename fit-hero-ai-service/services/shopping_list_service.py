@@ -0,0 +1,187 @@
+import re
+import logging
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MEAL_TYPES = ['breakfast', 'lunch', 'dinner']
+DAYS_PER_WEEK = 7
+
+# Unit aliases -> (dimension, factor to the dimension's base unit).
+# Mass is summed in grams and volume in millilitres; countable units
+# (slices, cloves, scoops...) are their own dimension.
+UNITS = {
+    'g': ('mass', 1.0), 'gram': ('mass', 1.0), 'grams': ('mass', 1.0), 'gr': ('mass', 1.0),
+    'kg': ('mass', 1000.0), 'kilogram': ('mass', 1000.0), 'kilograms': ('mass', 1000.0),
+    'oz': ('mass', 28.35), 'ounce': ('mass', 28.35), 'ounces': ('mass', 28.35),
+    'lb': ('mass', 453.6), 'lbs': ('mass', 453.6), 'pound': ('mass', 453.6), 'pounds': ('mass', 453.6),
+    'ml': ('volume', 1.0), 'milliliter': ('volume', 1.0), 'milliliters': ('volume', 1.0),
+    'l': ('volume', 1000.0), 'liter': ('volume', 1000.0), 'liters': ('volume', 1000.0),
+    'litre': ('volume', 1000.0), 'litres': ('volume', 1000.0),
+    'tsp': ('volume', 5.0), 'teaspoon': ('volume', 5.0), 'teaspoons': ('volume', 5.0),
+    'tbsp': ('volume', 15.0), 'tablespoon': ('volume', 15.0), 'tablespoons': ('volume', 15.0),
+    'cup': ('volume', 240.0), 'cups': ('volume', 240.0),
+    'slice': ('slice', 1.0), 'slices': ('slice', 1.0),
+    'clove': ('clove', 1.0), 'cloves': ('clove', 1.0),
+    'scoop': ('scoop', 1.0), 'scoops': ('scoop', 1.0),
+    'can': ('can', 1.0), 'cans': ('can', 1.0),
+    'handful': ('handful', 1.0), 'handfuls': ('handful', 1.0),
+    'piece': ('count', 1.0), 'pieces': ('count', 1.0)
+}
+BASE_UNITS = {'mass': 'g', 'volume': 'ml', 'count': None}
+
+# Preparation words that do not change what has to be bought
+PREPARATION_WORDS = {
+    'chopped', 'diced', 'sliced', 'minced', 'grated', 'shredded', 'cubed', 'crushed',
+    'fresh', 'freshly', 'cooked', 'raw', 'boiled', 'steamed', 'grilled', 'roasted', 'baked',
+    'large', 'small', 'medium', 'ripe', 'of'
+}
+# Words that end in "s" but are not plurals
+INVARIANT_WORDS = {'oats', 'hummus', 'asparagus', 'couscous', 'greens', 'molasses', 'swiss', 'lettuce'}
+
+QUANTITY_PATTERN = re.compile(
+    r'^\s*(?P<qty>\d+\s+\d+/\d+|\d+/\d+|\d+(?:[.,]\d+)?)\s*(?P<unit>[a-zA-Z]+\b)?\.?\s*(?P<rest>.*)$'
+)
+
+
+def _to_number(text: str) -> float:
+    """Parse "2", "1.5", "1,5", "1/2" and "1 1/2"."""
+    total = 0.0
+    for part in text.split():
+        if '/' in part:
+            numerator, denominator = part.split('/')
+            total += float(numerator) / float(denominator) if float(denominator) else 0.0
+        else:
+            total += float(part.replace(',', '.'))
+    return total
+
+
+def _singular(word: str) -> str:
+    if word in INVARIANT_WORDS or len(word) <= 3:
+        return word
+    if word.endswith('ies'):
+        return word[:-3] + 'y'
+    if word.endswith('oes'):
+        return word[:-2]
+    if word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        return word[:-1]
+    return word
+
+
+@lru_cache(maxsize=4096)
+def parse_ingredient(text: str) -> Optional[Tuple[str, str, Optional[str], float]]:
+    """
+    Split an ingredient string into (key, display name, dimension, amount).
+    "150g chicken breast" -> ('chicken breast', 'Chicken breast', 'mass', 150.0)
+    "Olive oil"           -> ('olive oil', 'Olive oil', None, 0.0)
+    Amounts are in the dimension's base unit. Cached: a month repeats the
+    same few dozen ingredient strings.
+    """
+    text = re.sub(r'\([^)]*\)', ' ', str(text)).replace('_', ' ').split(',')[0].strip()
+    if not text:
+        return None
+
+    dimension, amount = None, 0.0
+    match = QUANTITY_PATTERN.match(text)
+    if match:
+        amount = _to_number(match.group('qty'))
+        unit = (match.group('unit') or '').lower()
+        if unit in UNITS:
+            dimension, factor = UNITS[unit]
+            amount *= factor
+            text = match.group('rest')
+        else:
+            # "2 eggs": the word after the number is the ingredient itself
+            dimension = 'count'
+            text = ((match.group('unit') or '') + ' ' + match.group('rest')).strip()
+
+    words = [w for w in re.findall(r"[a-z0-9']+", text.lower()) if w not in PREPARATION_WORDS]
+    if not words:
+        return None
+    key = ' '.join(words[:-1] + [_singular(words[-1])])
+    display = ' '.join(w for w in text.split() if w.lower().strip(".,") not in PREPARATION_WORDS)
+    return key, display[:1].upper() + display[1:], dimension, amount
+
+
+class ShoppingListAggregator:
+    """
+    Builds per-week shopping lists from daily_meals in one pass: ingredient
+    strings are normalized (case, plurals, preparation words, units) and
+    quantities of the same ingredient are summed per week. Unquantified
+    ingredients are listed once with the number of meals that use them.
+    """
+
+    def build(self, daily_meals: Dict[str, Any], days_in_month: int) -> Dict[str, Any]:
+        """Weekly lists of {name, quantity, unit, uses}, in first-use order."""
+        weeks: Dict[str, Dict[str, Any]] = {}
+
+        for day_str, day_data in daily_meals.items():
+            day = self._parse_day(day_str, days_in_month)
+            if day is None or not isinstance(day_data, dict):
+                continue
+
+            week_key = f"week_{(day - 1) // DAYS_PER_WEEK + 1}"
+            week = weeks.get(week_key)
+            if week is None:
+                week = weeks[week_key] = {'days': [day, day], 'items': {}}
+            week['days'][0] = min(week['days'][0], day)
+            week['days'][1] = max(week['days'][1], day)
+
+            for item in self._iter_day_items(day_data):
+                for ingredient in item.get('ingredients', []) or []:
+                    parsed = parse_ingredient(ingredient) if isinstance(ingredient, (str, int, float)) else None
+                    if parsed is None:
+                        continue
+                    key, display, dimension, amount = parsed
+                    entry = week['items'].get((key, dimension))
+                    if entry is None:
+                        entry = week['items'][(key, dimension)] = {'name': display, 'amount': 0.0, 'uses': 0}
+                    entry['amount'] += amount
+                    entry['uses'] += 1
+
+        ordered = sorted(weeks.items(), key=lambda kv: kv[1]['days'][0])
+        return {
+            week_key: {'days': week['days'], 'items': self._finalize(week['items'])}
+            for week_key, week in ordered
+        }
+
+    def _finalize(self, items: Dict[Tuple[str, Optional[str]], Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fold unquantified uses into a quantified entry of the same ingredient."""
+        quantified = {key for key, dimension in items if dimension is not None}
+        result = []
+        by_key: Dict[str, Dict[str, Any]] = {}
+        for (key, dimension), entry in items.items():
+            if dimension is None and key in quantified:
+                continue
+            item = {'name': entry['name']}
+            if dimension is not None:
+                item['quantity'] = round(entry['amount'], 2) if entry['amount'] < 10 else round(entry['amount'])
+                unit = BASE_UNITS.get(dimension, dimension)
+                if unit:
+                    item['unit'] = unit
+            item['uses'] = entry['uses']
+            by_key.setdefault(key, item)
+            result.append(item)
+        for (key, dimension), entry in items.items():
+            if dimension is None and key in quantified:
+                by_key[key]['uses'] += entry['uses']
+        return result
+
+    def _iter_day_items(self, day_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Return the meals and snacks of a day as a flat list."""
+        meals = day_data.get('meals') if isinstance(day_data.get('meals'), dict) else day_data
+        items = [meals[m] for m in MEAL_TYPES if isinstance(meals.get(m), dict)]
+        items.extend(s for s in meals.get('snacks', []) or [] if isinstance(s, dict))
+        return items
+
+    def _parse_day(self, day_str: Any, days_in_month: int) -> Optional[int]:
+        try:
+            day = int(day_str)
+        except (TypeError, ValueError):
+            return None
+        return day if 1 <= day <= days_in_month else None
+
+
+# Global aggregator instance
+shopping_list_aggregator = ShoppingListAggregator()
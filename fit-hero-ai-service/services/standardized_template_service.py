@@ -8,6 +8,8 @@ import json
 import os
 from typing import Dict, Any, List
 
+from services.nutrition_target_service import nutrition_targets
+
 class StandardizedTemplateService:
     def __init__(self):
         self.workout_template = self._load_workout_template()
@@ -160,22 +162,38 @@ class StandardizedTemplateService:
         objectives = user_profile.get("objectives", ["general_health"])
         nutrition_objective = self._determine_primary_nutrition_objective(objectives)
         
-        # Get meal template structure
-        meal_structure = self.meal_template.get("meal_structure", {})
-        nutrition_guidelines = self.meal_template.get("nutrition_guidelines", {})
-        
-        # Get specific guidelines for user
-        age_guidelines = nutrition_guidelines.get(age_group, {})
-        weight_guidelines = age_guidelines.get(weight_category, {})
-        objective_guidelines = weight_guidelines.get(nutrition_objective, {})
+        # Meal template data lives under the "meal_template" root
+        meal_template = self.meal_template.get("meal_template", {})
+        targets = nutrition_targets.lookup(
+            age=age,
+            weight=weight,
+            goals=objectives,
+            activity_level=user_profile.get("activity_level", "moderately_active"),
+            calorie_target=user_profile.get("calorie_target")
+        )
+        objective = targets["objective"]
         
         return {
-            "meal_structure": meal_structure,
-            "nutrition_guidelines": objective_guidelines,
+            "meal_structure": meal_template.get("meal_options", {}),
+            "nutrition_targets": {
+                "daily_calories": targets["calories"],
+                "protein_grams": targets["protein"],
+                "carbs_grams": targets["carbs"],
+                "fat_grams": targets["fat"]
+            },
+            "nutrition_guidelines": {
+                "macro_distribution": meal_template.get("macro_distributions", {}).get(objective, {}),
+                "meal_timing": meal_template.get("meal_timing_by_objective", {}).get(
+                    nutrition_objective, meal_template.get("meal_timing_by_objective", {}).get("general_health", {})
+                ),
+                "hydration": meal_template.get("hydration_guidelines", {})
+            },
+            "age_guidance": meal_template.get("age_specific_guidance", {}).get(self._determine_guidance_age_range(age), {}),
             "user_categories": {
                 "age_group": age_group,
                 "weight_category": weight_category,
-                "nutrition_objective": nutrition_objective
+                "nutrition_objective": nutrition_objective,
+                "activity_level": targets["activity_level"]
             },
             "requires_ai_customization": self._requires_ai_customization(user_profile)
         }
@@ -208,6 +226,19 @@ class StandardizedTemplateService:
         else:
             return "age_over_55"
 
+    def _determine_guidance_age_range(self, age: int) -> str:
+        """Map age onto the age_specific_guidance ranges of the meal template"""
+        if age < 26:
+            return "18-25"
+        elif age < 36:
+            return "26-35"
+        elif age < 46:
+            return "36-45"
+        elif age <= 60:
+            return "46-60"
+        else:
+            return "60+"
+
     def _determine_weight_category(self, weight: float) -> str:
         """Determine weight category for calorie targeting"""
         if weight < 60:
@@ -4,6 +4,8 @@ import os
 import logging
 from typing import Optional, Dict, Any
 
+from services.serialization_service import dumps
+
 logger = logging.getLogger(__name__)
 
 class WebhookService:
@@ -45,7 +47,7 @@ class WebhookService:
                 async with aiohttp.ClientSession() as session:
                     async with session.post(
                         self.webhook_url,
-                        json=payload,
+                        data=dumps(payload),
                         headers=headers,
                         timeout=aiohttp.ClientTimeout(total=10)
                     ) as response:
@@ -0,0 +1,203 @@
+import copy
+import json
+import logging
+from typing import Dict, Any, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+ENCODING = 'weekly_pattern/1'
+PERIOD = 7
+DAILY_SECTIONS = ('daily_workouts', 'daily_meals')
+DELTA_KEY = '$delta'
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+
+def _size(value: Any) -> int:
+    return len(_dumps(value))
+
+
+def _same(a: Any, b: Any) -> bool:
+    """Equality that also requires the same key order, so decoding is byte-exact."""
+    return a == b and _dumps(a) == _dumps(b)
+
+
+class WeeklyPatternCodec:
+    """
+    Compact representation of a month of daily_workouts / daily_meals as one
+    base week plus per-day overrides. Days that differ from their weekday's
+    base only in a few fields (dates, one swapped meal) are stored as a
+    nested delta. decode() reproduces the original section exactly,
+    including key order.
+
+    Encoded section:
+        {"encoding": "weekly_pattern/1", "days": 30,
+         "pattern": [<day 1>, ..., <day 7>],
+         "overrides": {"9": {"$delta": {"set": {...}, "patch": {...}}}},
+         "keys": [...]}   # only when keys are not "1".."days" in order
+    """
+
+    def encode(self, daily: Dict[str, Any]) -> Dict[str, Any]:
+        """Encode one daily_* mapping."""
+        keys = list(daily)
+        positions: List[List[str]] = [[] for _ in range(PERIOD)]
+        for key in keys:
+            day = self._day_number(key)
+            if day is not None:
+                positions[(day - 1) % PERIOD].append(key)
+
+        pattern = [self._choose_base([daily[k] for k in group]) for group in positions]
+
+        overrides = {}
+        for key in keys:
+            day = self._day_number(key)
+            if day is None:
+                overrides[key] = daily[key]
+                continue
+            base = pattern[(day - 1) % PERIOD]
+            if not _same(daily[key], base):
+                overrides[key] = self._override(base, daily[key])
+
+        encoded = {'encoding': ENCODING, 'days': len(keys), 'pattern': pattern, 'overrides': overrides}
+        if keys != [str(day) for day in range(1, len(keys) + 1)]:
+            encoded['keys'] = keys
+        return encoded
+
+    def decode(self, encoded: Dict[str, Any]) -> Dict[str, Any]:
+        """Expand an encoded section back into the daily_* mapping."""
+        keys = encoded.get('keys') or [str(day) for day in range(1, encoded['days'] + 1)]
+        pattern = encoded['pattern']
+        overrides = encoded.get('overrides', {})
+
+        daily = {}
+        for key in keys:
+            day = self._day_number(key)
+            base = pattern[(day - 1) % PERIOD] if day is not None else None
+            if key not in overrides:
+                daily[key] = copy.deepcopy(base)
+                continue
+            override = overrides[key]
+            if self._is_delta(override):
+                daily[key] = self._apply(base, override[DELTA_KEY])
+            else:
+                daily[key] = copy.deepcopy(override)
+        return daily
+
+    def is_encoded(self, section: Any) -> bool:
+        return isinstance(section, dict) and section.get('encoding') == ENCODING
+
+    def encode_plan(self, plan: Dict[str, Any], sections: Sequence[str] = DAILY_SECTIONS) -> Dict[str, Any]:
+        """Shallow copy of a plan with its daily sections encoded; the input is left untouched."""
+        encoded = dict(plan)
+        for section in sections:
+            if isinstance(plan.get(section), dict) and not self.is_encoded(plan[section]):
+                encoded[section] = self.encode(plan[section])
+        return encoded
+
+    def decode_plan(self, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """Shallow copy of a plan with any encoded daily sections expanded."""
+        decoded = dict(plan)
+        for section, value in plan.items():
+            if self.is_encoded(value):
+                decoded[section] = self.decode(value)
+        return decoded
+
+    def size_report(self, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """Compact JSON bytes of each daily section and the whole plan, expanded vs encoded."""
+        encoded = self.encode_plan(plan)
+        report = {}
+        for section in list(DAILY_SECTIONS) + [None]:
+            if section is not None and section not in plan:
+                continue
+            before = _size(plan[section] if section else plan)
+            after = _size(encoded[section] if section else encoded)
+            report[section or 'plan'] = {
+                'expanded_bytes': before,
+                'encoded_bytes': after,
+                'reduction_percent': round(100 * (1 - after / before), 1) if before else 0.0
+            }
+        return report
+
+    def _choose_base(self, candidates: List[Any]) -> Any:
+        """The candidate that makes the other days' overrides smallest."""
+        if not candidates:
+            return None
+        best, best_cost = None, None
+        seen = set()
+        for candidate in candidates:
+            if _dumps(candidate) in seen:
+                continue
+            seen.add(_dumps(candidate))
+            cost = sum(_size(self._override(candidate, v)) for v in candidates if not _same(v, candidate))
+            if best_cost is None or cost < best_cost:
+                best, best_cost = candidate, cost
+        return best
+
+    def _override(self, base: Any, value: Any) -> Any:
+        """A delta against the base day, or the full value when that is smaller."""
+        if isinstance(base, dict) and isinstance(value, dict):
+            delta = {DELTA_KEY: self._diff(base, value)}
+            if _size(delta) < _size(value):
+                return delta
+        return value
+
+    def _diff(self, base: Dict[str, Any], value: Dict[str, Any]) -> Dict[str, Any]:
+        """Nested dict delta; lists and scalars are replaced whole."""
+        changes: Dict[str, Any] = {}
+        for key, item in value.items():
+            if key not in base:
+                changes.setdefault('set', {})[key] = item
+            elif not _same(base[key], item):
+                if isinstance(base[key], dict) and isinstance(item, dict):
+                    changes.setdefault('patch', {})[key] = self._diff(base[key], item)
+                else:
+                    changes.setdefault('set', {})[key] = item
+
+        dropped = [key for key in base if key not in value]
+        if dropped:
+            changes['drop'] = dropped
+
+        # _apply keeps base order and appends new keys; record the order only if that differs
+        order = [key for key in base if key in value] + [key for key in value if key not in base]
+        if order != list(value):
+            changes['order'] = list(value)
+        return changes
+
+    def _apply(self, base: Dict[str, Any], changes: Dict[str, Any]) -> Dict[str, Any]:
+        sets = changes.get('set', {})
+        patches = changes.get('patch', {})
+        dropped = set(changes.get('drop', []))
+
+        result = {}
+        for key, item in base.items():
+            if key in dropped:
+                continue
+            if key in sets:
+                result[key] = copy.deepcopy(sets[key])
+            elif key in patches:
+                result[key] = self._apply(item, patches[key])
+            else:
+                result[key] = copy.deepcopy(item)
+        for key, item in sets.items():
+            if key not in result:
+                result[key] = copy.deepcopy(item)
+
+        if 'order' in changes:
+            result = {key: result[key] for key in changes['order']}
+        return result
+
+    def _is_delta(self, value: Any) -> bool:
+        return isinstance(value, dict) and len(value) == 1 and DELTA_KEY in value
+
+    def _day_number(self, key: Any) -> Optional[int]:
+        try:
+            day = int(key)
+        except (TypeError, ValueError):
+            return None
+        return day if day >= 1 else None
+
+
+# Global codec instance
+weekly_pattern_codec = WeeklyPatternCodec()
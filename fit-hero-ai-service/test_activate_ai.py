@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tests for /activate-ai: plans for a new player go through the same
+filter/finalize/store path as the generation endpoints.
+Model calls and webhooks are replaced, so no API key is needed; the
+service's requirements (FastAPI, python-dotenv, google-generativeai,
+aiohttp) must be installed to import main; the tests skip otherwise.
+"""
+
+import sys
+import os
+import json
+import copy
+import tempfile
+from datetime import datetime
+
+import pytest
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+for requirement in ('dotenv', 'google.generativeai', 'aiohttp', 'fastapi'):
+    pytest.importorskip(requirement)
+
+from fastapi.testclient import TestClient
+
+# The model is never called; the service only needs a key to start
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key')
+import main
+from services.plan_store_service import PlanStore
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_fixture(name):
+    with open(os.path.join(BASE_DIR, name)) as f:
+        return json.load(f)
+
+
+def test_activated_player_status_and_stored_plans():
+    """After activation both plans are delivered in the store and readable as slices."""
+    workout_plan = load_fixture('expected_workout_structure.json')
+    meal_plan = load_fixture('expected_meal_structure.json')
+    calls, webhooks = [], []
+
+    async def generate_workout(**kwargs):
+        calls.append(('workout', kwargs['user_id']))
+        return {"success": True, "workout_plan": copy.deepcopy(workout_plan)}
+
+    async def generate_meal(**kwargs):
+        calls.append(('meal', kwargs['user_id']))
+        return {"success": True, "meal_plan": copy.deepcopy(meal_plan)}
+
+    async def notify(player_id, details):
+        webhooks.append(player_id)
+
+    with tempfile.TemporaryDirectory() as directory:
+        originals = (main.plan_store, main.monthly_plan_service.generate_monthly_workout_plan,
+                     main.monthly_plan_service.generate_monthly_meal_plan,
+                     main.webhook_service.notify_ai_activation_completed)
+        main.plan_store = PlanStore(os.path.join(directory, 'plans.db'))
+        main.monthly_plan_service.generate_monthly_workout_plan = generate_workout
+        main.monthly_plan_service.generate_monthly_meal_plan = generate_meal
+        main.webhook_service.notify_ai_activation_completed = notify
+        try:
+            client = TestClient(main.app)
+            response = client.post("/activate-ai", json={"user_id": "new-player", "player_data": {"age": 25}})
+            assert response.status_code == 200, response.text
+            results = response.json()['results']
+            assert results['workout_plan_success'] and results['meal_plan_success'], results
+            assert calls == [('workout', 'new-player'), ('meal', 'new-player')] and webhooks == ['new-player']
+
+            now = datetime.now()
+            status = client.get(f"/monthly-plan-status/new-player/{now.month}/{now.year}").json()
+            for plan_type in ('workout', 'meal'):
+                plan = status['plans'][plan_type]
+                assert plan['status'] == 'delivered' and plan['has_plan'], plan
+                assert list(plan['timings']) == ['generating', 'parsed', 'filtered', 'delivered']
+
+            # Stored plans are the finalized ones: filtered, derived for this month and validated
+            stored = main.plan_store.get_plan('new-player', now.year, now.month, 'workout')
+            assert 'filter_metadata' in stored
+            assert stored['daily_workouts']['1']['day_of_week'] == datetime(now.year, now.month, 1).strftime('%A')
+            day = client.get(f"/monthly-plans/new-player/{now.month}/{now.year}/meal/days/1")
+            assert day.status_code == 200 and day.json()['data']
+        finally:
+            main.plan_store.close()
+            (main.plan_store, main.monthly_plan_service.generate_monthly_workout_plan,
+             main.monthly_plan_service.generate_monthly_meal_plan,
+             main.webhook_service.notify_ai_activation_completed) = originals
+    print("✓ Activated player has delivered, stored workout and meal plans")
+
+
+def test_unknown_priority_is_a_bad_request():
+    """An invalid priority is rejected with 400 before any generation or failure webhook."""
+    webhooks = []
+
+    async def notify(player_id, details):
+        webhooks.append(player_id)
+
+    original = main.webhook_service.notify_ai_activation_failed
+    main.webhook_service.notify_ai_activation_failed = notify
+    try:
+        response = TestClient(main.app).post(
+            "/activate-ai", json={"user_id": "new-player", "priority": "urgent"}
+        )
+    finally:
+        main.webhook_service.notify_ai_activation_failed = original
+    assert response.status_code == 400, response.text
+    assert webhooks == []
+    print("✓ Unknown priority rejected with 400, no activation webhook")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("AI Activation Tests")
+    print("=" * 60)
+    print()
+
+    try:
+        test_activated_player_status_and_stored_plans()
+        test_unknown_priority_is_a_bad_request()
+
+        print()
+        print("All tests completed!")
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        sys.exit(1)
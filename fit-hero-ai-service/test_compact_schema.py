@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Round-trip tests for the compact model output schema.
+These run offline - no AI service or API key needed.
+"""
+
+import sys
+import os
+import json
+import copy
+import logging
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.compact_schema_service import (
+    CompactSchemaService, EXERCISE_FIELDS, MEAL_FIELDS, SNACK_FIELDS, WORKOUT_DAY_KEYS, MEAL_DAY_KEYS
+)
+from services.ai_filter_service import AIFilterService
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MEAL_TYPES = ['breakfast', 'lunch', 'dinner']
+
+
+def load_fixture(name):
+    with open(os.path.join(BASE_DIR, name)) as f:
+        return json.load(f)
+
+
+def over_the_wire(plan):
+    """JSON round trip, as the compact plan arrives from the model."""
+    return json.loads(json.dumps(plan))
+
+
+def wire_fields(item, fields):
+    return {key: value for key, value in item.items() if key in fields}
+
+
+def test_workout_round_trip():
+    """compact -> expand gives back every day's fields the compact schema carries."""
+    plan = load_fixture('expected_workout_structure.json')
+    schema = CompactSchemaService()
+    compact = over_the_wire(schema.compact_workout_plan(copy.deepcopy(plan)))
+    assert 'daily_workouts' not in compact and len(compact['dw']) == len(plan['daily_workouts'])
+
+    expanded = schema.expand_workout_plan(compact)
+    assert 'dw' not in expanded
+    assert list(expanded['daily_workouts']) == list(plan['daily_workouts'])
+    for day, original in plan['daily_workouts'].items():
+        restored = expanded['daily_workouts'][day]
+        day_fields = [key for key in WORKOUT_DAY_KEYS.values() if key != 'exercises']
+        assert wire_fields(restored, day_fields) == wire_fields(original, day_fields)
+        assert set(restored) == set(WORKOUT_DAY_KEYS.values())
+        # Fixture exercises have names and no catalog id: the name travels in the id slot
+        assert restored['exercises'] == [wire_fields(e, EXERCISE_FIELDS + ['name']) for e in original['exercises']]
+    assert expanded['safety_guidelines'] == plan['safety_guidelines']
+    print(f"✓ {len(expanded['daily_workouts'])} workout days round-tripped "
+          f"({len(json.dumps(compact))} vs {len(json.dumps(plan))} bytes)")
+
+
+def test_meal_round_trip():
+    plan = load_fixture('expected_meal_structure.json')
+    schema = CompactSchemaService()
+    expanded = schema.expand_meal_plan(over_the_wire(schema.compact_meal_plan(copy.deepcopy(plan))))
+
+    assert list(expanded['daily_meals']) == list(plan['daily_meals'])
+    for day, original in plan['daily_meals'].items():
+        meals = expanded['daily_meals'][day]['meals']
+        assert set(meals) == set(MEAL_DAY_KEYS.values()) & set(original)
+        for meal_type in MEAL_TYPES:
+            assert meals[meal_type] == wire_fields(original[meal_type], MEAL_FIELDS)
+        assert meals['snacks'] == [wire_fields(s, SNACK_FIELDS) for s in original['snacks']]
+
+    # After filtering, the expanded plan has the same daily_meals shape as the verbose one
+    logging.disable(logging.WARNING)
+    try:
+        filtered_compact = AIFilterService().filter_meal_plan(expanded)
+        filtered_verbose = AIFilterService().filter_meal_plan(copy.deepcopy(plan))
+    finally:
+        logging.disable(logging.NOTSET)
+    for day, verbose_day in filtered_verbose['daily_meals'].items():
+        compact_day = filtered_compact['daily_meals'][day]
+        assert set(compact_day) == set(verbose_day)
+        for meal_type in MEAL_TYPES:
+            assert set(compact_day[meal_type]) == set(verbose_day[meal_type])
+            assert compact_day[meal_type]['calories'] == verbose_day[meal_type]['calories']
+    print(f"✓ {len(expanded['daily_meals'])} meal days round-tripped to the verbose daily_meals shape")
+
+
+def test_model_style_rows_expand():
+    """Rows as the model writes them: catalog ids, numeric strings and trailing fields left out."""
+    schema = CompactSchemaService()
+    workout = schema.expand_workout_plan({'dw': {'1': {'t': 'Upper Body', 'x': [[7, 'Slow negatives'], ['12'], ['Plank', '', 3]]}}})
+    assert workout['daily_workouts']['1']['exercises'] == [
+        {'exercise_id': 7, 'notes': 'Slow negatives'},
+        {'exercise_id': '12'},
+        {'name': 'Plank', 'notes': '', 'sets': 3}
+    ]
+    meals = schema.expand_meal_plan({'dm': {'1': {'b': ['Oats', 350], 's': [['Apple', 95, 'afternoon']], 'l': 'bad'}}})
+    assert meals['daily_meals']['1']['meals'] == {
+        'breakfast': {'name': 'Oats', 'calories': 350},
+        'snacks': [{'name': 'Apple', 'calories': 95, 'timing': 'afternoon'}],
+        'lunch': {}
+    }
+    print("✓ Positional rows expanded onto field names")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Compact Schema Tests")
+    print("=" * 60)
+    print()
+
+    try:
+        test_workout_round_trip()
+        test_meal_round_trip()
+        test_model_style_rows_expand()
+
+        print()
+        print("All tests completed!")
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        sys.exit(1)
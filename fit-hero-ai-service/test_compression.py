@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for the negotiated response compression middleware.
+These run offline - no AI service or API key needed.
+"""
+
+import sys
+import os
+import json
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from services.compression_middleware import CompressionMiddleware, negotiate_encoding, available_encodings
+from services.serialization_service import PlanJSONResponse
+
+PLAN = {str(day): {'workout_type': 'Upper Body', 'exercises': [{'exercise_id': 12, 'sets': 3}]} for day in range(1, 31)}
+
+
+def make_client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500, encodings=['gzip'])
+
+    @app.get("/plan")
+    async def plan():
+        return PlanJSONResponse(PLAN)
+
+    @app.get("/small")
+    async def small():
+        return {"status": "ok"}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for day in PLAN:
+                yield json.dumps(PLAN[day]).encode() + b"\n"
+        return StreamingResponse(chunks(), media_type="application/json")
+
+    return TestClient(app)
+
+
+def test_negotiation_uses_q_values_and_preference():
+    """Highest q wins, ties go to the server preference, q=0 and identity disable."""
+    supported = ['zstd', 'br', 'gzip']
+    assert negotiate_encoding("gzip, br", supported) == 'br'
+    assert negotiate_encoding("gzip;q=1.0, br;q=0.5", supported) == 'gzip'
+    assert negotiate_encoding("*", supported) == 'zstd'
+    assert negotiate_encoding("gzip;q=0", supported) is None
+    assert negotiate_encoding("identity", supported) is None
+    assert 'gzip' in available_encodings()
+    print(f"✓ Available: {available_encodings()}")
+
+
+def test_responses_are_compressed_above_threshold():
+    """Large and streamed bodies are gzipped; small bodies pass through."""
+    client = make_client()
+
+    response = client.get("/plan", headers={"Accept-Encoding": "gzip"})
+    assert response.headers['content-encoding'] == 'gzip'
+    assert 'accept-encoding' in response.headers['vary'].lower()
+    assert response.json() == PLAN
+
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert 'content-encoding' not in small.headers and small.json() == {"status": "ok"}
+
+    plain = client.get("/plan", headers={"Accept-Encoding": "identity"})
+    assert 'content-encoding' not in plain.headers
+
+    streamed = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert streamed.headers['content-encoding'] == 'gzip'
+    assert [json.loads(line) for line in streamed.text.splitlines()] == list(PLAN.values())
+    print(f"✓ {len(plain.content)} bytes uncompressed")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Compression Middleware Tests")
+    print("=" * 60)
+    print()
+
+    try:
+        test_negotiation_uses_q_values_and_preference()
+        test_responses_are_compressed_above_threshold()
+
+        print()
+        print("All tests completed!")
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests for the dietary constraint scanner.
+These run offline - no AI service or API key needed.
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.dietary_constraint_service import DietaryConstraintScanner
+
+
+def _plan():
+    return {
+        "1": {
+            "breakfast": {"name": "Oatmeal with almond milk", "ingredients": ["oats", "almond milk", "banana"]},
+            "lunch": {"name": "Grilled chicken salad", "ingredients": ["chicken breast", "lettuce", "feta cheese"]},
+            "dinner": {"name": "Roasted eggplant", "ingredients": ["eggplant", "olive oil"]},
+            "snacks": [{"name": "Greek yogurt", "ingredients": ["yogurt", "peanuts"]}]
+        }
+    }
+
+
+def test_scanner_flags_allergens_and_diet():
+    """Allergens and diet conflicts are reported with day, slot and constraint."""
+    scanner = DietaryConstraintScanner()
+    violations = scanner.scan_meal_plan(_plan(), ["dairy", "peanuts"], ["vegetarian"])
+    found = {(v['meal'], v['constraint']) for v in violations}
+
+    assert ('lunch', 'vegetarian') in found
+    assert ('lunch', 'dairy') in found
+    assert ('snacks', 'peanut') in found
+    assert scanner.offending_slots(violations) == {"1": ["lunch", "snacks"]}
+    print(f"✓ Flagged {len(violations)} conflicts")
+
+
+def test_scanner_ignores_safe_phrases_and_partial_words():
+    """Almond milk is not dairy and eggplant is not egg."""
+    scanner = DietaryConstraintScanner()
+    violations = scanner.scan_meal_plan(_plan(), ["dairy", "eggs"], [])
+    meals = {v['meal'] for v in violations}
+
+    assert 'breakfast' not in meals
+    assert 'dinner' not in meals
+    print("✓ Safe phrases and partial words ignored")
+
+
+def test_green_beans_are_not_keto_beans():
+    """Green beans are a keto vegetable; other beans still conflict."""
+    scanner = DietaryConstraintScanner()
+    plan = {"1": {
+        "lunch": {"name": "Beef chili", "ingredients": ["ground beef", "black beans"]},
+        "dinner": {"name": "Steak with green beans", "ingredients": ["sirloin", "green beans"]}
+    }}
+    violations = scanner.scan_meal_plan(plan, [], ["keto"])
+
+    assert {(v['meal'], v['term']) for v in violations} == {('lunch', 'beans')}
+    print("✓ Green beans allowed on keto, black beans flagged")
+
+
+if __name__ == "__main__":
+    test_scanner_flags_allergens_and_diet()
+    test_scanner_ignores_safe_phrases_and_partial_words()
+    test_green_beans_are_not_keto_beans()
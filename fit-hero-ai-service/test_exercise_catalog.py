@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Tests for the compiled exercise catalog and the trigram name resolver.
+These run offline - no AI service or API key needed.
+"""
+
+import sys
+import os
+import json
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.exercise_catalog_service import ExerciseCatalog
+from services.exercise_resolver_service import ExerciseNameResolver
+from services.ai_filter_service import AIFilterService
+
+
+def test_catalog_parses_template_hints():
+    """Template strings are split into a name and parsed set/rep ranges."""
+    catalog = ExerciseCatalog()
+    entry = catalog.lookup_name("Leg press machine (2-3 sets, 12-15 reps)")
+
+    assert entry is not None
+    assert entry['name'] == "Leg press machine"
+    assert (entry['sets_min'], entry['sets_max']) == (2, 3)
+    assert (entry['reps_min'], entry['reps_max']) == (12, 15)
+    assert catalog.get(entry['id']) is entry
+    assert catalog.get(str(entry['id'])) is entry
+    print(f"✓ Parsed #{entry['id']}: {entry['name']} {entry['hint']}")
+
+
+def test_catalog_ids_are_stable():
+    """Two compilations of the same template produce identical IDs."""
+    first, second = ExerciseCatalog(), ExerciseCatalog()
+    assert [(e['id'], e['name']) for e in first.entries] == [(e['id'], e['name']) for e in second.entries]
+    assert first.version == second.version
+    print(f"✓ {len(first.entries)} exercises, version {first.version}")
+
+
+def test_pack_round_trip():
+    """Packing a filtered plan with the string table is lossless."""
+    filter_service = AIFilterService()
+    catalog = filter_service.exercise_catalog
+    plan = filter_service.filter_workout_plan({
+        "monthly_overview": {"month": 9, "year": 2025},
+        "daily_workouts": {
+            "1": {
+                "workout_type": "Upper Body",
+                "duration": 45,
+                "exercises": [
+                    {"exercise_id": 27, "sets": 3, "reps": "8-10", "rest_time": "90"},
+                    {"name": "Push-ups", "sets": 3, "reps": "12"}
+                ],
+                "warm_up": ["Arm circles"]
+            }
+        }
+    })
+
+    packed = catalog.pack_workout_plan(plan)
+    assert 'name' not in packed['daily_workouts']['1']['exercises'][0]
+    assert catalog.unpack_workout_plan(packed) == plan
+    print(f"✓ Packed plan round-trips ({len(packed['string_table'])} interned strings)")
+
+
+def test_resolver_maps_variants_and_flags_unknown():
+    """Near-miss names resolve to the catalog; unrelated names are flagged."""
+    resolver = ExerciseNameResolver()
+
+    for name, expected in [("Lat pull-down", "Lat pulldown"),
+                           ("Romanian Deadlift", "Romanian deadlifts"),
+                           ("push ups", "Push-ups")]:
+        result = resolver.resolve(name)
+        assert result['in_catalog'] and result['name'] == expected, result
+        print(f"✓ {name} -> {result['name']} ({result['score']})")
+
+    result = resolver.resolve("Zumba")
+    assert not result['in_catalog'] and result['exercise_id'] is None
+    print("✓ Zumba flagged as out of catalog")
+
+
+def test_resolver_cache_is_bounded():
+    """Free-text names are cached least-recently-used first, up to cache_size."""
+    resolver = ExerciseNameResolver(cache_size=3)
+    first = resolver.resolve("push ups")
+    for n in range(10):
+        resolver.resolve(f"made up move {n}")
+        resolver.resolve("Push Ups")
+    assert len(resolver._cache) == 3
+    # The name resolved on every round stays cached
+    assert resolver.resolve("push ups") is first
+    print(f"✓ Resolver cache held at {len(resolver._cache)} entries after 11 distinct names")
+
+
+def test_filter_reports_catalog_violations():
+    """Only days with out-of-catalog exercises end up in catalog_violations."""
+    filter_service = AIFilterService()
+    plan = filter_service.filter_workout_plan({
+        "monthly_overview": {"month": 9, "year": 2025},
+        "daily_workouts": {
+            "1": {"workout_type": "Lower Body", "exercises": [{"name": "Deadlifts"}]},
+            "2": {"workout_type": "Upper Body", "exercises": [{"name": "Cable crossover"}]}
+        }
+    })
+
+    assert list(plan['catalog_violations']) == ['2']
+    validated = filter_service.validate_workout_plan_structure(plan, 9, 2025)
+    assert any('Day 2' in error for error in validated['validation_errors'])
+    print(f"✓ Violations: {plan['catalog_violations']}")
+
+
+def test_merge_regenerated_days():
+    """Regenerated days replace only their own days and their own violations."""
+    filter_service = AIFilterService()
+    plan = filter_service.filter_workout_plan({
+        "monthly_overview": {"month": 9, "year": 2025},
+        "daily_workouts": {
+            "1": {"workout_type": "Lower Body", "exercises": [{"name": "Deadlifts"}]},
+            "2": {"workout_type": "Upper Body", "exercises": [{"name": "Cable crossover"}]},
+            "3": {"workout_type": "Cardio", "exercises": [{"name": "Zumba"}]}
+        }
+    })
+    assert list(plan['catalog_violations']) == ['2', '3']
+
+    plan = filter_service.merge_workout_days(plan, {
+        "2": {"workout_type": "Upper Body", "exercises": [{"name": "Push-ups"}]}
+    })
+    assert list(plan['catalog_violations']) == ['3']
+    assert plan['daily_workouts']['2']['exercises'][0]['exercise_id'] is not None
+    assert plan['daily_workouts']['1']['exercises'][0]['name'] == 'Deadlifts'
+
+    plan = filter_service.merge_workout_days(plan, {
+        "3": {"workout_type": "Cardio", "exercises": [{"name": "Burpees"}]}
+    })
+    assert 'catalog_violations' not in plan
+    print("✓ Regenerated days merged, violations updated per day")
+
+
+def test_filter_checks_the_users_template():
+    """A gym exercise in a home plan is a violation; a bad ID without a name is reported by ID."""
+    filter_service = AIFilterService()
+    catalog = filter_service.exercise_catalog
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'workout_templates.json')) as f:
+        environments = json.load(f)['workout_template']['training_environments']
+    home_ids = catalog.template_ids(environments['home']['bodyweight_exercises'])
+    leg_press = catalog.lookup_name("Leg press machine")
+    assert home_ids and leg_press['id'] not in home_ids
+
+    plan = filter_service.filter_workout_plan({
+        "monthly_overview": {"month": 9, "year": 2025},
+        "template_exercise_ids": home_ids,
+        "daily_workouts": {
+            "1": {"workout_type": "Lower Body", "exercises": [{"exercise_id": leg_press['id']}]},
+            "2": {"workout_type": "Lower Body", "exercises": [{"name": "Leg press machine"}]},
+            "3": {"workout_type": "Upper Body", "exercises": [{"exercise_id": 9999}]},
+            "4": {"workout_type": "Upper Body", "exercises": [{"name": "push ups"}]}
+        }
+    })
+    assert plan['catalog_violations'] == {
+        '1': [f"exercise_id {leg_press['id']}"], '2': ["Leg press machine"], '3': ["exercise_id 9999"]
+    }, plan['catalog_violations']
+    assert plan['daily_workouts']['4']['exercises'][0]['exercise_id'] in home_ids
+
+    # Without a template the whole catalog is allowed, as before
+    unscoped = filter_service.filter_workout_days({"1": {"exercises": [{"exercise_id": leg_press['id']}]}})
+    assert 'catalog_violations' not in unscoped
+    print(f"✓ Home template violations: {plan['catalog_violations']}")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Exercise Catalog Tests")
+    print("=" * 60)
+    print()
+
+    try:
+        test_catalog_parses_template_hints()
+        test_catalog_ids_are_stable()
+        test_pack_round_trip()
+        test_resolver_maps_variants_and_flags_unknown()
+        test_resolver_cache_is_bounded()
+        test_filter_reports_catalog_violations()
+        test_merge_regenerated_days()
+        test_filter_checks_the_users_template()
+
+        print()
+        print("All tests completed!")
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Tests for hedged month-plan model calls.
+These run offline - no AI service or API key needed.
+"""
+
+import sys
+import os
+import json
+import asyncio
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.hedging_service import RequestHedger
+from services.retry_policy_service import RetryBudget
+from services.priority_lane_service import PriorityLaneScheduler
+
+
+def scripted(delays, outcomes=None, cancelled=None):
+    """attempt() factory: the n-th attempt sleeps delays[n] and returns or raises outcomes[n]."""
+    calls = {'n': 0}
+
+    async def attempt():
+        n = calls['n']
+        calls['n'] += 1
+        try:
+            await asyncio.sleep(delays[n])
+        except asyncio.CancelledError:
+            if cancelled is not None:
+                cancelled.append(n)
+            raise
+        outcome = outcomes[n] if outcomes else f"plan {n}"
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    return attempt, calls
+
+
+async def warm_up(hedger, label, count=20, seconds=0.01):
+    for _ in range(count):
+        attempt, _ = scripted([seconds])
+        await hedger.run(attempt, label)
+
+
+def test_slow_call_is_hedged_and_loser_cancelled():
+    async def scenario():
+        hedger = RequestHedger(enabled=True, min_samples=20)
+        attempt, calls = scripted([0.01])
+        await hedger.run(attempt, "workout plan")
+        # Below min_samples nothing is hedged
+        assert hedger.counters['hedged'] == 0
+
+        await warm_up(hedger, "workout plan")
+        cancelled = []
+        attempt, calls = scripted([1.0, 0.01], cancelled=cancelled)
+        result = await hedger.run(attempt, "workout plan")
+        await asyncio.sleep(0)
+        return hedger, result, calls['n'], cancelled
+
+    hedger, result, attempts, cancelled = asyncio.run(scenario())
+    assert result == "plan 1" and attempts == 2 and cancelled == [0]
+    metrics = hedger.metrics()
+    assert metrics['hedged'] == 1 and metrics['hedge_wins'] == 1
+    assert metrics['plan_types']['workout plan']['p99_seconds'] < 0.5
+    print(f"✓ Hedge won after {metrics['plan_types']['workout plan']['hedge_threshold_seconds']}s; "
+          f"hedge rate {metrics['hedge_rate']}")
+
+
+def test_first_valid_parse_wins():
+    """A hedge whose response fails to parse does not beat a slower primary that parses."""
+    async def scenario():
+        hedger = RequestHedger(enabled=True, min_samples=20)
+        await warm_up(hedger, "meal plan")
+        bad_json = json.JSONDecodeError("Failed to parse JSON", "{oops", 0)
+        attempt, _ = scripted([0.2, 0.01], outcomes=["primary plan", bad_json])
+        return await hedger.run(attempt, "meal plan")
+
+    assert asyncio.run(scenario()) == "primary plan"
+
+    async def both_fail():
+        hedger = RequestHedger(enabled=True, min_samples=20)
+        await warm_up(hedger, "meal plan")
+        attempt, _ = scripted([0.2, 0.01], outcomes=[ValueError("second"), ValueError("first")])
+        await hedger.run(attempt, "meal plan")
+
+    try:
+        asyncio.run(both_fail())
+        assert False, "a failed race returned a result"
+    except ValueError as e:
+        assert str(e) == "first"
+    print("✓ Unparsable hedge ignored; a failed race raises the first error")
+
+
+def test_budget_and_switch_cap_hedges():
+    async def scenario(hedger):
+        await warm_up(hedger, "workout plan")
+        for _ in range(3):
+            attempt, _ = scripted([0.2, 0.2])
+            await hedger.run(attempt, "workout plan")
+        return hedger.metrics()
+
+    capped = asyncio.run(scenario(RequestHedger(enabled=True, budget=RetryBudget(ratio=0.0, reserve=1))))
+    assert capped['hedged'] == 1 and capped['budget_skipped'] == 2
+
+    disabled = asyncio.run(scenario(RequestHedger(enabled=False)))
+    assert disabled['hedged'] == 0 and disabled['plan_types']['workout plan']['samples'] == 23
+    print("✓ Budget allowed 1 hedge of 3; disabled hedger only tracks latency")
+
+
+def test_no_hedge_while_primary_waits_for_a_lane_slot():
+    """A primary that is slow because it is queued for a slot is not joined by a hedge."""
+    async def scenario():
+        lanes = PriorityLaneScheduler(capacity=1)
+        hedger = RequestHedger(enabled=True, min_samples=20, congested=lambda: lanes.queued() > 0)
+        await warm_up(hedger, "workout plan")
+        calls = {'n': 0}
+
+        async def attempt():
+            calls['n'] += 1
+            async with lanes.slot():
+                await asyncio.sleep(0.01)
+            return "plan"
+
+        async def other_request():
+            async with lanes.slot():
+                await asyncio.sleep(0.2)
+
+        busy = asyncio.ensure_future(other_request())
+        await asyncio.sleep(0)
+        result = await hedger.run(attempt, "workout plan")
+        await busy
+        return hedger, result, calls['n']
+
+    hedger, result, attempts = asyncio.run(scenario())
+    assert result == "plan" and attempts == 1
+    assert hedger.counters['hedged'] == 0 and hedger.counters['congestion_skipped'] == 1
+    assert hedger.budget.balance > 0
+    print("✓ Primary queued for a lane slot: hedge skipped, budget kept")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Hedged Request Tests")
+    print("=" * 60)
+    print()
+
+    try:
+        test_slow_call_is_hedged_and_loser_cancelled()
+        test_first_valid_parse_wins()
+        test_budget_and_switch_cap_hedges()
+        test_no_hedge_while_primary_waits_for_a_lane_slot()
+
+        print()
+        print("All tests completed!")
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        sys.exit(1)
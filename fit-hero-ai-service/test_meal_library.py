@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Tests for the meal library and the month assembler.
+These run offline - no AI service or API key needed.
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+
+import pytest
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.meal_library_service import MealLibrary, MonthMealAssembler
+
+INGREDIENTS = {
+    'breakfast': [['oats', 'almond milk', 'berries'], ['eggs', 'toast'], ['greek yogurt', 'granola']],
+    'lunch': [['chicken breast', 'rice'], ['lentils', 'quinoa'], ['chickpeas', 'cucumber']],
+    'dinner': [['salmon', 'sweet potato'], ['tofu', 'bok choy'], ['black beans', 'rice']],
+    'snacks': [['apple', 'peanut butter'], ['carrot sticks', 'hummus'], ['banana']]
+}
+
+
+def _meal(slot, i, protein, carbs, fat):
+    ingredients = INGREDIENTS[slot][i % len(INGREDIENTS[slot])]
+    return {
+        'name': f"{slot} {i} {' '.join(ingredients)}",
+        'protein': f"{protein}g", 'carbs': f"{carbs}g", 'fat': f"{fat}g",
+        'calories': 4 * protein + 4 * carbs + 9 * fat,
+        'ingredients': ingredients, 'prep_time': 10 + i, 'instructions': 'Cook and serve'
+    }
+
+
+def _library():
+    library = MealLibrary(path=os.path.join(tempfile.mkdtemp(), 'meal_library.json'))
+    for slot in ('breakfast', 'lunch', 'dinner'):
+        library.add_meals(slot, [_meal(slot, i, 30 + i % 7, 50 + i % 11, 15 + i % 5) for i in range(30)])
+    library.add_meals('snacks', [_meal('snacks', i, 5, 20, 6) for i in range(9)])
+    return library
+
+
+def test_library_validates_and_tags_meals():
+    """Inconsistent or duplicate meals are rejected; conflicts are tagged and persisted."""
+    library = _library()
+    bad = dict(_meal('lunch', 99, 30, 50, 15), calories=1500)
+    assert library.add_meals('lunch', [bad, _meal('lunch', 0, 30, 50, 15)]) == 0
+
+    library.save()
+    reloaded = MealLibrary(path=library.path)
+    assert reloaded.stats() == library.stats()
+    eggs = next(m for m in reloaded.meals['breakfast'] if 'eggs' in m['ingredients'])
+    assert 'egg' in eggs['conflicts'] and 'vegan' in eggs['conflicts']
+    assert 'vegetarian' not in eggs['conflicts']
+    print(f"✓ Library: {reloaded.stats()} (version {reloaded.version})")
+
+
+def test_assembler_builds_a_constrained_varied_month():
+    """A month respects allergies/diet, varies meals and keeps the filtered schema."""
+    assembler = MonthMealAssembler(_library())
+    targets = {'calories': 2000, 'protein': 130, 'carbs': 210, 'fat': 65}
+    daily_meals = assembler.assemble(31, targets, ['peanuts'], ['vegetarian'], seed='user_5_2026')
+
+    assert list(daily_meals) == [str(d) for d in range(1, 32)]
+    day = daily_meals['1']
+    assert set(day) == {'breakfast', 'lunch', 'dinner', 'snacks'}
+    assert day['lunch']['protein'].endswith('g')
+
+    for meals in daily_meals.values():
+        assert 'chicken' not in meals['lunch']['name']
+        assert 'salmon' not in meals['dinner']['name']
+        assert all('peanut' not in s['name'] for s in meals['snacks'])
+
+    for slot in ('breakfast', 'lunch', 'dinner'):
+        names = [daily_meals[str(d)][slot]['name'] for d in range(1, 32)]
+        assert all(names[i] not in names[i + 1:i + 7] for i in range(len(names)))
+    print("✓ Month assembled")
+
+
+def test_unknown_allergy_is_not_ignored():
+    """An allergy the scanner cannot resolve makes the assembler refuse the month."""
+    assembler = MonthMealAssembler(_library())
+    targets = {'calories': 2000, 'protein': 130, 'carbs': 210, 'fat': 65}
+    for allergies, preferences in ((['kiwi'], ['balanced']), ([], ['low_fodmap'])):
+        try:
+            assembler.assemble(30, targets, allergies, preferences, seed='user_5_2026')
+            assert False, f"{allergies + preferences} should not be assembled from the library"
+        except ValueError as e:
+            assert (allergies + preferences)[0] in str(e)
+    # Preferences that restrict nothing still use the library
+    assert len(assembler.assemble(30, targets, ['peanuts'], ['Balanced'], seed='user_5_2026')) == 30
+    print("✓ Unknown allergy or diet rejected by the assembler")
+
+
+def test_unknown_allergy_falls_back_to_the_model():
+    """generate_monthly_meal_plan asks the model when the library cannot honour an allergy."""
+    pytest.importorskip('google.generativeai')
+    pytest.importorskip('aiohttp')
+    from services import monthly_plan_service as module
+    from services.standardized_template_service import StandardizedTemplateService
+    from services.compact_schema_service import CompactSchemaService
+
+    prompts = []
+
+    async def generate_hedged(prompt, label):
+        prompts.append(prompt)
+        return "{}", {"daily_meals": {}}
+
+    async def notify(**kwargs):
+        pass
+
+    service = module.MonthlyPlanService.__new__(module.MonthlyPlanService)
+    service.template_service = StandardizedTemplateService()
+    service.compact_schema = CompactSchemaService()
+    service._generate_hedged = generate_hedged
+    originals = (module.meal_assembler, module.webhook_service.notify_meal_plan_generated)
+    module.meal_assembler = MonthMealAssembler(_library())
+    module.webhook_service.notify_meal_plan_generated = notify
+    try:
+        result = asyncio.run(service.generate_monthly_meal_plan(
+            user_id='u1', month=9, year=2025, age=30, weight=70.0, goals=['maintenance'],
+            activity_level='moderately_active', dietary_preferences=['balanced'],
+            allergies=['kiwi'], use_meal_library=True
+        ))
+    finally:
+        module.meal_assembler, module.webhook_service.notify_meal_plan_generated = originals
+    assert result['success'] and result.get('source') != 'meal_library'
+    assert len(prompts) == 1 and 'kiwi' in prompts[0]
+    print("✓ Unknown allergy sent to the model instead of the library")
+
+
+if __name__ == "__main__":
+    test_library_validates_and_tags_meals()
+    test_assembler_builds_a_constrained_varied_month()
+    test_unknown_allergy_is_not_ignored()
+    test_unknown_allergy_falls_back_to_the_model()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for the vectorized nutrition engine and the nutrition target table.
+These run offline - no AI service or API key needed.
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.nutrition_engine_service import NutritionEngine
+from services.nutrition_target_service import NutritionTargetTable
+
+
+def _day(calories, protein, carbs, fat):
+    meal = {"calories": calories, "protein": f"{protein}g", "carbs": f"{carbs}g", "fat": f"{fat}g"}
+    return {"breakfast": dict(meal), "lunch": dict(meal), "dinner": dict(meal), "snacks": [{"calories": 100}]}
+
+
+def test_targets_follow_macro_distribution():
+    """Gram targets come from macro_distributions percentages and 4/4/9 kcal."""
+    engine = NutritionEngine()
+    report = engine.validate_plan({"daily_meals": {}}, ["weight_loss"], 2000)
+
+    assert report['objective'] == 'weight_loss'
+    assert report['daily_targets'] == {"calories": 2000, "protein": 150, "carbs": 200, "fat": 67}
+    print(f"✓ Targets: {report['daily_targets']}")
+
+
+def test_batch_flags_off_target_and_inconsistent_days():
+    """Totals, weekly sums and flags are computed per plan in one batch."""
+    engine = NutritionEngine()
+    on_target = {"daily_meals": {str(d): _day(600, 50, 65, 22) for d in range(1, 9)}}
+    off_target = {"daily_meals": {"1": _day(900, 50, 65, 22), "2": _day(600, 50, 65, 22)}}
+
+    reports = engine.validate_plans([on_target, off_target], [["weight_loss"], ["weight_loss"]], [1900, 1900])
+
+    assert reports[0]['off_target_days'] == {}
+    assert reports[0]['weekly_totals']['week_1']['calories'] == 7 * 1900
+    assert reports[0]['weekly_totals']['week_2']['calories'] == 1900
+    assert reports[0]['days_on_target'] == 8
+
+    assert reports[1]['off_target_days'] == {"1": ["calories"]}
+    assert {"day": "1", "meal": "breakfast"} in reports[1]['inconsistent_meals']
+    assert all(item['day'] == "1" for item in reports[1]['inconsistent_meals'])
+    print("✓ Batch flags")
+
+
+def test_target_table_lookup_matches_batch():
+    """Scalar and vectorized lookups agree; explicit calories rescale macros."""
+    table = NutritionTargetTable()
+    profiles = [(30, 75, ["maintenance"], "moderately_active"),
+                (19, 55, ["weight_loss"], "sedentary"),
+                (62, 95, ["strength"], "very_active")]
+
+    batch = table.lookup_batch(*zip(*profiles))
+    for row, profile in zip(batch.tolist(), profiles):
+        single = table.lookup(*profile)
+        assert row == [single['calories'], single['protein'], single['carbs'], single['fat']]
+
+    # maintenance, medium person: 2200 midpoint + half of the 300-500 very_active add
+    assert table.lookup(30, 75, ["maintenance"])['calories'] == 2400
+    assert table.lookup(62, 95, ["strength"])['objective'] == 'muscle_building'
+
+    scaled = table.lookup(30, 75, ["maintenance"], calorie_target=1800)
+    assert scaled['calories'] == 1800 and scaled['protein'] == round(150 * 1800 / 2400)
+    print("✓ Target table lookups")
+
+
+if __name__ == "__main__":
+    test_targets_follow_macro_distribution()
+    test_batch_flags_off_target_and_inconsistent_days()
+    test_target_table_lookup_matches_batch()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for the deterministic periodization engine.
+These run offline - no AI service or API key needed.
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.standardized_template_service import StandardizedTemplateService
+from services.periodization_service import PeriodizationEngine
+from services.exercise_catalog_service import ExerciseCatalog
+
+
+def test_weekly_structure_follows_block():
+    """Volume peaks in week 3, week 4 deloads and trailing days stay in the deload."""
+    engine = PeriodizationEngine(StandardizedTemplateService())
+    weeks = engine.build('intermediate', 31)['weekly_structure']
+
+    assert list(weeks) == ['week_1', 'week_2', 'week_3', 'week_4', 'week_5']
+    assert weeks['week_3']['sets'] >= weeks['week_2']['sets'] >= weeks['week_1']['sets']
+    assert weeks['week_3']['reps'] <= weeks['week_1']['reps']
+    assert weeks['week_4']['sets'] <= weeks['week_3']['sets']
+    assert weeks['week_5']['days'] == [29, 31]
+    assert weeks['week_5']['focus'] == 'Recovery/Deload'
+    assert all(w['rest_seconds'] % 5 == 0 for w in weeks.values())
+    print(f"✓ Week 3: {weeks['week_3']['sets']}x{weeks['week_3']['reps']}, {weeks['week_3']['rest_seconds']}s")
+
+
+def test_apply_fills_missing_prescriptions_only():
+    """Catalog ranges drive sets/reps; values sent by the model are kept."""
+    catalog = ExerciseCatalog()
+    engine = PeriodizationEngine(StandardizedTemplateService(), catalog)
+    entry = catalog.lookup_name("Leg press machine (2-3 sets, 12-15 reps)")
+
+    plan = engine.apply({
+        'monthly_overview': {'month': 9, 'year': 2025},
+        'daily_workouts': {
+            '1': {'workout_type': 'Lower Body', 'exercises': [{'exercise_id': entry['id'], 'notes': ''}]},
+            '16': {'workout_type': 'Lower Body', 'exercises': [
+                {'exercise_id': entry['id']},
+                {'exercise_id': entry['id'], 'sets': 5, 'reps': '5'}
+            ]}
+        }
+    }, 'beginner', 30)
+
+    day_1 = plan['daily_workouts']['1']['exercises'][0]
+    peak, override = plan['daily_workouts']['16']['exercises']
+    assert (day_1['sets'], day_1['reps']) == (2, '15')
+    assert (peak['sets'], peak['reps']) == (3, '12')
+    assert (override['sets'], override['reps']) == (5, '5')
+    assert day_1['rest_time'] and day_1['progression']
+    assert plan['monthly_overview']['training_phases'] == ['Foundation', 'Build', 'Peak', 'Recovery']
+    assert set(plan['progression_plan']) == {f"week_{n}_adjustments" for n in range(1, 6)}
+    print(f"✓ Day 1 {day_1['sets']}x{day_1['reps']}, day 16 {peak['sets']}x{peak['reps']}")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Periodization Tests")
+    print("=" * 60)
+    print()
+
+    try:
+        test_weekly_structure_follows_block()
+        test_apply_fills_missing_prescriptions_only()
+
+        print()
+        print("All tests completed!")
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for the dictionary-trained plan storage codec.
+These run offline - no AI service or API key needed.
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.plan_codec_service import PlanStorageCodec, UnknownDictionaryError, train_dictionary, plan_codec
+from services.serialization_service import dumps
+from build_plan_dictionary import plan_samples
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_plan(filename):
+    with open(os.path.join(BASE_DIR, filename)) as f:
+        return json.load(f)
+
+
+def test_bundled_dictionary_round_trips_and_shrinks():
+    """Entries written with the installed dictionary read back exactly and beat plain zstd."""
+    plan = load_plan('expected_workout_structure.json')
+    day = plan['daily_workouts']['3']
+
+    assert plan_codec.current_id is not None
+    assert plan_codec.decode(plan_codec.encode(plan)) == plan
+    assert plan_codec.entry_dictionary(plan_codec.encode(day)) == plan_codec.current_id
+    assert plan_codec.decode(dumps(day)) == day
+
+    without = PlanStorageCodec(tempfile.mkdtemp())
+    assert len(plan_codec.encode(day)) < len(without.encode(day))
+    print(f"✓ Day entry {len(without.encode(day))} -> {len(plan_codec.encode(day))} bytes")
+
+
+def test_old_entries_stay_readable_after_retrain():
+    """A new dictionary version becomes current; entries from the old one still decode."""
+    meal_plan = load_plan('expected_meal_structure.json')
+    with tempfile.TemporaryDirectory() as directory:
+        codec = PlanStorageCodec(directory)
+        first = codec.install(train_dictionary(plan_samples(load_plan('expected_workout_structure.json'))))
+        old_entry = codec.encode(meal_plan)
+        second = codec.install(train_dictionary(plan_samples(meal_plan)))
+
+        reloaded = PlanStorageCodec(directory)
+        assert first != second and reloaded.current_id == second
+        assert reloaded.decode(old_entry) == meal_plan
+        assert reloaded.entry_dictionary(reloaded.encode(meal_plan)) == second
+
+        os.remove(os.path.join(directory, sorted(os.listdir(directory))[0]))
+        try:
+            PlanStorageCodec(directory).decode(old_entry)
+            assert False, "missing dictionary should raise"
+        except UnknownDictionaryError:
+            pass
+    print(f"✓ Versions {first} -> {second}")
+
+
+def test_too_small_corpus_is_rejected():
+    try:
+        train_dictionary([dumps(load_plan('expected_meal_structure.json'))])
+        assert False, "one sample should not train a dictionary"
+    except ValueError as e:
+        assert "1 samples" in str(e)
+    print("✓ Single-sample corpus rejected")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Plan Storage Codec Tests")
+    print("=" * 60)
+    print()
+
+    try:
+        test_bundled_dictionary_round_trips_and_shrinks()
+        test_old_entries_stay_readable_after_retrain()
+        test_too_small_corpus_is_rejected()
+
+        print()
+        print("All tests completed!")
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        sys.exit(1)
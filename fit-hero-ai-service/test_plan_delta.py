@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for month-over-month (delta) workout generation.
+These run offline - no AI service or API key needed.
+"""
+
+import sys
+import os
+import json
+import calendar
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.plan_delta_service import workout_delta
+from services.ai_filter_service import AIFilterService
+from services.exercise_catalog_service import exercise_catalog
+
+
+def previous_month_plan():
+    """September 2025: Monday lower body, Wednesday upper body (one off day), Friday cardio."""
+    sessions = {
+        0: ("Lower Body", ["Squats", "Deadlifts"]),
+        2: ("Upper Body", ["Push-ups"]),
+        4: ("Cardio", ["Burpees"])
+    }
+    daily_workouts = {}
+    for day in range(1, 31):
+        workout_type, names = sessions.get(calendar.weekday(2025, 9, day), ("Rest", []))
+        if day == 17:
+            workout_type, names = "Full Body", ["Squats", "Push-ups"]
+        daily_workouts[str(day)] = {
+            "workout_type": workout_type,
+            "duration": 45 if names else 0,
+            "intensity": "Moderate",
+            "exercises": [{"name": name} for name in names]
+        }
+    plan = AIFilterService().filter_workout_plan({
+        "monthly_overview": {"month": 9, "year": 2025},
+        "daily_workouts": daily_workouts,
+        "safety_guidelines": ["Warm up first"]
+    })
+    for day, workout in plan['daily_workouts'].items():
+        workout['day_of_week'] = calendar.day_name[calendar.weekday(2025, 9, int(day))]
+    return plan
+
+
+def test_summary_keeps_one_session_per_weekday():
+    plan = previous_month_plan()
+    summary = workout_delta.summarize(plan)
+    assert summary['weekdays']['Monday']['workout_type'] == 'Lower Body'
+    # The one-off Full Body Wednesday loses to the usual Upper Body session
+    assert summary['weekdays']['Wednesday']['workout_type'] == 'Upper Body'
+    assert all('sets' not in e for day in summary['weekdays'].values() for e in day['exercises'])
+
+    lines = workout_delta.prompt_lines(summary)
+    full = json.dumps(plan['daily_workouts'], separators=(',', ':'))
+    assert len(lines) * 5 < len(full)
+    print(f"✓ Previous month summarized in {len(lines)} chars (plan days: {len(full)} chars)")
+
+
+def test_delta_expands_to_the_new_month():
+    """Weekday changes and swaps land on the right weekdays of the new month."""
+    summary = workout_delta.summarize(previous_month_plan())
+    push_ups = exercise_catalog.lookup_name("Push-ups")['id']
+    burpees = exercise_catalog.lookup_name("Burpees")['id']
+    squats = exercise_catalog.lookup_name("Squats")['id']
+
+    delta = {
+        "monthly_overview": {"progression_focus": "More unilateral work"},
+        "weekday_changes": {"friday": {"workout_type": "Full Body", "exercises": [{"exercise_id": squats}]}},
+        "exercise_swaps": {str(push_ups): burpees}
+    }
+    plan = workout_delta.apply(summary, delta, 10, 2025)
+
+    assert len(plan['daily_workouts']) == 31
+    assert plan['monthly_overview'] == {
+        "progression_focus": "More unilateral work", "month": 10, "year": 2025,
+        "based_on": {"month": 9, "year": 2025}
+    }
+    # October 3rd 2025 is a Friday, the 1st a Wednesday
+    assert plan['daily_workouts']['3']['workout_type'] == 'Full Body'
+    assert [e['exercise_id'] for e in plan['daily_workouts']['1']['exercises']] == [burpees]
+    assert plan['daily_workouts']['6']['workout_type'] == 'Lower Body'
+    assert plan['safety_guidelines'] == ["Warm up first"]
+
+    filtered = AIFilterService().filter_workout_plan(plan)
+    assert filtered['daily_workouts']['1']['exercises'][0]['name'] == exercise_catalog.get(burpees)['name']
+    assert 'catalog_violations' not in filtered
+    print(f"✓ Delta of {len(json.dumps(delta))} chars expanded to {len(plan['daily_workouts'])} days")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Plan Delta Tests")
+    print("=" * 60)
+    print()
+
+    try:
+        test_summary_keeps_one_session_per_weekday()
+        test_delta_expands_to_the_new_month()
+
+        print()
+        print("All tests completed!")
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for the derived plan fields (day names, counts, totals, averages).
+These run offline - no AI service or API key needed.
+"""
+
+import sys
+import os
+import json
+import copy
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.plan_derivation_service import PlanDerivationService
+from services.rolling_plan_service import rolling_planner
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_fixture(name):
+    with open(os.path.join(BASE_DIR, name)) as f:
+        return json.load(f)
+
+
+def test_workout_day_names_and_counts():
+    """Model-sent day names and counts are overwritten from the calendar."""
+    plan = load_fixture('expected_workout_structure.json')
+    expected_workout_days = sum(1 for w in plan['daily_workouts'].values() if w['workout_type'] != 'Rest')
+    for workout in plan['daily_workouts'].values():
+        workout['day_of_week'] = 'Someday'
+    plan['monthly_overview'].update({'workout_days': 99, 'rest_days': 99})
+
+    derived = PlanDerivationService().derive_workout_fields(plan, 9, 2025)
+
+    # September 1st 2025 is a Monday, the 30th a Tuesday
+    assert derived['daily_workouts']['1']['day_of_week'] == 'Monday'
+    assert derived['daily_workouts']['30']['day_of_week'] == 'Tuesday'
+    overview = derived['monthly_overview']
+    assert overview['total_days'] == 30 and overview['workout_days'] == expected_workout_days
+    assert overview['rest_days'] == 30 - expected_workout_days
+    print(f"✓ {overview['workout_days']} workout days, {overview['rest_days']} rest days")
+
+
+def test_rolling_plan_counts_only_generated_days():
+    """Days past a rolling plan's horizon are not generated yet, so they are not rest days."""
+    plan = load_fixture('expected_workout_structure.json')
+    plan = rolling_planner.limit(plan, 'daily_workouts', 7)
+    workout_days = sum(1 for w in plan['daily_workouts'].values() if w['workout_type'] != 'Rest')
+
+    derived = PlanDerivationService().derive_workout_fields(plan, 9, 2025)
+    overview = derived['monthly_overview']
+    assert overview['total_days'] == 30 and overview['generated_through'] == 7
+    assert overview['workout_days'] == workout_days and overview['rest_days'] == 7 - workout_days
+
+    # Once the horizon reaches the month's end the marker is dropped and the whole month counts
+    full = load_fixture('expected_workout_structure.json')
+    full['monthly_overview']['generated_through'] = 7
+    rolling_planner.advance(full, [str(day) for day in range(8, 31)], 9, 2025)
+    assert PlanDerivationService().derive_workout_fields(full, 9, 2025)['monthly_overview']['rest_days'] == \
+        30 - full['monthly_overview']['workout_days']
+    print(f"✓ Rolling week 1: {workout_days} workout days, {7 - workout_days} rest days")
+
+
+def test_daily_totals_from_string_amounts():
+    service = PlanDerivationService()
+    day = {
+        'breakfast': {'calories': '400 kcal', 'protein': '20g', 'carbs': '30.5g', 'fat': 15},
+        'lunch': {'calories': 500, 'protein': '25 g', 'carbs': None, 'fat': 'n/a'},
+        'dinner': 'not a meal',
+        'snacks': [{'calories': 150, 'protein': '5g'}, 'apple']
+    }
+    assert service.compute_daily_totals(day) == {'calories': 1050, 'protein': 50, 'carbs': 30, 'fat': 15}
+    assert service.parse_amount(True) == 0.0 and service.parse_amount('1.5 cups') == 1.5
+    print("✓ Daily totals from mixed string/number amounts")
+
+
+def test_meal_dates_averages_and_shopping_lists():
+    plan = load_fixture('expected_meal_structure.json')
+    plan['daily_meals']['2']['daily_totals'] = {'calories': 1, 'fiber': 30}
+    plan['daily_meals']['31'] = copy.deepcopy(plan['daily_meals']['1'])  # not a September day
+
+    derived = PlanDerivationService().derive_meal_fields(plan, 9, 2025)
+    day_1 = derived['daily_meals']['1']
+    assert day_1['date'] == '2025-09-01' and day_1['day_of_week'] == 'Monday'
+    assert day_1['daily_totals'] == {'calories': 1626, 'protein': 85, 'carbs': 100, 'fat': 60, 'fiber': 30}
+    # Derived totals replace the model's, non-derivable extras are kept
+    assert derived['daily_meals']['2']['daily_totals']['calories'] != 1
+    assert derived['daily_meals']['2']['daily_totals']['fiber'] == 30
+    assert 'date' not in derived['daily_meals']['31']
+
+    totals = [derived['daily_meals'][str(day)]['daily_totals'] for day in range(1, 31)]
+    assert derived['monthly_overview']['average_daily_calories'] == round(sum(t['calories'] for t in totals) / 30)
+    assert derived['nutritional_balance']['monthly_protein_avg'] == round(sum(t['protein'] for t in totals) / 30)
+    assert list(derived['weekly_shopping_lists']) == ['week_1', 'week_2', 'week_3', 'week_4', 'week_5']
+    assert derived['weekly_shopping_lists']['week_1']['days'] == [1, 7]
+    print(f"✓ Average {derived['monthly_overview']['average_daily_calories']} kcal/day over 30 days")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Plan Derivation Tests")
+    print("=" * 60)
+    print()
+
+    try:
+        test_workout_day_names_and_counts()
+        test_rolling_plan_counts_only_generated_days()
+        test_daily_totals_from_string_amounts()
+        test_meal_dates_averages_and_shopping_lists()
+
+        print()
+        print("All tests completed!")
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        sys.exit(1)
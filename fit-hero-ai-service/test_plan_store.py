@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite plan store.
+These run offline - no AI service or API key needed.
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.plan_store_service import PlanStore, entry_etag
+
+
+def load_plan(filename):
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    with open(os.path.join(base_dir, filename)) as f:
+        return json.load(f)
+
+
+def test_generation_states_and_timings():
+    """States move through the pipeline; a new run resets timings; errors are kept."""
+    with tempfile.TemporaryDirectory() as directory:
+        store = PlanStore(os.path.join(directory, 'plans.db'))
+        assert store.status('u1', 2025, 9, 'workout') is None
+
+        store.mark('u1', 2025, 9, 'workout', 'queued')
+        store.mark('u1', 2025, 9, 'workout', 'generating')
+        store.mark('u1', 2025, 9, 'workout', 'parsed')
+        status = store.status('u1', 2025, 9, 'workout')
+        assert status['status'] == 'parsed' and not status['has_plan']
+        assert list(status['timings']) == ['queued', 'generating', 'parsed']
+
+        store.mark('u1', 2025, 9, 'workout', 'failed', error='timeout')
+        store.mark('u1', 2025, 9, 'workout', 'generating')
+        status = store.status('u1', 2025, 9, 'workout')
+        assert list(status['timings']) == ['generating'] and status['error'] is None
+        assert store.status('u1', 2025, 9, 'meal') is None
+        store.close()
+        print(f"✓ {status}")
+
+
+def test_plans_round_trip_through_day_rows():
+    """Saved plans come back exactly, survive reopening and replace older versions."""
+    meal_plan = load_plan('expected_meal_structure.json')
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'plans.db')
+        store = PlanStore(path)
+        store.save_plan('u1', 2025, 9, 'meal', load_plan('expected_meal_structure.json'))
+        store.save_plan('u1', 2025, 9, 'meal', meal_plan)
+        store.close()
+
+        reopened = PlanStore(path)
+        stored = reopened.get_plan('u1', 2025, 9, 'meal')
+        assert json.dumps(stored) == json.dumps(meal_plan)
+        assert reopened.status('u1', 2025, 9, 'meal')['has_plan']
+        assert reopened.get_plan('u1', 2025, 9, 'workout') is None
+        assert reopened._conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        reopened.close()
+        print(f"✓ {os.path.getsize(path)} bytes on disk for {len(json.dumps(meal_plan))} bytes of plan")
+
+
+def test_day_slices_and_etags():
+    """Ranges come back in day order; a slice's ETag changes only when its rows change."""
+    meal_plan = load_plan('expected_meal_structure.json')
+    with tempfile.TemporaryDirectory() as directory:
+        store = PlanStore(os.path.join(directory, 'plans.db'))
+        store.save_plan('u1', 2025, 9, 'meal', meal_plan)
+
+        days = meal_plan['daily_meals']
+        rows = store.read_days('u1', 2025, 9, 'meal', 1, 12)
+        assert [day for day, _ in rows] == [d for d in days if 1 <= int(d) <= 12]
+        assert [store.decode_day(blob) for _, blob in rows] == [days[d] for d, _ in rows]
+        assert store.read_days('u1', 2025, 9, 'meal', 40, 45) == []
+
+        overview = store.read_overview('u1', 2025, 9, 'meal')
+        assert 'daily_meals' not in store.decode_overview(overview)
+        assert store.read_overview('u1', 2025, 9, 'workout') is None
+
+        day_etag = entry_etag(rows[0][1])
+        overview_etag = entry_etag(overview)
+        changed = json.loads(json.dumps(meal_plan))
+        changed['daily_meals'][rows[1][0]]['breakfast'] = {'name': 'Porridge'}
+        store.save_plan('u1', 2025, 9, 'meal', changed)
+
+        assert entry_etag(store.read_days('u1', 2025, 9, 'meal', 1, 1)[0][1]) == day_etag
+        assert entry_etag(store.read_overview('u1', 2025, 9, 'meal')) == overview_etag
+        assert entry_etag(store.read_days('u1', 2025, 9, 'meal', 2, 2)[0][1]) != entry_etag(rows[1][1])
+        store.close()
+        print(f"✓ {len(rows)} day slice rows read, ETags stable for unchanged rows")
+
+
+def test_database_opened_on_first_use():
+    """Creating a store (as importing the module does) writes no file until it is used."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'data', 'plans.db')
+        store = PlanStore(path)
+        assert not os.path.exists(path)
+        store.close()
+
+        assert store.status('u1', 2025, 9, 'workout') is None
+        assert os.path.exists(path)
+        store.close()
+
+        # Reopened after close; open() connects eagerly
+        store.mark('u1', 2025, 9, 'workout', 'generating')
+        store.close()
+        reopened = PlanStore(path)
+        reopened.open()
+        assert reopened.status('u1', 2025, 9, 'workout')['status'] == 'generating'
+        reopened.close()
+    print("✓ Database file created on first use, not on construction")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Plan Store Tests")
+    print("=" * 60)
+    print()
+
+    try:
+        test_generation_states_and_timings()
+        test_plans_round_trip_through_day_rows()
+        test_day_slices_and_etags()
+        test_database_opened_on_first_use()
+
+        print()
+        print("All tests completed!")
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        sys.exit(1)
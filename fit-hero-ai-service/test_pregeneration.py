@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests for off-peak pre-generation of next month's plans.
+These run offline - no AI service or API key needed.
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+from datetime import datetime
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.plan_store_service import PlanStore
+from services.pregeneration_scheduler import PregenerationScheduler, parse_windows
+
+
+def workout_request(user_id, month, year):
+    return {"user_id": user_id, "month": month, "year": year, "fitness_level": "beginner",
+            "goals": ["general_fitness"], "available_time": 45, "equipment": ["bodyweight"]}
+
+
+def stored_plan(month, year):
+    return {"monthly_overview": {"month": month, "year": year}, "daily_workouts": {"1": {"workout_type": "Rest"}}}
+
+
+def test_windows_wrap_midnight():
+    assert parse_windows("01:00-05:30") == [(60, 330)]
+    assert parse_windows("23:00-02:00") == [(1380, 1440), (0, 120)]
+    assert parse_windows("") == [(0, 1440)]
+    print("✓ Window specs parsed")
+
+
+def test_renewals_queue_and_run_off_peak():
+    """Last days of the month queue next month's plans; they run only in the window, at the set rate."""
+    with tempfile.TemporaryDirectory() as directory:
+        store = PlanStore(os.path.join(directory, 'plans.db'))
+        for user_id in ('u1', 'u2'):
+            request = workout_request(user_id, 10, 2025)
+            store.mark(user_id, 2025, 10, 'workout', 'generating')
+            store.save_plan(user_id, 2025, 10, 'workout', stored_plan(10, 2025), request=request)
+            store.mark(user_id, 2025, 10, 'workout', 'delivered')
+        store.mark('u3', 2025, 10, 'workout', 'failed', error='boom')
+
+        ran = []
+
+        async def runner(plan_type, request):
+            ran.append((plan_type, request['user_id'], request['month'], request['year']))
+            key = (request['user_id'], request['year'], request['month'], plan_type)
+            store.mark(*key, 'parsed')
+            store.save_plan(*key, stored_plan(request['month'], request['year']), request=request)
+            store.mark(*key, 'filtered')
+
+        scheduler = PregenerationScheduler(runner, store=store, lead_days=3, windows="01:00-05:00", rate_per_minute=60)
+
+        # Too early in the month: nothing is queued
+        assert not asyncio.run(scheduler.tick(datetime(2025, 10, 20, 2, 0)))
+        assert store.month_plans(2025, 11) == []
+
+        # Last days, outside the window: queued but not generated
+        assert not asyncio.run(scheduler.tick(datetime(2025, 10, 30, 12, 0)))
+        assert sorted(p['user_id'] for p in store.month_plans(2025, 11)) == ['u1', 'u2']
+        report = scheduler.progress(datetime(2025, 10, 30, 12, 0))
+        assert report['remaining'] == 2 and report['eta'].startswith('2025-10-31T01:00')
+
+        # Inside the window: one plan per tick, then the rate limit holds the next one
+        assert asyncio.run(scheduler.tick(datetime(2025, 10, 31, 2, 0)))
+        assert not asyncio.run(scheduler.tick(datetime(2025, 10, 31, 2, 0)))
+        scheduler._last_start = None
+        assert asyncio.run(scheduler.tick(datetime(2025, 10, 31, 2, 1)))
+        assert ran == [('workout', 'u1', 11, 2025), ('workout', 'u2', 11, 2025)]
+
+        report = scheduler.progress(datetime(2025, 10, 31, 2, 2))
+        assert report['completed'] == 2 and report['remaining'] == 0 and report['eta'] is None
+
+        # Renewal with the same request is served from the store; a changed profile is not
+        assert store.pregenerated_plan('u1', 2025, 11, 'workout', workout_request('u1', 11, 2025)) is not None
+        changed = dict(workout_request('u1', 11, 2025), fitness_level='advanced')
+        assert store.pregenerated_plan('u1', 2025, 11, 'workout', changed) is None
+        store.mark('u1', 2025, 11, 'workout', 'delivered')
+        assert store.pregenerated_plan('u1', 2025, 11, 'workout', workout_request('u1', 11, 2025)) is None
+        store.close()
+        print(f"✓ Pre-generated {len(ran)} plans off-peak; {report['by_status']}")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Pre-generation Scheduler Tests")
+    print("=" * 60)
+    print()
+
+    try:
+        test_windows_wrap_midnight()
+        test_renewals_queue_and_run_off_peak()
+
+        print()
+        print("All tests completed!")
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        sys.exit(1)
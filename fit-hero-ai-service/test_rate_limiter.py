@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for the model call rate limiter (token buckets + AIMD concurrency).
+These run offline - no AI service or API key needed.
+"""
+
+import sys
+import os
+import asyncio
+import time
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.rate_limiter_service import ModelRateLimiter, TokenBucket, is_rate_limited
+
+
+class ResourceExhausted(Exception):
+    code = 429
+
+
+class FakeResponse:
+    class usage_metadata:
+        total_token_count = 1000
+
+
+def test_aimd_grows_and_halves():
+    """Successes add about one slot per window; a burst of 429s halves the limit once."""
+    async def scenario():
+        limiter = ModelRateLimiter(requests_per_minute=6000, tokens_per_minute=10 ** 9,
+                                   initial_concurrency=4, max_concurrency=16)
+
+        async def ok():
+            return FakeResponse()
+
+        async def throttled():
+            raise ResourceExhausted("429 Resource has been exhausted")
+
+        for _ in range(8):
+            await limiter.run(ok, "prompt", "workout plan")
+        grown = limiter.concurrency.limit
+        assert 5.5 < grown < 6.5
+        assert not limiter.concurrency.congested()
+
+        for _ in range(3):
+            try:
+                await limiter.run(throttled, "prompt", "workout plan")
+            except ResourceExhausted:
+                pass
+        assert abs(limiter.concurrency.limit - grown / 2) < 1e-9
+        # Backing off after the burst counts as congested (no hedging) until the cooldown ends
+        assert limiter.concurrency.congested()
+        metrics = limiter.metrics()
+        assert metrics['rate_limited'] == 3 and metrics['concurrency_decreases'] == 1
+        assert metrics['in_flight'] == 0
+        return grown, metrics['concurrency_limit']
+
+    grown, limit = asyncio.run(scenario())
+    print(f"✓ Concurrency {grown:.2f} after 8 successes, {limit} after a 429 burst")
+
+
+def test_concurrency_is_enforced():
+    async def scenario():
+        limiter = ModelRateLimiter(requests_per_minute=6000, tokens_per_minute=10 ** 9,
+                                   initial_concurrency=2, max_concurrency=2)
+        active = peak = 0
+
+        async def call():
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return FakeResponse()
+
+        await asyncio.gather(*(limiter.run(call, "p", "meal plan") for _ in range(6)))
+        return peak
+
+    assert asyncio.run(scenario()) == 2
+    print("✓ At most 2 calls in flight")
+
+
+def test_token_bucket_waits_for_refill():
+    async def scenario():
+        bucket = TokenBucket(rate_per_minute=600, capacity=10)  # 10 tokens per second
+        await bucket.take(10)
+        started = time.monotonic()
+        await bucket.take(2)
+        return time.monotonic() - started
+
+    waited = asyncio.run(scenario())
+    assert 0.15 < waited < 0.5
+    print(f"✓ Waited {waited:.2f}s for 2 tokens at 10/s")
+
+
+def test_rate_limit_classification():
+    assert is_rate_limited(ResourceExhausted("quota"))
+    assert is_rate_limited(Exception("429 Too Many Requests"))
+    assert not is_rate_limited(ValueError("Invalid JSON"))
+    print("✓ 429s recognized")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Model Rate Limiter Tests")
+    print("=" * 60)
+    print()
+
+    try:
+        test_aimd_grows_and_halves()
+        test_concurrency_is_enforced()
+        test_token_bucket_waits_for_refill()
+        test_rate_limit_classification()
+
+        print()
+        print("All tests completed!")
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        sys.exit(1)
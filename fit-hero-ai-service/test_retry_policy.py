@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Tests for the model call retry policy (error classes, backoff, deadline, budget).
+These run offline - no AI service or API key needed.
+"""
+
+import sys
+import os
+import asyncio
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.priority_lane_service import PriorityLaneScheduler
+from services.retry_policy_service import (
+    RetryPolicy, RetryBudget, ModelResponseError, check_response, classify_error,
+    RATE_LIMITED, SERVER_ERROR, DEADLINE, SAFETY_BLOCK, EMPTY_RESPONSE, PERMANENT
+)
+
+
+class ServiceUnavailable(Exception):
+    code = 503
+
+
+class ResourceExhausted(Exception):
+    code = 429
+
+
+class FakeResponse:
+    def __init__(self, text="{}", finish_reason="STOP"):
+        self._text = text
+        self.candidates = [type("Candidate", (), {"finish_reason": finish_reason})()]
+
+    @property
+    def text(self):
+        if self._text is None:
+            raise ValueError("The `response.text` quick accessor requires the response to contain a valid `Part`")
+        return self._text
+
+
+def fast_policy(**kwargs):
+    options = dict(max_attempts=4, base_delay=0.001, deadline_seconds=5, attempt_timeout=1, min_attempt_seconds=0.01)
+    options.update(kwargs)
+    return RetryPolicy(**options)
+
+
+def test_error_classes():
+    assert classify_error(ResourceExhausted("quota")) == RATE_LIMITED
+    assert classify_error(ServiceUnavailable("backend")) == SERVER_ERROR
+    assert classify_error(Exception("503 The model is overloaded")) == SERVER_ERROR
+    assert classify_error(asyncio.TimeoutError()) == DEADLINE
+    assert classify_error(ValueError("400 Invalid argument")) == PERMANENT
+
+    for response, kind in ((FakeResponse(finish_reason="SAFETY"), SAFETY_BLOCK),
+                           (FakeResponse(text=None), EMPTY_RESPONSE),
+                           (FakeResponse(text="  "), EMPTY_RESPONSE)):
+        try:
+            check_response(response)
+            assert False, "check_response accepted a blocked or empty response"
+        except ModelResponseError as e:
+            assert classify_error(e) == kind
+    assert check_response(FakeResponse('{"ok": true}')) == '{"ok": true}'
+    print("✓ 429, 5xx, deadline, safety block and empty text classified")
+
+
+def test_transient_failures_are_retried():
+    failures = [ServiceUnavailable("503"), ResourceExhausted("429"), ModelResponseError(EMPTY_RESPONSE, "empty")]
+    calls = 0
+
+    async def attempt():
+        nonlocal calls
+        calls += 1
+        if failures:
+            raise failures.pop(0)
+        return "plan"
+
+    policy = fast_policy()
+    assert asyncio.run(policy.run(attempt, "workout plan")) == "plan"
+    assert calls == 4
+    metrics = policy.metrics()
+    assert metrics['retries'] == 3 and metrics['recovered'] == 1
+    assert metrics['errors'] == {SERVER_ERROR: 1, RATE_LIMITED: 1, EMPTY_RESPONSE: 1}
+    print(f"✓ Recovered after {metrics['retries']} retries")
+
+
+def test_permanent_and_repeated_safety_blocks_are_not_retried():
+    async def bad_request():
+        raise ValueError("400 Invalid argument")
+
+    async def blocked():
+        raise ModelResponseError(SAFETY_BLOCK, "blocked")
+
+    policy = fast_policy()
+    for attempt, expected_attempts in ((bad_request, 1), (blocked, 2)):
+        before = policy.counters['attempts']
+        try:
+            asyncio.run(policy.run(attempt))
+            assert False, "failure was swallowed"
+        except (ValueError, ModelResponseError):
+            pass
+        assert policy.counters['attempts'] - before == expected_attempts
+    print("✓ Bad requests fail at once; a safety block is retried once")
+
+
+def test_slow_attempts_stop_at_the_deadline():
+    async def slow():
+        await asyncio.sleep(1)
+
+    policy = fast_policy(deadline_seconds=0.25, attempt_timeout=0.1)
+    try:
+        asyncio.run(policy.run(slow))
+        assert False, "slow call did not time out"
+    except asyncio.TimeoutError:
+        pass
+    assert 2 <= policy.counters['attempts'] <= 3
+    print(f"✓ {policy.counters['attempts']} attempts fit in a 0.25s deadline")
+
+
+def test_budget_caps_retries_across_calls():
+    async def failing():
+        raise ServiceUnavailable("503")
+
+    policy = fast_policy(budget=RetryBudget(ratio=0.1, reserve=2))
+    for _ in range(5):
+        try:
+            asyncio.run(policy.run(failing))
+        except ServiceUnavailable:
+            pass
+    metrics = policy.metrics()
+    # Reserve of 2 plus 0.1 per call: two retries in total, then none
+    assert metrics['retries'] == 2 and metrics['budget_exhausted'] == 5
+    assert metrics['attempts'] == 7
+    print(f"✓ Retry budget allowed {metrics['retries']} retries for 5 failing calls")
+
+
+def test_slot_wait_does_not_count_against_the_attempt_timeout():
+    """A call queued behind a held lane slot longer than attempt_timeout still succeeds first time."""
+    policy = fast_policy(attempt_timeout=0.1)
+    lanes = PriorityLaneScheduler(capacity=1)
+
+    async def model_call():
+        await asyncio.sleep(0.02)
+        return FakeResponse("plan")
+
+    async def attempt(timed):
+        # Same shape as MonthlyPlanService._call_model
+        async with lanes.slot():
+            response = await timed(model_call())
+        check_response(response)
+        return response
+
+    async def scenario():
+        async def hold():
+            async with lanes.slot():
+                await asyncio.sleep(0.3)
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        response = await policy.run(attempt, "renewal", timed_call=True)
+        await holder
+        return response
+
+    assert asyncio.run(scenario()).text == "plan"
+    assert policy.metrics()['attempts'] == 1 and policy.metrics()['errors'] == {}
+
+    # The model call itself is still held to the timeout
+    async def slow_attempt(timed):
+        return await timed(asyncio.sleep(1))
+
+    policy = fast_policy(attempt_timeout=0.05, max_attempts=2)
+    try:
+        asyncio.run(policy.run(slow_attempt, timed_call=True))
+        assert False, "a slow model call was not timed out"
+    except asyncio.TimeoutError:
+        pass
+    assert policy.metrics()['errors'] == {DEADLINE: 2}
+    print("✓ 0.3s slot wait with a 0.1s attempt timeout: one attempt, no deadline error")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Model Retry Policy Tests")
+    print("=" * 60)
+    print()
+
+    try:
+        test_error_classes()
+        test_transient_failures_are_retried()
+        test_permanent_and_repeated_safety_blocks_are_not_retried()
+        test_slow_attempts_stop_at_the_deadline()
+        test_budget_caps_retries_across_calls()
+        test_slot_wait_does_not_count_against_the_attempt_timeout()
+
+        print()
+        print("All tests completed!")
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        sys.exit(1)
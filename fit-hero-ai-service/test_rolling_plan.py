@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for rolling-horizon (week by week) plan generation.
+These run offline - no AI service or API key needed.
+"""
+
+import sys
+import os
+from datetime import date
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.rolling_plan_service import RollingPlanner, HORIZON_KEY
+from services.ai_filter_service import AIFilterService
+
+
+def test_windows_follow_weeks_of_the_month():
+    """Week 1 up front, then 8-14, 15-21, 22-28 and the remaining days."""
+    planner = RollingPlanner(lead_days=2)
+    generated = {day: {"workout_type": "Rest"} for day in map(str, range(1, 11))}
+    plan = planner.limit({"monthly_overview": {"month": 10, "year": 2025}, "daily_workouts": generated},
+                         'daily_workouts', planner.first_window(10, 2025))
+    assert list(plan['daily_workouts']) == [str(day) for day in range(1, 8)]
+    assert plan['monthly_overview'][HORIZON_KEY] == 7
+
+    windows = []
+    while True:
+        window = planner.next_window(plan, 10, 2025)
+        if not window:
+            break
+        windows.append((window[0], window[-1]))
+        plan = planner.advance(plan, window, 10, 2025)
+    assert windows == [('8', '14'), ('15', '21'), ('22', '28'), ('29', '31')]
+    # A completed month carries no horizon marker
+    assert HORIZON_KEY not in plan['monthly_overview']
+    assert planner.due_date(plan, 10, 2025) is None
+    print(f"✓ Windows: {windows}")
+
+
+def test_next_week_is_due_before_it_starts():
+    planner = RollingPlanner(lead_days=2)
+    plan = {"monthly_overview": {"month": 10, "year": 2025, HORIZON_KEY: 7}}
+    assert planner.due_date(plan, 10, 2025) == date(2025, 10, 6)
+    assert not planner.is_due(plan, 10, 2025, today=date(2025, 10, 5))
+    assert planner.is_due(plan, 10, 2025, today=date(2025, 10, 6))
+    print("✓ Week 2 due on Oct 6 with a 2-day lead")
+
+
+def test_completeness_stops_at_the_horizon():
+    """Missing days are filled only inside the generated weeks."""
+    filter_service = AIFilterService()
+    plan = filter_service.filter_workout_plan({
+        "monthly_overview": {"month": 10, "year": 2025, HORIZON_KEY: 7},
+        "daily_workouts": {"1": {"workout_type": "Full Body", "exercises": [{"name": "Squats"}]}}
+    })
+    assert sorted(plan['daily_workouts'], key=int) == [str(day) for day in range(1, 8)]
+
+    plan['monthly_overview'].pop(HORIZON_KEY)
+    plan = filter_service._ensure_daily_workout_completeness(plan)
+    assert len(plan['daily_workouts']) == 31
+    print("✓ Rest days filled up to day 7, then to day 31 once complete")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Rolling Plan Tests")
+    print("=" * 60)
+    print()
+
+    try:
+        test_windows_follow_weeks_of_the_month()
+        test_next_week_is_due_before_it_starts()
+        test_completeness_stops_at_the_horizon()
+
+        print()
+        print("All tests completed!")
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests for the response/storage JSON encoder.
+These run offline - no AI service or API key needed.
+"""
+
+import sys
+import os
+import json
+from datetime import date
+
+import numpy as np
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services import serialization_service
+from services.serialization_service import dumps, loads, PlanJSONResponse
+
+
+def test_plan_values_serialize_with_and_without_orjson():
+    """numpy values and dates encode the same with orjson and the stdlib fallback."""
+    value = {'calories': np.int32(1800), 'ratio': np.float64(0.5), 'days': np.arange(3),
+             'date': date(2025, 9, 1), 'name': 'Açaí bowl'}
+    expected = {'calories': 1800, 'ratio': 0.5, 'days': [0, 1, 2], 'date': '2025-09-01', 'name': 'Açaí bowl'}
+
+    fast = dumps(value)
+    saved = serialization_service.orjson
+    serialization_service.orjson = None
+    try:
+        fallback = dumps(value)
+    finally:
+        serialization_service.orjson = saved
+
+    assert loads(fast) == json.loads(fallback) == expected
+    assert isinstance(fast, bytes) and isinstance(fallback, bytes)
+    print(f"✓ {fast.decode('utf-8')}")
+
+
+def test_response_renders_bytes():
+    """PlanJSONResponse renders compact JSON with the JSON media type."""
+    response = PlanJSONResponse({'status': 'success', 'validated_data': {'1': {'workout_type': 'Rest'}}})
+    assert response.media_type == 'application/json'
+    assert loads(response.body) == {'status': 'success', 'validated_data': {'1': {'workout_type': 'Rest'}}}
+    print(f"✓ {len(response.body)} bytes")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Serialization Tests")
+    print("=" * 60)
+    print()
+
+    try:
+        test_plan_values_serialize_with_and_without_orjson()
+        test_response_renders_bytes()
+
+        print()
+        print("All tests completed!")
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        sys.exit(1)
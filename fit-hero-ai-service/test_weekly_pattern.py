@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for the weekly-pattern plan encoding.
+These run offline - no AI service or API key needed.
+"""
+
+import sys
+import os
+import json
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.weekly_pattern_service import weekly_pattern_codec
+
+
+def test_expected_plans_round_trip_exactly():
+    """Encoded plans decode to the same JSON, key order included, and are smaller."""
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    for filename in ('expected_workout_structure.json', 'expected_meal_structure.json'):
+        with open(os.path.join(base_dir, filename)) as f:
+            plan = json.load(f)
+
+        encoded = weekly_pattern_codec.encode_plan(plan)
+        decoded = weekly_pattern_codec.decode_plan(json.loads(json.dumps(encoded)))
+
+        assert json.dumps(decoded) == json.dumps(plan)
+        assert encoded is not plan and 'encoding' not in json.dumps(plan)
+        assert weekly_pattern_codec.size_report(plan)['plan']['reduction_percent'] > 20
+        print(f"✓ {filename}: {weekly_pattern_codec.size_report(plan)['plan']}")
+
+
+def test_irregular_days_round_trip():
+    """Missing days, odd key order, non-day keys and reordered fields survive."""
+    daily = {
+        '2': {'workout_type': 'Upper Body', 'duration': 45, 'exercises': [1, 2]},
+        '1': {'workout_type': 'Rest'},
+        '9': {'duration': 45, 'workout_type': 'Upper Body', 'exercises': [1, 2]},
+        '16': {'workout_type': 'Upper Body', 'duration': 50, 'exercises': [1, 2], 'notes': 'deload'},
+        'extra': 'kept as is'
+    }
+    encoded = weekly_pattern_codec.encode(daily)
+    decoded = weekly_pattern_codec.decode(encoded)
+
+    assert json.dumps(decoded) == json.dumps(daily)
+    assert encoded['keys'] == list(daily)
+    assert decoded['2'] is not decoded['9']
+    print(f"✓ Overrides: {json.dumps(encoded['overrides'])}")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Weekly Pattern Tests")
+    print("=" * 60)
+    print()
+
+    try:
+        test_expected_plans_round_trip_exactly()
+        test_irregular_days_round_trip()
+
+        print()
+        print("All tests completed!")
+    except AssertionError as e:
+        print(f"❌ Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,76 @@
+#!/usr/bin/env tsx
+
+/**
+ * Test that an AI service workout response with id-only exercises
+ * (exercise_id + notes, as the compact prompt returns them) is stored with
+ * exercise names: the plan must come from validated_data, where the service
+ * has resolved the ids, not from re-filtering raw_response.
+ */
+
+import { MonthlyPlanFilter } from '../src/lib/monthly-plan-filter';
+
+function assert(condition: unknown, message: string) {
+  if (!condition) {
+    throw new Error(message);
+  }
+}
+
+// Shape returned by callAIService for /generate-monthly-workout-plan?include=raw,validated
+const idOnlyResponse = {
+  raw_response: {
+    success: true,
+    workout_plan: {
+      monthly_overview: { month: 10, year: 2025 },
+      daily_workouts: {
+        '1': { workout_type: 'Lower Body', exercises: [{ exercise_id: 12, notes: 'Knees over toes' }] },
+        '2': { workout_type: 'Rest', exercises: [] }
+      }
+    }
+  },
+  validated_data: {
+    monthly_overview: { month: 10, year: 2025 },
+    daily_workouts: {
+      '1': {
+        workout_type: 'Lower Body',
+        exercises: [{ exercise_id: 12, name: 'Squats', sets: 3, reps: '12', notes: 'Knees over toes' }]
+      },
+      '2': { workout_type: 'Rest', exercises: [] }
+    }
+  }
+};
+
+function testIdOnlyPayloadUsesValidatedData() {
+  const plan = MonthlyPlanFilter.serviceValidatedPlan(idOnlyResponse, 'daily_workouts');
+  assert(plan === idOnlyResponse.validated_data, 'validated_data should be used for an id-only response');
+
+  const days = plan!.daily_workouts as Record<string, { exercises: Array<Record<string, unknown>> }>;
+  const exercises = Object.values(days).flatMap(day => day.exercises);
+  assert(exercises.length === 1, `expected 1 exercise, got ${exercises.length}`);
+  assert(exercises.every(e => e.exercise_id !== undefined && typeof e.name === 'string' && e.name),
+    'every stored exercise should keep its id and have a resolved name');
+
+  // The raw response really is id-only: it must not be what gets stored
+  const rawDay = (idOnlyResponse.raw_response.workout_plan.daily_workouts['1'].exercises[0]) as Record<string, unknown>;
+  assert(rawDay.name === undefined, 'fixture raw_response should have no exercise names');
+  console.log('✅ PASS - id-only workout response stored from validated_data with names');
+}
+
+function testFallsBackWithoutValidatedData() {
+  assert(MonthlyPlanFilter.serviceValidatedPlan({ validated_data: undefined }, 'daily_workouts') === null,
+    'missing validated_data should fall back to manual filtering');
+  assert(MonthlyPlanFilter.serviceValidatedPlan({ validated_data: { daily_workouts: {} } }, 'daily_workouts') === null,
+    'empty daily_workouts should fall back to manual filtering');
+  assert(MonthlyPlanFilter.serviceValidatedPlan(idOnlyResponse, 'daily_meals') === null,
+    'a workout plan is not a meal plan');
+  console.log('✅ PASS - responses without validated days fall back to manual filtering');
+}
+
+try {
+  console.log('🧪 Testing id-only workout payloads\n');
+  testIdOnlyPayloadUsesValidatedData();
+  testFallsBackWithoutValidatedData();
+  console.log('\n🎉 All tests passed');
+} catch (error) {
+  console.error('❌ FAIL -', error instanceof Error ? error.message : error);
+  process.exit(1);
+}
@@ -54,7 +54,7 @@ export default function AITestPage() {
     setError(null);
     
     try {
-      const response = await fetch('http://localhost:8001/generate-monthly-workout-plan', {
+      const response = await fetch('http://localhost:8001/generate-monthly-workout-plan?include=raw,filtered,validated', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -1,4 +1,4 @@
-import { MonthlyPlanService } from './monthly-plan-service'
+import { MonthlyPlanService, AIPriority } from './monthly-plan-service'
 import { prisma } from '@/lib/prisma'
 import { withDbTransaction } from './db-utils'
 
@@ -12,6 +12,7 @@ export class AIActivationService {
   /**
    * Triggers AI service activation when a new player profile is created
    * Generates initial monthly workout and meal plans for the current month
+   * Renewals pass priority 'batch' so they queue behind new players
    */
   async activateAIForNewPlayer(playerId: string, playerData: {
     age: number
@@ -21,7 +22,7 @@ export class AIActivationService {
     trainingEnvironment: string
     dietaryRestrictions: string[]
     forbiddenFoods: string[]
-  }) {
+  }, priority: AIPriority = 'interactive') {
     console.log(`🤖 Activating AI Service for new player: ${playerId}`)
     
     try {
@@ -44,7 +45,7 @@ export class AIActivationService {
       console.log(`📅 Generating initial plans for ${currentMonth}/${currentYear}`)
       
       // Generate plans using the monthly plan service directly (fallback approach)
-      return await this.activateAIForNewPlayerFallback(playerId, playerData)
+      return await this.activateAIForNewPlayerFallback(playerId, playerData, priority)
       
     } catch (error) {
       console.error('🚨 AI Service activation failed:', error)
@@ -63,7 +64,7 @@ export class AIActivationService {
     trainingEnvironment: string
     dietaryRestrictions: string[]
     forbiddenFoods: string[]
-  }) {
+  }, priority: AIPriority = 'interactive') {
     const currentDate = new Date()
     const currentMonth = currentDate.getMonth() + 1
     const currentYear = currentDate.getFullYear()
@@ -83,7 +84,8 @@ export class AIActivationService {
       availableTime: 45, // Default 45 minutes
       equipment: equipment,
       injuries: [], // Default empty, user can update later
-      preferences: [] // Default empty, user can update later
+      preferences: [], // Default empty, user can update later
+      priority
     })
     
     // Generate meal plan
@@ -94,7 +96,8 @@ export class AIActivationService {
       allergies: playerData.forbiddenFoods,
       calorieTarget: undefined, // Let system calculate
       mealPrepTime: 30, // Default 30 minutes
-      budgetRange: 'medium' // Default medium budget
+      budgetRange: 'medium', // Default medium budget
+      priority
     })
     
     // Execute both plans in parallel
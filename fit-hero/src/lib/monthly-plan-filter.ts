@@ -182,6 +182,23 @@ export class MonthlyPlanFilter {
     }
   }
 
+  /**
+   * Plan the AI service already filtered and validated, if the response has one.
+   * Workout prompts return exercise_id references only; names are resolved into
+   * validated_data by the service, so raw_response must not be re-filtered and stored.
+   */
+  static serviceValidatedPlan(
+    aiResponse: { validated_data?: unknown },
+    dayKey: 'daily_workouts' | 'daily_meals'
+  ): Record<string, unknown> | null {
+    const validated = aiResponse.validated_data as Record<string, unknown> | undefined;
+    if (!validated || typeof validated !== 'object') {
+      return null;
+    }
+    const days = validated[dayKey] as Record<string, unknown> | undefined;
+    return days && typeof days === 'object' && Object.keys(days).length > 0 ? validated : null;
+  }
+
   /**
    * Extract daily workout for a specific date from monthly plan
    */
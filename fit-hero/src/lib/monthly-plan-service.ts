@@ -2,6 +2,10 @@ import { prisma } from '@/lib/prisma'
 import { MonthlyPlanStatus } from '@prisma/client'
 import { MonthlyPlanFilter } from '@/lib/monthly-plan-filter'
 
+// Lane the AI service queues model calls in: a player waiting on screen is
+// interactive, renewals are batch and wait behind interactive work
+export type AIPriority = 'interactive' | 'batch'
+
 export class MonthlyPlanService {
   
   /**
@@ -15,6 +19,7 @@ export class MonthlyPlanService {
     equipment: string[]
     injuries?: string[]
     preferences?: string[]
+    priority?: AIPriority
   }) {
     try {
       // Check if plan already exists
@@ -63,7 +68,29 @@ export class MonthlyPlanService {
         equipment: params.equipment,
         injuries_limitations: params.injuries,
         preferred_activities: params.preferences
-      })
+      }, params.priority)
+
+      // The AI service resolves exercise_id references into validated_data; use it directly
+      const serviceValidated = MonthlyPlanFilter.serviceValidatedPlan(aiResponse, 'daily_workouts')
+      if (serviceValidated) {
+        const fitHeroValidation = await this.validateWorkoutPlan(serviceValidated)
+        const finalPlan = await prisma.monthlyWorkoutPlan.update({
+          where: { id: pendingPlan.id },
+          data: {
+            rawAiResponse: aiResponse.raw_response as any,
+            filteredData: (aiResponse.filtered_data || serviceValidated) as any,
+            validatedData: fitHeroValidation.validatedData,
+            status: fitHeroValidation.isValid ? MonthlyPlanStatus.ACTIVE : MonthlyPlanStatus.ERROR,
+            errorLog: fitHeroValidation.errors ? { errors: fitHeroValidation.errors } as any : undefined
+          }
+        })
+
+        console.log('✅ Using pre-validated workout data from AI service')
+        return finalPlan
+      }
+
+      // Fallback to manual filtering if AI service didn't provide validated data
+      console.log('🔄 AI service did not provide validated workout data, applying manual filtering')
 
       // Apply AI service filtering for workout data
       const workoutFilterResult = await MonthlyPlanFilter.filterMonthlyWorkoutPlan(
@@ -192,6 +219,7 @@ export class MonthlyPlanService {
     calorieTarget?: number
     mealPrepTime?: number
     budgetRange?: string
+    priority?: AIPriority
   }) {
     try {
       // Check if plan already exists
@@ -242,7 +270,7 @@ export class MonthlyPlanService {
         calorie_target: params.calorieTarget,
         meal_prep_time: params.mealPrepTime,
         budget_range: params.budgetRange
-      })
+      }, params.priority)
 
       // Check if AI service already provided validated data
       if (aiResponse.validated_data && Object.keys(aiResponse.validated_data).length > 0) {
@@ -322,11 +350,12 @@ export class MonthlyPlanService {
   /**
    * Call AI service for plan generation
    */
-  private async callAIService(type: 'workout' | 'meal', params: any) {
+  private async callAIService(type: 'workout' | 'meal', params: any, priority: AIPriority = 'interactive') {
     const AI_SERVICE_URL = process.env.NEXT_PUBLIC_AI_SERVICE_URL || 'http://localhost:8001'
-    const endpoint = type === 'workout' 
+    // The service returns only validated_data by default; the raw response is re-filtered here
+    const endpoint = (type === 'workout' 
       ? '/generate-monthly-workout-plan'
-      : '/generate-monthly-meal-plan'
+      : '/generate-monthly-meal-plan') + `?include=raw,validated&priority=${priority}`
 
     console.log(`🌐 Calling AI service: ${AI_SERVICE_URL}${endpoint}`)
 
@@ -93,7 +93,7 @@ class MonthlyRenewalService {
           };
 
           // Use the existing AI activation service to generate plans
-          await aiActivationService.activateAIForNewPlayer(user.id, profileData);
+          await aiActivationService.activateAIForNewPlayer(user.id, profileData, 'batch');
 
           console.log(`✅ Successfully renewed plans for user: ${user.name}`);
           stats.successfulRenewals++;
@@ -167,7 +167,7 @@ class MonthlyRenewalService {
         forbiddenFoods: user.forbiddenFoods || []
       };
 
-      await aiActivationService.activateAIForNewPlayer(user.id, profileData);
+      await aiActivationService.activateAIForNewPlayer(user.id, profileData, 'batch');
       console.log(`✅ Successfully renewed plans for user: ${user.name}`);
       return true;
 